@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'alx_backend_caching_property_listings.settings')
+# Serve the async property views (see PROPERTY_ASYNC_VIEWS in settings)
+os.environ.setdefault('PROPERTY_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
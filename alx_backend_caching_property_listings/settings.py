@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'properties.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -130,16 +132,138 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Cache Configuration
 # https://docs.djangoproject.com/en/5.2/topics/cache/
 
-CACHES = {
-    'default': {
+# Value encodings selectable with REDIS_SERIALIZER and REDIS_COMPRESSOR.
+# msgpack and lz4 are optional packages; compare the choices with
+# `python manage.py benchmark_cache_configs`.
+REDIS_SERIALIZERS = {
+    'pickle': 'django_redis.serializers.pickle.PickleSerializer',
+    'msgpack': 'properties.cache_backends.MsgpackSerializer',
+}
+REDIS_COMPRESSORS = {
+    'none': 'django_redis.compressors.identity.IdentityCompressor',
+    'zlib': 'django_redis.compressors.zlib.ZlibCompressor',
+    'lz4': 'django_redis.compressors.lz4.Lz4Compressor',
+}
+
+# Settings of one django_redis cache alias. Timeouts are kept short: a hung
+# Redis should fail a call fast enough for the request to fall back to the
+# database (see PROPERTY_REDIS_CIRCUIT_BREAKER).
+def redis_cache(location, max_connections, serializer, compressor, ignore_exceptions=False):
+    return {
         'BACKEND': 'django_redis.cache.RedisCache',
-        'LOCATION': 'redis://redis:6379/1',
+        'LOCATION': location,
         'OPTIONS': {
-            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            # Count cache hits/misses and Redis round trips per request
+            # (see properties.middleware.RequestMetricsMiddleware)
+            'CLIENT_CLASS': 'properties.cache_backends.InstrumentedClient',
+            'REDIS_CLIENT_CLASS': 'properties.cache_backends.CountingRedis',
+            'CONNECTION_POOL_KWARGS': {
+                'max_connections': max_connections,
+            },
+            'SOCKET_CONNECT_TIMEOUT': float(os.environ.get('REDIS_CONNECT_TIMEOUT', 0.25)),
+            'SOCKET_TIMEOUT': float(os.environ.get('REDIS_SOCKET_TIMEOUT', 0.5)),
+            'SERIALIZER': REDIS_SERIALIZERS[serializer],
+            'COMPRESSOR': REDIS_COMPRESSORS[compressor],
+            # Treat Redis errors as cache misses in the cache API
+            'IGNORE_EXCEPTIONS': ignore_exceptions,
         }
     }
+
+# One alias per workload, each with its own Redis database, connection pool
+# and encoding, so that clearing or evicting one never touches the others:
+#   default:  property data (lists, entries, searches, counters)
+#   pages:    cache_page responses (rendered JSON, compressed)
+#   sessions: user sessions, on a Redis server that never evicts
+# Listing data and pages share the LRU-evicting `redis` server of
+# docker-compose.yml; sessions live on `redis-sessions`.
+CACHES = {
+    'default': redis_cache(
+        os.environ.get('REDIS_URL', 'redis://redis:6379/1'),
+        int(os.environ.get('REDIS_MAX_CONNECTIONS', 50)),
+        os.environ.get('REDIS_SERIALIZER', 'pickle'),
+        os.environ.get('REDIS_COMPRESSOR', 'none'),
+    ),
+    'pages': redis_cache(
+        os.environ.get('REDIS_PAGES_URL', 'redis://redis:6379/2'),
+        int(os.environ.get('REDIS_PAGES_MAX_CONNECTIONS', 20)),
+        # Pages are HttpResponse objects, which msgpack would pickle anyway
+        'pickle',
+        os.environ.get('REDIS_PAGES_COMPRESSOR', 'zlib'),
+        # Without Redis, cache_page simply renders the view
+        ignore_exceptions=True,
+    ),
+    'sessions': redis_cache(
+        os.environ.get('REDIS_SESSIONS_URL', 'redis://redis-sessions:6379/0'),
+        int(os.environ.get('REDIS_SESSIONS_MAX_CONNECTIONS', 20)),
+        'pickle',
+        'none',
+    ),
+}
+
+# Cache of the response caching middleware and cache_page_per_generation
+CACHE_MIDDLEWARE_ALIAS = 'pages'
+
+# redis.asyncio client used by the async views (see
+# properties.cache_backends.get_async_redis_connection). Same server and
+# limits as the default cache; each event loop gets its own pool.
+PROPERTY_ASYNC_REDIS = {
+    'LOCATION': CACHES['default']['LOCATION'],
+    'CONNECTION_POOL_KWARGS': {
+        'max_connections': int(os.environ.get('REDIS_MAX_CONNECTIONS', 50)),
+        'socket_connect_timeout': float(os.environ.get('REDIS_CONNECT_TIMEOUT', 1)),
+        'socket_timeout': float(os.environ.get('REDIS_SOCKET_TIMEOUT', 1)),
+    },
 }
 
-# Use Redis for session storage
+# Route the listing, detail and metrics URLs to their async views. asgi.py
+# turns this on, so ASGI servers run them on the event loop while WSGI
+# servers keep the sync views.
+PROPERTY_ASYNC_VIEWS = os.environ.get('PROPERTY_ASYNC_VIEWS') == '1'
+
+# Use Redis for session storage, apart from the listing data (see CACHES)
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
-SESSION_CACHE_ALIAS = 'default'
+SESSION_CACHE_ALIAS = 'sessions'
+
+# In-process (L1) cache in front of Redis for hot property keys.
+# Entries are dropped across workers via Redis pub/sub when properties change;
+# TIMEOUT bounds staleness if an invalidation is ever missed.
+PROPERTY_LOCAL_CACHE = {
+    'MAX_ENTRIES': 1024,
+    'TIMEOUT': 5,
+}
+
+# Warm the property caches in a background thread when the app starts
+# (see warm_property_cache). Enabled through the environment so that only
+# the web process prewarms, not every management command.
+PROPERTY_CACHE_PREWARM = {
+    'ENABLED': os.environ.get('PROPERTY_CACHE_PREWARM') == '1',
+    'WORKERS': 4,
+    'PAGES': 20,
+    'SEARCHES': 50,
+}
+
+# Per-request cache, Redis and database instrumentation: Server-Timing
+# headers, structured logs and per-view histograms. SAMPLE_RATE is the
+# fraction of requests measured; 0 turns it off.
+PROPERTY_REQUEST_METRICS = {
+    'SAMPLE_RATE': float(os.environ.get('PROPERTY_METRICS_SAMPLE_RATE', 1)),
+}
+
+# Circuit breaker in front of each Redis server (see properties.resilience).
+# FAILURE_THRESHOLD consecutive failed calls, or calls slower than
+# SLOW_CALL_SECONDS, open it; reads then skip Redis and use the database
+# until a probe RESET_TIMEOUT seconds later finds Redis answering again.
+PROPERTY_REDIS_CIRCUIT_BREAKER = {
+    'FAILURE_THRESHOLD': int(os.environ.get('REDIS_BREAKER_FAILURE_THRESHOLD', 5)),
+    'RESET_TIMEOUT': float(os.environ.get('REDIS_BREAKER_RESET_TIMEOUT', 10)),
+    'SLOW_CALL_SECONDS': float(os.environ.get('REDIS_BREAKER_SLOW_CALL_SECONDS', 0.25)),
+}
+
+# Changes feed (/properties/changes/). Tombstones of deleted properties are
+# kept RETENTION_DAYS (see prune_property_tombstones); older cursors get 410.
+# Changes younger than SETTLE_SECONDS are held back until transactions that
+# saved before them have committed.
+PROPERTY_CHANGES = {
+    'RETENTION_DAYS': 30,
+    'SETTLE_SECONDS': 2,
+}
@@ -16,8 +16,10 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from properties.views import prometheus_metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('properties/', include('properties.urls')),
+    path('metrics', prometheus_metrics, name='prometheus_metrics'),
 ]
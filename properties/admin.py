@@ -1,11 +1,144 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.postgres.search import SearchQuery
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.functional import cached_property
+from .facets import FacetsUnavailable, get_location_counts
+from .invalidation import MAX_TRACKED_PROPERTY_IDS, queue_property_invalidation
 from .models import Property
+from .pagination import estimate_queryset_count
+from .resilience import REDIS_ERRORS, record_fallback
+from .search import CATALOGUE_TAG, SEARCH_CONFIG, property_search_vector, property_tags
 
 # Register your models here.
 
+# Locations offered by the changelist's location filter, largest first
+ADMIN_LOCATION_CHOICES = 100
+
+# Rows deleted per statement by the bulk delete
+ADMIN_DELETE_BATCH_SIZE = 5000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that counts the changelist with estimate_queryset_count().
+
+    Django's own runs an exact COUNT(*) for every changelist page, which
+    scans the whole table once it holds millions of rows. Page links past
+    the end of an underestimated count are simply missing, and pages past
+    the end of an overestimated one are empty.
+    """
+
+    @cached_property
+    def count(self):
+        total, _ = estimate_queryset_count(self.object_list)
+        return total
+
+
+class LocationFilter(admin.SimpleListFilter):
+    """
+    Location filter whose choices come from the cached facets.
+
+    A list_filter on the field itself runs SELECT DISTINCT location over the
+    whole table for every changelist page; the facets list the largest
+    ADMIN_LOCATION_CHOICES locations, with their counts, from one Redis call.
+    Until the facets are first built, or while Redis is down, it has no
+    choices.
+    """
+    title = 'location'
+    parameter_name = 'location'
+
+    def lookups(self, request, model_admin):
+        try:
+            counted = get_location_counts(ADMIN_LOCATION_CHOICES)
+        except FacetsUnavailable:
+            counted = []
+        except REDIS_ERRORS as e:
+            record_fallback('admin_locations', e)
+            counted = []
+        choices = [(location, f'{location} ({count})') for location, count in counted]
+        # A filter without choices is dropped along with its selection
+        selected = self.value()
+        if selected and selected not in dict(choices):
+            choices.append((selected, selected))
+        return choices
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(location=self.value())
+        return queryset
+
+
 @admin.register(Property)
 class PropertyAdmin(admin.ModelAdmin):
+    """
+    Property admin that stays fast with millions of rows.
+
+    Counts are estimated (EstimatedCountPaginator) and the unfiltered total
+    is never counted, search uses the GIN full-text index on PostgreSQL,
+    location choices come from the facets, and bulk actions invalidate the
+    caches once per action rather than once per row.
+    """
     list_display = ('title', 'price', 'location', 'created_at')
-    list_filter = ('location', 'created_at')
+    list_filter = (LocationFilter, 'created_at')
+    # Used as is by databases other than PostgreSQL (see get_search_results)
     search_fields = ('title', 'description', 'location')
     ordering = ('-created_at',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # Facet counts run one COUNT per filter choice
+    show_facets = admin.ShowFacets.NEVER
+    actions = ['refresh_property_caches']
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Match the full-text index over title and description, or a location.
+
+        Returns:
+            tuple: (QuerySet, whether it may contain duplicates)
+        """
+        search_term = search_term.strip()
+        if not search_term or connection.vendor != 'postgresql':
+            return super().get_search_results(request, queryset, search_term)
+        queryset = queryset.alias(search=property_search_vector()).filter(
+            Q(search=SearchQuery(search_term, config=SEARCH_CONFIG)) | Q(location=search_term)
+        )
+        return queryset, False
+
+    def delete_queryset(self, request, queryset):
+        """
+        Delete the selected properties in batches, with one invalidation batch.
+
+        queryset.delete() loads every selected row at once. Here
+        ADMIN_DELETE_BATCH_SIZE rows are deleted at a time, in one
+        transaction. The post_delete signals write each tombstone and join
+        the transaction's invalidation batch, so the caches are invalidated
+        once, when it commits.
+        """
+        using = queryset.db
+        pks = queryset.order_by('pk').values_list('pk', flat=True)
+        with transaction.atomic(using=using):
+            while True:
+                # Deleted rows drop out of the selection, so re-read its head
+                batch = list(pks[:ADMIN_DELETE_BATCH_SIZE])
+                if not batch:
+                    break
+                Property.objects.using(using).filter(pk__in=batch).delete()
+
+    @admin.action(description='Refresh cached copies of the selected properties')
+    def refresh_property_caches(self, request, queryset):
+        rows = list(queryset.order_by().values_list('id', 'location', 'price'))
+        if rows:
+            tags = {CATALOGUE_TAG}
+            for _, location, price in rows:
+                tags.update(property_tags(location, price))
+            queue_property_invalidation(
+                [pk for pk, _, _ in rows],
+                tags=tags,
+                last_modified=timezone.now(),
+                everything=len(rows) > MAX_TRACKED_PROPERTY_IDS,
+                using=queryset.db,
+            )
+        self.message_user(request, f'Refreshed the cached copies of {len(rows)} properties.', messages.SUCCESS)
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class PropertiesConfig(AppConfig):
@@ -11,3 +12,14 @@ class PropertiesConfig(AppConfig):
         This ensures that signal handlers are registered when Django starts.
         """
         import properties.signals
+        
+        # Time every database query for request metrics and /metrics
+        from django.db.backends.signals import connection_created
+        from properties.instrumentation import install_query_timer
+        connection_created.connect(install_query_timer)
+        
+        # Optional post-deploy prewarm (see warm_property_cache)
+        prewarm = getattr(settings, 'PROPERTY_CACHE_PREWARM', {})
+        if prewarm.get('ENABLED'):
+            from properties.warming import prewarm_in_background
+            prewarm_in_background(prewarm)
@@ -0,0 +1,279 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+from .caching import local_cache
+from .instrumentation import start_request_metrics, stop_request_metrics
+from .models import Property
+from decimal import Decimal
+import json
+import random
+import statistics
+import time
+
+DEFAULT_SEED = 42
+
+# Synthetic neighbourhoods. Listings are skewed towards the first ones, as
+# real catalogues are, so location searches return result sets of varied size.
+LOCATIONS = [f'District {i}' for i in range(1, 51)]
+LOCATION_WEIGHTS = [1 / i for i in range(1, 51)]
+PROPERTY_KINDS = ['Apartment', 'Condo', 'Townhouse', 'Family Home', 'Studio', 'Loft', 'Villa']
+FEATURES = ['city views', 'a garden', 'a garage', 'a balcony', 'marina access', 'a renovated kitchen']
+
+# Relative weights of the operations in each scenario. Reads go through the
+# URLs a client would use; writes go through the ORM, so the signals run.
+SCENARIOS = {
+    'list': {'list': 1},
+    'paginated': {'page': 1},
+    'read-mix': {'list': 2, 'page': 2, 'detail': 5, 'search': 1},
+    'metrics': {'metrics': 1},
+    'write-heavy': {'detail': 4, 'list': 2, 'update': 3, 'create': 1},
+}
+
+PAGE_SIZE = 50
+
+# Cursor pages followed before a 'page' operation starts over at the first page
+MAX_PAGE_DEPTH = 20
+
+
+def generate_property_rows(count, seed=DEFAULT_SEED, start=0):
+    """
+    Generate synthetic properties, identically for the same seed.
+
+    Args:
+        count: Number of rows
+        seed: Seed of the generator; the same seed gives the same rows
+        start: Index of the first row
+
+    Yields:
+        dict: external_id, title, description, price and location, in the
+        format read by populate_properties
+
+    Rows depend only on the seed and their index, so the first N rows of a
+    larger dataset are the N-row dataset and loading is resumable.
+    """
+    for i in range(start, start + count):
+        rng = random.Random(f'{seed}:{i}')
+        location = rng.choices(LOCATIONS, weights=LOCATION_WEIGHTS)[0]
+        kind = rng.choice(PROPERTY_KINDS)
+        bedrooms = rng.randint(1, 6)
+        yield {
+            'external_id': f'bench-{seed}-{i}',
+            'title': f'{bedrooms}-bedroom {kind} in {location}',
+            'description': (
+                f'{kind} with {rng.choice(FEATURES)} and {rng.choice(FEATURES)}. '
+                f'Listing {i} of the seed {seed} benchmark dataset.'
+            ),
+            'price': str(Decimal(rng.randrange(5_000_000, 200_000_000)).scaleb(-2)),
+            'location': location,
+        }
+
+
+def dataset_loaded(count, seed=DEFAULT_SEED):
+    """
+    Check whether the first and last rows of a generated dataset are stored.
+
+    Returns:
+        bool: True if loading the dataset again can be skipped
+    """
+    return Property.objects.filter(
+        external_id__in=[f'bench-{seed}-0', f'bench-{seed}-{count - 1}']
+    ).count() == 2
+
+
+def percentile(timings, percent):
+    if not timings:
+        return 0.0
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+class ScenarioRunner:
+    """
+    Drive one scenario's operation mix and measure every operation.
+
+    Operations are drawn from a seeded generator, so two runs against the
+    same dataset issue the same requests in the same order. Each operation
+    runs with its own RequestMetrics, which count its cache lookups, Redis
+    round trips and database queries. Writes are rolled back, so the cache
+    invalidation their commit would run is applied after the operation and
+    timed on its own.
+    """
+
+    def __init__(self, scenario, seed=DEFAULT_SEED, l1=False):
+        self.operations = SCENARIOS[scenario]
+        self.l1 = l1
+        self.rng = random.Random(f'{seed}:{scenario}')
+        self.seed = seed
+        self.client = Client()
+        self.cursor = None
+        self.page_depth = 0
+        self.created = 0
+        # on_commit callbacks of the last write, applied by commit()
+        self.pending = []
+        bounds = Property.objects.order_by('id').values_list('id', flat=True)
+        self.min_id = bounds.first() or 1
+        self.max_id = bounds.last() or 1
+
+    def run(self, requests, warmup=0):
+        """
+        Run the scenario.
+
+        Args:
+            requests: Number of timed operations
+            warmup: Untimed operations run first to fill the caches
+
+        Returns:
+            dict: Throughput, latency percentiles, per-operation counts,
+            database queries, Redis round trips and cache hit ratio
+        """
+        names = list(self.operations)
+        weights = list(self.operations.values())
+        for _ in range(warmup):
+            getattr(self, f'op_{self.rng.choices(names, weights)[0]}')()
+            self.commit()
+
+        timings = []
+        invalidation_timings = []
+        counts = dict.fromkeys(names, 0)
+        totals = {'errors': 0, 'db_queries': 0, 'redis_round_trips': 0, 'cache_hits': 0, 'cache_misses': 0}
+        start = time.perf_counter()
+        for _ in range(requests):
+            name = self.rng.choices(names, weights)[0]
+            metrics = start_request_metrics()
+            op_start = time.perf_counter()
+            try:
+                ok = getattr(self, f'op_{name}')()
+                timings.append((time.perf_counter() - op_start) * 1000)
+                # Its queries and round trips still count towards the operation
+                if self.pending:
+                    invalidation_timings.append(self.commit())
+            finally:
+                stop_request_metrics()
+            counts[name] += 1
+            totals['errors'] += not ok
+            totals['db_queries'] += metrics.db_queries
+            totals['redis_round_trips'] += metrics.redis_round_trips
+            totals['cache_hits'] += metrics.cache_hits
+            totals['cache_misses'] += metrics.cache_misses
+        elapsed = time.perf_counter() - start - sum(invalidation_timings) / 1000
+
+        lookups = totals['cache_hits'] + totals['cache_misses']
+        return {
+            'requests': requests,
+            'errors': totals['errors'],
+            'seconds': round(elapsed, 3),
+            'rps': round(requests / elapsed, 1) if elapsed else 0.0,
+            'p50_ms': round(statistics.median(timings), 3) if timings else 0.0,
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'max_ms': round(max(timings, default=0.0), 3),
+            'invalidations': len(invalidation_timings),
+            'invalidation_p50_ms': round(statistics.median(invalidation_timings), 3) if invalidation_timings else 0.0,
+            'invalidation_max_ms': round(max(invalidation_timings, default=0.0), 3),
+            'db_queries_per_request': round(totals['db_queries'] / requests, 3),
+            'redis_round_trips_per_request': round(totals['redis_round_trips'] / requests, 3),
+            'cache_hits': totals['cache_hits'],
+            'cache_misses': totals['cache_misses'],
+            'cache_hit_ratio': round(totals['cache_hits'] / lookups, 4) if lookups else None,
+            'operations': counts,
+        }
+
+    def random_id(self):
+        # Ids are mostly contiguous after a bulk load; gaps become 404s
+        return self.rng.randint(self.min_id, self.max_id)
+
+    def get(self, name, params=None, **kwargs):
+        # Unless measuring it, the in-process tier would hide Redis from every
+        # read after the first
+        if not self.l1:
+            local_cache.clear()
+        return self.client.get(reverse(f'properties:{name}', **kwargs), params or {})
+
+    def op_list(self):
+        return self.get('property_list').status_code == 200
+
+    def op_page(self):
+        params = {'page_size': PAGE_SIZE}
+        if self.cursor:
+            params['cursor'] = self.cursor
+        response = self.get('property_list', params)
+        if response.status_code != 200:
+            return False
+        self.page_depth += 1
+        self.cursor = json.loads(response.content)['next_cursor']
+        if self.page_depth >= MAX_PAGE_DEPTH:
+            self.cursor, self.page_depth = None, 0
+        return True
+
+    def op_detail(self):
+        return self.get('property_detail', args=[self.random_id()]).status_code in (200, 404)
+
+    def op_search(self):
+        location = self.rng.choices(LOCATIONS, weights=LOCATION_WEIGHTS)[0]
+        return self.get('property_search', {'location': location, 'sort': 'price'}).status_code == 200
+
+    def op_metrics(self):
+        return self.get('cache_metrics').status_code == 200
+
+    def commit(self):
+        """
+        Run the on_commit callbacks of the last write, as its commit would.
+
+        benchmark_properties rolls its writes back, so they would never run
+        and reads after the write would be served stale.
+
+        Returns:
+            float: Milliseconds the callbacks took
+        """
+        start = time.perf_counter()
+        pending, self.pending = self.pending, []
+        for callback in pending:
+            callback()
+        return (time.perf_counter() - start) * 1000
+
+    def op_update(self):
+        property = Property.objects.filter(pk=self.random_id()).first()
+        if property is not None:
+            with TestCase.captureOnCommitCallbacks() as callbacks:
+                property.price += Decimal('1.00')
+                property.save()
+            self.pending += callbacks
+        return True
+
+    def op_create(self):
+        row = next(generate_property_rows(1, f'{self.seed}-writes', self.created))
+        self.created += 1
+        with TestCase.captureOnCommitCallbacks() as callbacks:
+            Property.objects.create(**row)
+        self.pending += callbacks
+        return True
+
+
+def compare_results(baseline, current, threshold):
+    """
+    Compare two benchmark_properties result files.
+
+    Args:
+        baseline: Parsed JSON of the earlier run
+        current: Parsed JSON of the new run
+        threshold: Percentage by which rps may drop, or p99 rise, before
+            a scenario counts as a regression
+
+    Returns:
+        list: Dicts with scenario, rps and p99 change in percent and a
+        regression flag, for the scenarios found in both runs
+    """
+    rows = []
+    for name, result in current['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if before is None:
+            continue
+        rps_change = (result['rps'] / before['rps'] - 1) * 100 if before['rps'] else 0.0
+        p99_change = (result['p99_ms'] / before['p99_ms'] - 1) * 100 if before['p99_ms'] else 0.0
+        rows.append({
+            'scenario': name,
+            'rps_change': round(rps_change, 1),
+            'p99_change': round(p99_change, 1),
+            'db_queries_change': round(result['db_queries_per_request'] - before['db_queries_per_request'], 3),
+            'regression': rps_change < -threshold or p99_change > threshold,
+        })
+    return rows
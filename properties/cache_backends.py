@@ -0,0 +1,275 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django_redis.client import DefaultClient
+from django_redis.serializers.base import BaseSerializer
+from redis.asyncio import ConnectionPool as AsyncConnectionPool, Redis as AsyncRedis
+from redis.asyncio.client import Pipeline as AsyncPipeline
+from redis.client import Pipeline, Redis
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+from .instrumentation import current_request_metrics, observe_latency, record_cache_lookups
+from .resilience import get_circuit_breaker
+import asyncio
+import pickle
+import threading
+import time
+import weakref
+
+try:
+    import msgpack
+except ImportError:  # Optional; only needed for MsgpackSerializer
+    msgpack = None
+
+# msgpack extension type code for values encoded with pickle
+PICKLE_EXT_TYPE = 1
+
+_MISSING = object()
+
+
+_total_lock = threading.Lock()
+_total_round_trips = 0
+
+
+def _count_round_trip():
+    global _total_round_trips
+    with _total_lock:
+        _total_round_trips += 1
+
+
+def get_round_trip_total():
+    """
+    Get the number of Redis round trips made by this process so far.
+    
+    Returns:
+        int: Round trips across all threads
+    """
+    return _total_round_trips
+
+
+def _observe_call(command, seconds):
+    # Feeds the Redis call histogram and the measured request's counters
+    # (see properties.instrumentation)
+    observe_latency('properties_redis_call_seconds', _command_labels(command), seconds)
+    metrics = current_request_metrics()
+    if metrics is not None:
+        metrics.redis_round_trips += 1
+        metrics.redis_seconds += seconds
+
+
+_server_names = weakref.WeakKeyDictionary()
+
+
+def _server_name(pool):
+    name = _server_names.get(pool)
+    if name is None:
+        kwargs = pool.connection_kwargs
+        server = kwargs.get('path') or f"{kwargs.get('host', 'localhost')}:{kwargs.get('port', 6379)}"
+        name = _server_names[pool] = str(server)
+    return name
+
+
+def circuit_breaker_for(client):
+    """
+    Get the circuit breaker guarding the Redis server of a client.
+    
+    Args:
+        client: A Redis client or pipeline, sync or asyncio
+        
+    Returns:
+        CircuitBreaker: Shared by every client of the same server
+    """
+    return get_circuit_breaker(_server_name(client.connection_pool))
+
+
+def _probe(breaker, ping):
+    # A half-open breaker lets one call through. Make it a PING, so that the
+    # recovery callbacks run before any value is read from the server.
+    _count_round_trip()
+    start = time.perf_counter()
+    try:
+        ping()
+    except (RedisConnectionError, RedisTimeoutError):
+        breaker.record(time.perf_counter() - start, True, probe=True)
+        raise
+    breaker.record(time.perf_counter() - start, False, probe=True)
+
+
+async def _aprobe(breaker, ping):
+    _count_round_trip()
+    start = time.perf_counter()
+    try:
+        await ping()
+    except (RedisConnectionError, RedisTimeoutError):
+        breaker.record(time.perf_counter() - start, True, probe=True)
+        raise
+    breaker.record(time.perf_counter() - start, False, probe=True)
+
+
+def _timed(pool, command, call, *args, **options):
+    # Raises CircuitOpen without a round trip while the server's breaker is open
+    breaker = get_circuit_breaker(_server_name(pool))
+    if breaker.before_call():
+        _probe(breaker, Redis(connection_pool=pool).ping)
+    _count_round_trip()
+    failed = False
+    start = time.perf_counter()
+    try:
+        return call(*args, **options)
+    except (RedisConnectionError, RedisTimeoutError):
+        failed = True
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        _observe_call(command, seconds)
+        breaker.record(seconds, failed, bulk=command == 'PIPELINE')
+
+
+async def _atimed(pool, command, call, *args, **options):
+    breaker = get_circuit_breaker(_server_name(pool))
+    if breaker.before_call():
+        await _aprobe(breaker, AsyncRedis(connection_pool=pool).ping)
+    _count_round_trip()
+    failed = False
+    start = time.perf_counter()
+    try:
+        return await call(*args, **options)
+    except (RedisConnectionError, RedisTimeoutError):
+        failed = True
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        _observe_call(command, seconds)
+        breaker.record(seconds, failed, bulk=command == 'PIPELINE')
+
+
+_labels = {}
+
+
+def _command_labels(command):
+    labels = _labels.get(command)
+    if labels is None:
+        name = command.decode('ascii') if isinstance(command, bytes) else str(command)
+        labels = _labels[command] = f'command="{name.upper()}"'
+    return labels
+
+
+class CountingPipeline(Pipeline):
+    """Pipeline that counts each execute() as a single round trip."""
+
+    def execute(self, raise_on_error=True):
+        if not self.command_stack:
+            return super().execute(raise_on_error)
+        return _timed(self.connection_pool, 'PIPELINE', super().execute, raise_on_error)
+
+    def immediate_execute_command(self, *args, **options):
+        return _timed(self.connection_pool, args[0], super().immediate_execute_command, *args, **options)
+
+
+class CountingRedis(Redis):
+    """
+    Redis client that counts and times round trips.
+    
+    Installed through the REDIS_CLIENT_CLASS cache option, so it covers the
+    django_redis cache API and get_redis_connection() alike. Every call also
+    goes through the circuit breaker of its server (see properties.resilience).
+    """
+
+    def execute_command(self, *args, **options):
+        return _timed(self.connection_pool, args[0], super().execute_command, *args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return CountingPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+class CountingAsyncPipeline(AsyncPipeline):
+    """redis.asyncio pipeline that counts each execute() as a single round trip."""
+
+    async def execute(self, raise_on_error=True):
+        if not self.command_stack:
+            return await super().execute(raise_on_error)
+        return await _atimed(self.connection_pool, 'PIPELINE', super().execute, raise_on_error)
+
+    async def immediate_execute_command(self, *args, **options):
+        return await _atimed(self.connection_pool, args[0], super().immediate_execute_command, *args, **options)
+
+
+class CountingAsyncRedis(AsyncRedis):
+    """redis.asyncio client that counts and times round trips like CountingRedis."""
+
+    async def execute_command(self, *args, **options):
+        return await _atimed(self.connection_pool, args[0], super().execute_command, *args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return CountingAsyncPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_redis_connection():
+    """
+    Get the redis.asyncio client shared by all async code on the running event loop.
+    
+    asyncio connections belong to the loop that opened them, so there is one
+    pool per loop (one per uvicorn worker), configured by
+    settings.PROPERTY_ASYNC_REDIS.
+    
+    Returns:
+        CountingAsyncRedis: The shared client
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        config = settings.PROPERTY_ASYNC_REDIS
+        pool = AsyncConnectionPool.from_url(config['LOCATION'], **config.get('CONNECTION_POOL_KWARGS', {}))
+        client = _async_clients[loop] = CountingAsyncRedis(connection_pool=pool)
+    return client
+
+
+class InstrumentedClient(DefaultClient):
+    """django_redis client that counts cache hits and misses per key family."""
+
+    def get(self, key, default=None, version=None, client=None):
+        value = super().get(key, _MISSING, version=version, client=client)
+        if value is _MISSING:
+            record_cache_lookups((key,), ())
+            return default
+        record_cache_lookups((key,), (key,))
+        return value
+
+    def get_many(self, keys, version=None, client=None):
+        keys = list(keys)
+        values = super().get_many(keys, version=version, client=client)
+        record_cache_lookups(keys, values)
+        return values
+
+
+def _pickle_ext(value):
+    return msgpack.ExtType(PICKLE_EXT_TYPE, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+
+def _unpickle_ext(code, data):
+    if code == PICKLE_EXT_TYPE:
+        return pickle.loads(data)
+    return msgpack.ExtType(code, data)
+
+
+class MsgpackSerializer(BaseSerializer):
+    """
+    msgpack serializer that falls back to pickle for unsupported types.
+    
+    The values this app caches (encoded payload bytes, cache_aside envelopes,
+    numbers) are packed natively. Anything else, such as the HttpResponse
+    objects stored by cache_page or datetimes, is pickled into a msgpack
+    extension type. Tuples come back as lists.
+    """
+
+    def __init__(self, options):
+        if msgpack is None:
+            raise ImproperlyConfigured('MsgpackSerializer requires the msgpack package')
+        super().__init__(options)
+
+    def dumps(self, value):
+        return msgpack.packb(value, default=_pickle_ext)
+
+    def loads(self, value):
+        return msgpack.unpackb(value, ext_hook=_unpickle_ext, raw=False)
@@ -0,0 +1,812 @@
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django_redis import get_redis_connection
+from .cache_backends import get_async_redis_connection
+from .instrumentation import record_cache_lookups
+from .resilience import REDIS_ERRORS, record_fallback
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+import uuid
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# How long a worker may hold the recompute lock before it is presumed dead
+RECOMPUTE_LOCK_TIMEOUT = 30
+
+# How long a worker without the lock waits for the holder to fill a cold key
+RECOMPUTE_WAIT_TIMEOUT = 5
+RECOMPUTE_POLL_INTERVAL = 0.05
+
+# Redis pub/sub channel used to drop local cache entries in every worker
+INVALIDATION_CHANNEL = 'properties:invalidate'
+
+# Defaults for settings.PROPERTY_LOCAL_CACHE
+LOCAL_CACHE_MAX_ENTRIES = 1024
+LOCAL_CACHE_TIMEOUT = 5
+
+# Local keys of values computed without Redis (see cache_or_fallback)
+FALLBACK_KEY_PREFIX = 'fallback:'
+
+# Tag versions live under 'tag:<name>' (see tagged_cache_key)
+TAG_KEY_PREFIX = 'tag:'
+
+# Session engines that keep sessions in settings.SESSION_CACHE_ALIAS
+CACHE_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+_MISSING = object()
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU cache with a TTL on every entry.
+    
+    Used as a first tier in front of Redis for small, hot values. Entries are
+    dropped when another worker broadcasts an invalidation, and the TTL bounds
+    staleness if a broadcast is ever missed.
+    """
+
+    def __init__(self, max_entries=LOCAL_CACHE_MAX_ENTRIES, timeout=LOCAL_CACHE_TIMEOUT):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Get a value if it is present and not expired.
+        
+        Args:
+            key: The full (already versioned) cache key
+            default: Value returned on a miss
+            
+        Returns:
+            The cached value, or default
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, timeout=None):
+        """
+        Store a value, evicting the least recently used entry when full.
+        
+        Args:
+            key: The full (already versioned) cache key
+            value: The value to store
+            timeout: Seconds to keep the value; capped at the cache's own TTL
+        """
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        """
+        Drop entries if present.
+        
+        Args:
+            *keys: Full cache keys to drop
+        """
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Get hit/miss counters for this tier.
+        
+        Returns:
+            dict: hits, misses and the current number of entries
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+
+def _local_cache_settings():
+    options = getattr(settings, 'PROPERTY_LOCAL_CACHE', {})
+    return (
+        options.get('MAX_ENTRIES', LOCAL_CACHE_MAX_ENTRIES),
+        options.get('TIMEOUT', LOCAL_CACHE_TIMEOUT),
+    )
+
+
+local_cache = LocalCache(*_local_cache_settings())
+
+# Redis (L2) lookups made through the tiered helpers in this module
+_l2_stats = {'hits': 0, 'misses': 0}
+_l2_stats_lock = threading.Lock()
+
+
+def _count_l2(hit):
+    with _l2_stats_lock:
+        _l2_stats['hits' if hit else 'misses'] += 1
+
+
+def get_tier_stats():
+    """
+    Get hit/miss counters for the in-process (L1) and Redis (L2) tiers.
+    
+    Returns:
+        dict: {'l1': {...}, 'l2': {...}} for this worker process
+    """
+    with _l2_stats_lock:
+        l2 = dict(_l2_stats)
+    return {'l1': local_cache.stats(), 'l2': l2}
+
+
+class _InvalidationListener(threading.Thread):
+    """Daemon thread that applies broadcast invalidations to local_cache."""
+
+    daemon = True
+
+    def __init__(self):
+        super().__init__(name='property-cache-invalidation')
+        self.subscribed = threading.Event()
+
+    def run(self):
+        while True:
+            try:
+                pubsub = get_redis_connection("default").pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Anything cached while we were not subscribed may have
+                # missed an invalidation
+                local_cache.clear()
+                self.subscribed.set()
+                for message in pubsub.listen():
+                    _apply_invalidation(message['data'])
+            except Exception as e:
+                # Once is enough: while disconnected only cache_or_fallback()
+                # stores local entries, and it expects them to expire
+                if self.subscribed.is_set():
+                    local_cache.clear()
+                self.subscribed.clear()
+                logger.warning(f"Property cache invalidation listener disconnected: {str(e)}")
+                time.sleep(1)
+
+
+_listener = None
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+
+def _local_cache_enabled():
+    """Start the listener for this process if needed and report if it is live."""
+    global _listener, _listener_pid
+    if _listener is None or _listener_pid != os.getpid():
+        with _listener_lock:
+            # Threads do not survive fork(), so every worker starts its own
+            if _listener is None or _listener_pid != os.getpid():
+                local_cache.clear()
+                _listener = _InvalidationListener()
+                _listener_pid = os.getpid()
+                _listener.start()
+    # Only trust local entries while invalidations can reach us
+    return _listener.subscribed.is_set()
+
+
+def _apply_invalidation(data):
+    keys = json.loads(data)
+    if keys == '*':
+        local_cache.clear()
+    else:
+        local_cache.delete(*keys)
+
+
+def broadcast_invalidation(keys, version=None, pipeline=None):
+    """
+    Drop keys from the local tier of every worker, including this one.
+    
+    Callers remain responsible for updating or deleting the keys in Redis.
+    
+    Args:
+        keys: Cache keys (as passed to Django's cache), or None for all keys
+        version: Optional cache version of the keys
+        pipeline: Optional Redis pipeline to queue the PUBLISH on; the
+            caller executes it
+    """
+    if keys is None:
+        message = '*'
+        local_cache.clear()
+    else:
+        message = [cache.make_key(key, version=version) for key in keys]
+        local_cache.delete(*message)
+    if pipeline is not None:
+        pipeline.publish(INVALIDATION_CHANNEL, json.dumps(message))
+        return
+    try:
+        get_redis_connection("default").publish(INVALIDATION_CHANNEL, json.dumps(message))
+    except Exception as e:
+        logger.error(f"Failed to broadcast property cache invalidation: {str(e)}")
+
+
+def tiered_get(key, version=None, default=None):
+    """
+    Get a value from the local tier, falling back to Redis.
+    
+    Args:
+        key: The cache key
+        version: Optional cache version
+        default: Value returned if the key is in neither tier
+        
+    Returns:
+        The cached value, or default
+    """
+    use_local = _local_cache_enabled()
+    full_key = cache.make_key(key, version=version)
+    if use_local:
+        value = local_cache.get(full_key, _MISSING)
+        record_cache_lookups((key,), () if value is _MISSING else (key,), tier='local')
+        if value is not _MISSING:
+            return value
+    
+    value = cache.get(key, _MISSING, version=version)
+    _count_l2(value is not _MISSING)
+    if value is _MISSING:
+        return default
+    if use_local:
+        local_cache.set(full_key, value)
+    return value
+
+
+def cache_or_fallback(operation, cached, fallback, local_key=None):
+    """
+    Read through Redis, or compute the value without it when Redis fails.
+    
+    Args:
+        operation: Name of the read in the fallback counters, e.g. 'property_list'
+        cached: Zero-argument callable reading through Redis
+        fallback: Zero-argument callable computing the same value from the
+            database
+        local_key: Keep fallback values in the in-process tier under this
+            key, so a worker computes each at most once per
+            PROPERTY_LOCAL_CACHE['TIMEOUT'] while Redis is unavailable
+        
+    Returns:
+        The value from cached(), or else from fallback()
+        
+    Cache Strategy:
+        - Redis errors include the circuit breaker being open, which fails
+          the read at once instead of after a socket timeout
+        - Fallback values are never written to Redis, and no invalidation
+          can reach them; their short TTL bounds how stale they get
+    """
+    try:
+        return cached()
+    except REDIS_ERRORS as e:
+        record_fallback(operation, e)
+    
+    if local_key is None:
+        return fallback()
+    full_key = f'{FALLBACK_KEY_PREFIX}{local_key}'
+    value = local_cache.get(full_key, _MISSING)
+    if value is _MISSING:
+        value = fallback()
+        local_cache.set(full_key, value)
+    return value
+
+
+async def acache_or_fallback(operation, cached, fallback, local_key=None):
+    """
+    Async counterpart of cache_or_fallback() for coroutine functions.
+    
+    Args:
+        operation, local_key: As for cache_or_fallback()
+        cached: Zero-argument coroutine function reading through Redis
+        fallback: Zero-argument coroutine function reading the database
+        
+    Returns:
+        The value from cached(), or else from fallback()
+    """
+    try:
+        return await cached()
+    except REDIS_ERRORS as e:
+        record_fallback(operation, e)
+    
+    if local_key is None:
+        return await fallback()
+    full_key = f'{FALLBACK_KEY_PREFIX}{local_key}'
+    value = local_cache.get(full_key, _MISSING)
+    if value is _MISSING:
+        value = await fallback()
+        local_cache.set(full_key, value)
+    return value
+
+
+def cache_aside(key, compute, timeout, stale_timeout=60, version=None, beta=1.0, local=False):
+    """
+    Get a value from cache, recomputing it at most once across all workers.
+
+    Values are stored as (value, soft_expires_at, compute_seconds) envelopes
+    that live for timeout + stale_timeout seconds in Redis.
+
+    Args:
+        key: The cache key
+        compute: Zero-argument callable that produces the value on a miss
+        timeout: Soft TTL in seconds; after it the value is stale
+        stale_timeout: Extra seconds a stale value may be served while one
+            worker recomputes it
+        version: Optional cache version passed through to Django's cache
+        beta: Weight of probabilistic early expiration; 0 disables it
+        local: Also keep the envelope in the in-process tier (see tiered_get)
+
+    Returns:
+        The cached or freshly computed value
+
+    Cache Strategy:
+        - Fresh hit: return the value. Close to expiry, a request may
+          volunteer to recompute early (probabilistic early expiration),
+          weighted by how long the value took to compute
+        - Stale hit: the worker that wins the Redis recompute lock rebuilds
+          the value; everyone else keeps getting the stale value meanwhile
+        - Miss: the lock winner computes; the others wait for its result
+          instead of running the same query themselves
+    """
+    envelope = tiered_get(key, version=version) if local else cache.get(key, version=version)
+
+    if envelope is not None:
+        value, soft_expires_at, compute_seconds = envelope
+        if not _should_recompute(soft_expires_at, compute_seconds, beta):
+            return value
+        # Stale or expiring early: one worker refreshes, the rest serve stale
+        lock_token = _acquire_recompute_lock(key, version)
+        if lock_token is None:
+            return value
+        return _recompute(key, compute, timeout, stale_timeout, version, lock_token, local)
+
+    lock_token = _acquire_recompute_lock(key, version)
+    if lock_token is not None:
+        return _recompute(key, compute, timeout, stale_timeout, version, lock_token, local)
+
+    # Another worker is already computing this key; wait for its result
+    deadline = time.monotonic() + RECOMPUTE_WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(RECOMPUTE_POLL_INTERVAL)
+        envelope = cache.get(key, version=version)
+        if envelope is not None:
+            return envelope[0]
+
+    logger.warning(f"Timed out waiting for recompute of cache key '{key}', computing locally")
+    return compute()
+
+
+def _should_recompute(soft_expires_at, compute_seconds, beta):
+    # XFetch: recompute before expiry with a probability that rises as the
+    # expiry approaches and with the cost of recomputing the value
+    jitter = -compute_seconds * beta * math.log(1.0 - random.random())
+    return time.time() + jitter >= soft_expires_at
+
+
+def _lock_key(key):
+    return f'lock:{key}'
+
+
+def _acquire_recompute_lock(key, version):
+    token = uuid.uuid4().hex
+    # add() maps to SET NX on Redis, so only one worker gets the lock
+    if cache.add(_lock_key(key), token, RECOMPUTE_LOCK_TIMEOUT, version=version):
+        return token
+    return None
+
+
+def _release_recompute_lock(key, version, token):
+    # Never release a lock that expired and was taken over by another worker
+    if cache.get(_lock_key(key), version=version) == token:
+        cache.delete(_lock_key(key), version=version)
+
+
+def _recompute(key, compute, timeout, stale_timeout, version, lock_token, local):
+    try:
+        start = time.time()
+        value = compute()
+        compute_seconds = time.time() - start
+        envelope = (value, start + compute_seconds + timeout, compute_seconds)
+        cache.set(key, envelope, timeout + stale_timeout, version=version)
+        if local and _local_cache_enabled():
+            local_cache.set(cache.make_key(key, version=version), envelope, timeout)
+        return value
+    finally:
+        _release_recompute_lock(key, version, lock_token)
+
+
+def get_cache_aside_value(key, version=None):
+    """
+    Read the value stored by cache_aside() without recomputing it.
+
+    Args:
+        key: The cache key
+        version: Optional cache version
+
+    Returns:
+        The cached value, or None if the key is missing
+    """
+    envelope = cache.get(key, version=version)
+    return None if envelope is None else envelope[0]
+
+
+def add_many(data, timeout, version=None):
+    """
+    Store values only for keys that are missing, like cache.add(), in one pipeline.
+    
+    Args:
+        data: Mapping of cache keys to values
+        timeout: Seconds to keep the values
+        version: Optional cache version
+    """
+    pipeline = get_redis_connection("default").pipeline(transaction=False)
+    for key, value in data.items():
+        pipeline.set(cache.make_key(key, version=version), cache.client.encode(value), nx=True, ex=timeout)
+    pipeline.execute()
+
+
+async def aget(key, default=None, version=None):
+    """
+    Async counterpart of cache.get() on the default cache.
+    
+    Reads through the redis.asyncio client but decodes with the cache's own
+    serializer and compressor, so sync and async code share every entry.
+    
+    Args:
+        key: The cache key
+        default: Value returned on a miss
+        version: Optional cache version
+        
+    Returns:
+        The cached value, or default
+    """
+    raw = await get_async_redis_connection().get(cache.make_key(key, version=version))
+    record_cache_lookups((key,), () if raw is None else (key,))
+    if raw is None:
+        return default
+    return cache.client.decode(raw)
+
+
+async def aget_many(keys, version=None):
+    """
+    Async counterpart of cache.get_many(), fetching all keys with one MGET.
+    
+    Args:
+        keys: Iterable of cache keys
+        version: Optional cache version
+        
+    Returns:
+        dict: Mapping of the keys that were found to their values
+    """
+    keys = list(keys)
+    if not keys:
+        return {}
+    raw_values = await get_async_redis_connection().mget([cache.make_key(key, version=version) for key in keys])
+    values = {key: cache.client.decode(raw) for key, raw in zip(keys, raw_values) if raw is not None}
+    record_cache_lookups(keys, values)
+    return values
+
+
+async def aset_many(data, timeout, version=None):
+    """
+    Async counterpart of cache.set_many(), writing all keys in one pipeline.
+    
+    Args:
+        data: Mapping of cache keys to values
+        timeout: Seconds to keep the values
+        version: Optional cache version
+    """
+    pipeline = get_async_redis_connection().pipeline(transaction=False)
+    for key, value in data.items():
+        pipeline.set(cache.make_key(key, version=version), cache.client.encode(value), ex=timeout)
+    await pipeline.execute()
+
+
+async def aadd(key, value, timeout=None, version=None):
+    """
+    Async counterpart of cache.add(): store a value only if the key is missing.
+    
+    Args:
+        key: The cache key
+        value: The value to store
+        timeout: Seconds to keep the value, or None to keep it indefinitely
+        version: Optional cache version
+        
+    Returns:
+        bool: True if the value was stored
+    """
+    return bool(await get_async_redis_connection().set(
+        cache.make_key(key, version=version),
+        cache.client.encode(value),
+        nx=True,
+        ex=timeout,
+    ))
+
+
+async def aadd_many(data, timeout, version=None):
+    """
+    Async counterpart of add_many().
+    
+    Args:
+        data: Mapping of cache keys to values
+        timeout: Seconds to keep the values
+        version: Optional cache version
+    """
+    pipeline = get_async_redis_connection().pipeline(transaction=False)
+    for key, value in data.items():
+        pipeline.set(cache.make_key(key, version=version), cache.client.encode(value), nx=True, ex=timeout)
+    await pipeline.execute()
+
+
+async def atiered_get(key, version=None, default=None):
+    """
+    Async counterpart of tiered_get(); the local tier is read without awaiting.
+    
+    Args:
+        key: The cache key
+        version: Optional cache version
+        default: Value returned if the key is in neither tier
+        
+    Returns:
+        The cached value, or default
+    """
+    use_local = _local_cache_enabled()
+    full_key = cache.make_key(key, version=version)
+    if use_local:
+        value = local_cache.get(full_key, _MISSING)
+        record_cache_lookups((key,), () if value is _MISSING else (key,), tier='local')
+        if value is not _MISSING:
+            return value
+    
+    value = await aget(key, _MISSING, version=version)
+    _count_l2(value is not _MISSING)
+    if value is _MISSING:
+        return default
+    if use_local:
+        local_cache.set(full_key, value)
+    return value
+
+
+async def acache_aside(key, compute, timeout, stale_timeout=60, version=None, beta=1.0, local=False):
+    """
+    Async counterpart of cache_aside() for values computed by a coroutine.
+    
+    Envelopes and recompute locks are the same as cache_aside()'s, so sync
+    and async workers never rebuild a key at the same time either.
+    
+    Args:
+        key: The cache key
+        compute: Zero-argument coroutine function that produces the value
+        timeout, stale_timeout, version, beta, local: As for cache_aside()
+        
+    Returns:
+        The cached or freshly computed value
+    """
+    envelope = await atiered_get(key, version=version) if local else await aget(key, version=version)
+    
+    if envelope is not None:
+        value, soft_expires_at, compute_seconds = envelope
+        if not _should_recompute(soft_expires_at, compute_seconds, beta):
+            return value
+        lock_token = await _aacquire_recompute_lock(key, version)
+        if lock_token is None:
+            return value
+        return await _arecompute(key, compute, timeout, stale_timeout, version, lock_token, local)
+    
+    lock_token = await _aacquire_recompute_lock(key, version)
+    if lock_token is not None:
+        return await _arecompute(key, compute, timeout, stale_timeout, version, lock_token, local)
+    
+    # Another worker is already computing this key; wait for its result
+    deadline = time.monotonic() + RECOMPUTE_WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(RECOMPUTE_POLL_INTERVAL)
+        envelope = await aget(key, version=version)
+        if envelope is not None:
+            return envelope[0]
+    
+    logger.warning(f"Timed out waiting for recompute of cache key '{key}', computing locally")
+    return await compute()
+
+
+async def _aacquire_recompute_lock(key, version):
+    token = uuid.uuid4().hex
+    if await aadd(_lock_key(key), token, RECOMPUTE_LOCK_TIMEOUT, version=version):
+        return token
+    return None
+
+
+async def _arelease_recompute_lock(key, version, token):
+    if await aget(_lock_key(key), version=version) == token:
+        await get_async_redis_connection().delete(cache.make_key(_lock_key(key), version=version))
+
+
+async def _arecompute(key, compute, timeout, stale_timeout, version, lock_token, local):
+    try:
+        start = time.time()
+        value = await compute()
+        compute_seconds = time.time() - start
+        envelope = (value, start + compute_seconds + timeout, compute_seconds)
+        await aset_many({key: envelope}, timeout + stale_timeout, version=version)
+        if local and _local_cache_enabled():
+            local_cache.set(cache.make_key(key, version=version), envelope, timeout)
+        return value
+    finally:
+        await _arelease_recompute_lock(key, version, lock_token)
+
+
+def _tag_key(tag):
+    return f'{TAG_KEY_PREFIX}{tag}'
+
+
+def get_tag_versions(tags):
+    """
+    Get the current version of each tag, initialising missing ones.
+    
+    Args:
+        tags: Iterable of tag names, e.g. 'location:Downtown'
+        
+    Returns:
+        dict: Mapping of tag name to its integer version
+    """
+    use_local = _local_cache_enabled()
+    versions = {}
+    missing = []
+    for tag in tags:
+        value = local_cache.get(cache.make_key(_tag_key(tag)), _MISSING) if use_local else _MISSING
+        if value is _MISSING:
+            missing.append(tag)
+        else:
+            versions[tag] = value
+    if not missing:
+        return versions
+    
+    full_keys = [cache.make_key(_tag_key(tag)) for tag in missing]
+    redis_conn = get_redis_connection("default")
+    values = redis_conn.mget(full_keys)
+    
+    uninitialised = [key for key, value in zip(full_keys, values) if value is None]
+    if uninitialised:
+        # Start from the clock so an evicted tag never reuses an old version
+        initial = int(time.time() * 1000)
+        pipeline = redis_conn.pipeline()
+        for key in uninitialised:
+            pipeline.set(key, initial, nx=True)
+        pipeline.execute()
+        values = redis_conn.mget(full_keys)
+    
+    for tag, key, value in zip(missing, full_keys, values):
+        versions[tag] = int(value)
+        if use_local:
+            local_cache.set(key, versions[tag])
+    return versions
+
+
+def bump_tags(tags):
+    """
+    Invalidate every value cached with any of the given tags.
+    
+    Args:
+        tags: Iterable of tag names
+    """
+    tags = sorted(set(tags))
+    if not tags:
+        return
+    pipeline = get_redis_connection("default").pipeline()
+    queue_tag_bumps(pipeline, tags)
+    pipeline.execute()
+    broadcast_invalidation([_tag_key(tag) for tag in tags])
+    logger.debug(f"Bumped cache tags: {', '.join(tags)}")
+
+
+def queue_tag_bumps(pipeline, tags):
+    """
+    Queue the commands of bump_tags() on a pipeline, without broadcasting.
+    
+    Args:
+        pipeline: Redis pipeline the caller executes
+        tags: Iterable of tag names
+        
+    Returns:
+        list: Cache keys of the tag versions, for broadcast_invalidation()
+    """
+    # Versions start from the clock, so an evicted counter never goes back
+    initial = int(time.time() * 1000)
+    keys = [_tag_key(tag) for tag in sorted(set(tags))]
+    for key in keys:
+        pipeline.set(cache.make_key(key), initial, nx=True)
+        pipeline.incr(cache.make_key(key))
+    return keys
+
+
+def tagged_cache_key(key, tags):
+    """
+    Derive a cache key that changes whenever one of its tags is bumped.
+    
+    Values stored under the old key simply stop being read and age out, so
+    invalidating a tag never needs to find the entries that carry it.
+    
+    Args:
+        key: The base cache key
+        tags: Tags that describe what the cached value depends on
+        
+    Returns:
+        str: The base key followed by a digest of the current tag versions
+    """
+    versions = get_tag_versions(tags)
+    digest = hashlib.sha1(
+        json.dumps(sorted(versions.items()), separators=(',', ':')).encode('utf-8')
+    ).hexdigest()[:16]
+    return f'{key}:{digest}'
+
+
+def session_cache_alias():
+    """
+    Get the cache alias that stores sessions.
+    
+    Returns:
+        str: settings.SESSION_CACHE_ALIAS, or None if sessions are not cached
+    """
+    if settings.SESSION_ENGINE in CACHE_SESSION_ENGINES:
+        return settings.SESSION_CACHE_ALIAS
+    return None
+
+
+def listing_cache_aliases():
+    """
+    Get the cache aliases holding listing data: every alias but the sessions'.
+    
+    Returns:
+        list: Aliases in settings.CACHES order
+    """
+    return [alias for alias in settings.CACHES if alias != session_cache_alias()]
+
+
+def _redis_database(alias):
+    kwargs = get_redis_connection(alias).connection_pool.connection_kwargs
+    return kwargs.get('host'), kwargs.get('port'), kwargs.get('path'), kwargs.get('db', 0)
+
+
+def clear_cache_alias(alias):
+    """
+    Empty one cache alias, which flushes its whole Redis database.
+    
+    Args:
+        alias: Name of the alias in settings.CACHES
+        
+    Raises:
+        ImproperlyConfigured: If sessions live in the same Redis database
+            and alias is not the sessions alias; clearing it would log
+            every user out
+    """
+    sessions = session_cache_alias()
+    if alias != sessions and sessions in settings.CACHES and _redis_database(alias) == _redis_database(sessions):
+        raise ImproperlyConfigured(
+            f"Cache alias '{alias}' shares its Redis database with the '{sessions}' "
+            f"sessions alias; give it its own database to clear it"
+        )
+    caches[alias].clear()
+    logger.info(f"Cleared cache alias '{alias}'")
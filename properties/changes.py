@@ -0,0 +1,227 @@
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Property, PropertyTombstone
+from .pagination import InvalidCursor
+from .serializers import PROPERTY_ROW_FIELDS, encode_property_changes, encode_property_rows
+from datetime import timedelta
+import base64
+import binascii
+
+DEFAULT_CHANGES_LIMIT = 500
+MAX_CHANGES_LIMIT = 1000
+
+# Defaults for settings.PROPERTY_CHANGES
+CHANGES_RETENTION_DAYS = 30
+CHANGES_SETTLE_SECONDS = 2
+
+# Tombstones deleted per statement by prune_property_tombstones()
+PRUNE_BATCH_SIZE = 5000
+
+# Order of the kinds of change that share a timestamp. A cursor at
+# CHANGES_END has seen every change up to and including its timestamp.
+CHANGE_UPDATED = 0
+CHANGE_DELETED = 1
+CHANGES_END = 2
+
+
+class CursorExpired(Exception):
+    """Raised when a changes cursor is older than the tombstone retention."""
+
+
+def _changes_settings():
+    config = getattr(settings, 'PROPERTY_CHANGES', {})
+    return (
+        timedelta(days=config.get('RETENTION_DAYS', CHANGES_RETENTION_DAYS)),
+        timedelta(seconds=config.get('SETTLE_SECONDS', CHANGES_SETTLE_SECONDS)),
+    )
+
+
+def encode_changes_cursor(changed_at, kind, pk):
+    """
+    Encode a position in the changes feed as an opaque URL-safe cursor.
+
+    Args:
+        changed_at: updated_at or deleted_at of the last change seen
+        kind: CHANGE_UPDATED, CHANGE_DELETED or CHANGES_END
+        pk: Id of the property of the last change seen
+
+    Returns:
+        str: The cursor to pass back as ?since=
+    """
+    raw = f'{changed_at.isoformat()}|{kind}|{pk}'.encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_changes_cursor(cursor):
+    """
+    Decode a cursor produced by encode_changes_cursor().
+
+    Returns:
+        tuple: (changed_at, kind, id)
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        changed_at, kind, pk = base64.urlsafe_b64decode(padded).decode('utf-8').split('|')
+        changed_at = parse_datetime(changed_at)
+        kind, pk = int(kind), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursor(f'Invalid cursor: {cursor!r}') from e
+    if changed_at is None or changed_at.tzinfo is None or kind not in (CHANGE_UPDATED, CHANGE_DELETED, CHANGES_END):
+        raise InvalidCursor(f'Invalid cursor: {cursor!r}')
+    return changed_at, kind, pk
+
+
+def parse_changes_limit(value):
+    """
+    Validate a ?limit= value of the changes feed.
+
+    Returns:
+        int: A limit between 1 and MAX_CHANGES_LIMIT
+
+    Raises:
+        InvalidCursor: If the value is not a positive integer
+    """
+    if value in (None, ''):
+        return DEFAULT_CHANGES_LIMIT
+    try:
+        limit = int(value)
+    except ValueError as e:
+        raise InvalidCursor(f'Invalid limit: {value!r}') from e
+    if limit < 1:
+        raise InvalidCursor(f'Invalid limit: {value!r}')
+    return min(limit, MAX_CHANGES_LIMIT)
+
+
+def _after(field, id_field, kind, changed_at, cursor_kind, pk):
+    # Changes of this kind that sort after the cursor on (time, kind, id)
+    if cursor_kind < kind:
+        return Q(**{f'{field}__gte': changed_at})
+    if cursor_kind == kind:
+        return Q(**{f'{field}__gt': changed_at}) | Q(**{field: changed_at, f'{id_field}__gt': pk})
+    return Q(**{f'{field}__gt': changed_at})
+
+
+def fetch_property_changes(cursor, limit=DEFAULT_CHANGES_LIMIT):
+    """
+    Fetch the properties created, updated or deleted after a cursor.
+
+    Rows are read from the (updated_at, id) index and tombstones from the
+    (deleted_at, property_id) index, at most limit + 1 of each, so the work
+    depends on the number of changes rather than on the catalogue size.
+    Changes from the last SETTLE_SECONDS are held back: a transaction that
+    saved earlier may still commit with an older updated_at than them.
+
+    Args:
+        cursor: ?since= cursor from a previous response
+        limit: Most changes to return
+
+    Returns:
+        tuple: (values_list() rows in PROPERTY_ROW_FIELDS order,
+        (property_id, external_id, deleted_at) tombstones, next cursor,
+        whether more changes are waiting)
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+        CursorExpired: If tombstones after the cursor may have been pruned
+    """
+    changed_at, kind, pk = decode_changes_cursor(cursor)
+    retention, settle = _changes_settings()
+    now = timezone.now()
+    if changed_at < now - retention:
+        raise CursorExpired(f'Cursor is older than {retention.days} days; resync from /properties/')
+    until = now - settle
+
+    rows = list(
+        Property.objects
+        .filter(_after('updated_at', 'id', CHANGE_UPDATED, changed_at, kind, pk), updated_at__lte=until)
+        .order_by('updated_at', 'id')
+        .values_list(*PROPERTY_ROW_FIELDS)[:limit + 1]
+    )
+    tombstones = list(
+        PropertyTombstone.objects
+        .filter(_after('deleted_at', 'property_id', CHANGE_DELETED, changed_at, kind, pk), deleted_at__lte=until)
+        .order_by('deleted_at', 'property_id')
+        .values_list('property_id', 'external_id', 'deleted_at')[:limit + 1]
+    )
+
+    updated_at = PROPERTY_ROW_FIELDS.index('updated_at')
+    changes = sorted(
+        [(row[updated_at], CHANGE_UPDATED, row[0], row) for row in rows]
+        + [(tombstone[2], CHANGE_DELETED, tombstone[0], tombstone) for tombstone in tombstones]
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    if has_more:
+        next_cursor = encode_changes_cursor(*changes[-1][:3])
+    else:
+        # Caught up: everything up to the settle horizon has been seen
+        next_cursor = encode_changes_cursor(max(until, changed_at), CHANGES_END, 0)
+    return (
+        [change[3] for change in changes if change[1] == CHANGE_UPDATED],
+        [change[3] for change in changes if change[1] == CHANGE_DELETED],
+        next_cursor,
+        has_more,
+    )
+
+
+def get_changes_start_cursor():
+    """
+    Get a cursor from which the feed returns every change made from now on.
+
+    Clients take it before downloading the full catalogue, then follow the
+    feed; changes made during the download are replayed, which is harmless.
+
+    Returns:
+        str: Cursor for ?since=
+    """
+    _, settle = _changes_settings()
+    return encode_changes_cursor(timezone.now() - settle, CHANGES_END, 0)
+
+
+def get_property_changes_payload(cursor=None, limit=DEFAULT_CHANGES_LIMIT):
+    """
+    Get one page of the changes feed as JSON bytes.
+
+    Args:
+        cursor: ?since= cursor, or None to only get a start cursor
+        limit: Most changes to return
+
+    Returns:
+        bytes: {"changes": [...], "deleted": [...], "next_cursor": ..., "has_more": ...}
+
+    Raises:
+        InvalidCursor: If the cursor or limit is malformed
+        CursorExpired: If the cursor is older than the tombstone retention
+    """
+    if cursor is None:
+        return encode_property_changes([], [], get_changes_start_cursor(), False)
+    rows, tombstones, next_cursor, has_more = fetch_property_changes(cursor, limit)
+    return encode_property_changes(encode_property_rows(rows), tombstones, next_cursor, has_more)
+
+
+def prune_property_tombstones():
+    """
+    Delete tombstones older than the retention period, in batches.
+
+    Cursors older than the retention are answered with 410 Gone, so no
+    client can still need the pruned tombstones.
+
+    Returns:
+        int: Number of tombstones deleted
+    """
+    horizon = timezone.now() - _changes_settings()[0]
+    deleted = 0
+    while True:
+        ids = list(
+            PropertyTombstone.objects.filter(deleted_at__lt=horizon)
+            .order_by('deleted_at')
+            .values_list('id', flat=True)[:PRUNE_BATCH_SIZE]
+        )
+        if not ids:
+            return deleted
+        deleted += PropertyTombstone.objects.filter(id__in=ids).delete()[0]
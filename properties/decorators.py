@@ -0,0 +1,75 @@
+from functools import wraps
+from django.conf import settings
+from django.views.decorators.cache import cache_page
+from .resilience import REDIS_ERRORS, record_fallback
+from .utils import get_property_list_generation
+
+
+def cache_page_per_generation(timeout):
+    """
+    Like cache_page, but keyed by the current property listing generation.
+    
+    The save/delete signals bump the generation, so cached responses are
+    retired as soon as a property changes instead of staying stale until
+    the timeout expires. Responses are stored in the
+    settings.CACHE_MIDDLEWARE_ALIAS cache, apart from the property data.
+    While Redis is unavailable the view runs uncached.
+    
+    Args:
+        timeout: Cache duration in seconds
+        
+    Returns:
+        function: The view decorator
+    """
+    def decorator(view_func):
+        # The cache_page view of the latest generation, built once per
+        # generation rather than once per request
+        cached_views = {}
+
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            try:
+                generation = get_property_list_generation()
+            except REDIS_ERRORS as e:
+                record_fallback('page_cache', e)
+                return view_func(request, *args, **kwargs)
+            key = (settings.CACHE_MIDDLEWARE_ALIAS, generation)
+            cached_view = cached_views.get(key)
+            if cached_view is None:
+                cached_view = cache_page(
+                    timeout, cache=settings.CACHE_MIDDLEWARE_ALIAS, key_prefix=f'properties:{generation}'
+                )(view_func)
+                # Older generations are never requested again
+                cached_views.clear()
+                cached_views[key] = cached_view
+            return cached_view(request, *args, **kwargs)
+        return _wrapped_view
+    return decorator
+
+
+def record_access(record):
+    """
+    Count successful requests so warm_property_cache knows what is popular.
+    
+    Applied outside the caching decorators, so requests answered from the
+    page cache or with a 304 are counted as well. Requests are not counted
+    while Redis is unavailable.
+    
+    Args:
+        record: Callable taking the request, called after 200 and 304 responses
+        
+    Returns:
+        function: The view decorator
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            response = view_func(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                try:
+                    record(request)
+                except REDIS_ERRORS as e:
+                    record_fallback('record_access', e)
+            return response
+        return _wrapped_view
+    return decorator
@@ -0,0 +1,445 @@
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Count, Max, Min, Sum
+from django_redis import get_redis_connection
+from .models import Property
+from .search import PRICE_BUCKET_WIDTH
+from decimal import Decimal
+import logging
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Redis layout. Each rebuild writes a new snapshot under
+# FACETS_KEY_PREFIX<generation>:, and readers follow the current pointer:
+#   current                     generation readers use
+#   building                    generation being rebuilt, if any
+#   <gen>:location_of           hash: property id -> location
+#   <gen>:locations             sorted set: location -> number of properties
+#   <gen>:prices:<location>     sorted set: property id -> price in cents
+#   <gen>:stats:<location>      hash: count, sum (cents) and h:<bucket> histogram counts
+#   <gen>:changed               set: ids changed since the rebuild began, while building
+FACETS_KEY_PREFIX = 'property_facets:'
+FACETS_CURRENT_KEY = f'{FACETS_KEY_PREFIX}current'
+FACETS_BUILDING_KEY = f'{FACETS_KEY_PREFIX}building'
+FACETS_LOCATION_OF_KEY = 'location_of'
+FACETS_LOCATIONS_KEY = 'locations'
+FACETS_PRICES_KEY_PREFIX = 'prices:'
+FACETS_STATS_KEY_PREFIX = 'stats:'
+FACETS_CHANGED_KEY = 'changed'
+
+# One rebuild at a time, across processes
+FACETS_REBUILD_LOCK_KEY = 'lock:property_facets'
+FACETS_REBUILD_LOCK_TIMEOUT = 600
+
+# Rows read per query while rebuilding, and rows per script call; one call
+# blocks Redis for as long as it runs
+FACETS_REBUILD_BATCH_SIZE = 5000
+FACETS_REBUILD_ROWS_PER_SCRIPT = 1000
+
+# Seconds a replaced snapshot lives on, for reads that started before the swap
+FACETS_RETIRED_SNAPSHOT_TTL = 60
+
+DEFAULT_FACETS_LIMIT = 100
+MAX_FACETS_LIMIT = 1000
+
+# Moves each property to the facets of its committed location and price, or
+# out of them. Reading the old values in Redis makes it idempotent: applying
+# the same change twice is a no-op. Changes are recorded in the building
+# snapshot's changed set, and the rebuild skips those ids: the rows it
+# streams may have been read before the change committed.
+# KEYS: current and building pointers. ARGV: key prefix, bucket width in
+# cents, the generation a rebuild writes or '' for a change to the current
+# and building ones, then (id, location, cents) per property, with an empty
+# location for properties that no longer exist.
+_UPSERT_SCRIPT = """
+local width = tonumber(ARGV[2])
+
+local function apply(prefix, rebuilding, building)
+    local location_of = prefix .. 'location_of'
+    local locations = prefix .. 'locations'
+    local changed = prefix .. 'changed'
+
+    local function drop(id)
+        local location = redis.call('HGET', location_of, id)
+        if not location then return end
+        redis.call('HDEL', location_of, id)
+        local prices_key = prefix .. 'prices:' .. location
+        local old = redis.call('ZSCORE', prices_key, id)
+        if not old then return end
+        old = tonumber(old)
+        redis.call('ZREM', prices_key, id)
+        local stats_key = prefix .. 'stats:' .. location
+        redis.call('HINCRBY', stats_key, 'count', -1)
+        redis.call('HINCRBY', stats_key, 'sum', -old)
+        local bucket = 'h:' .. math.floor(old / width)
+        if redis.call('HINCRBY', stats_key, bucket, -1) <= 0 then
+            redis.call('HDEL', stats_key, bucket)
+        end
+        if tonumber(redis.call('ZINCRBY', locations, -1, location)) <= 0 then
+            redis.call('ZREM', locations, location)
+            redis.call('DEL', stats_key, prices_key)
+        end
+    end
+
+    for i = 4, #ARGV, 3 do
+        local id, location, cents = ARGV[i], ARGV[i + 1], tonumber(ARGV[i + 2])
+        if rebuilding and redis.call('SISMEMBER', changed, id) == 1 then
+            location = nil
+        else
+            if building then redis.call('SADD', changed, id) end
+            drop(id)
+        end
+        if location and location ~= '' then
+            redis.call('HSET', location_of, id, location)
+            redis.call('ZADD', prefix .. 'prices:' .. location, cents, id)
+            local stats_key = prefix .. 'stats:' .. location
+            redis.call('HINCRBY', stats_key, 'count', 1)
+            redis.call('HINCRBY', stats_key, 'sum', cents)
+            redis.call('HINCRBY', stats_key, 'h:' .. math.floor(cents / width), 1)
+            redis.call('ZINCRBY', locations, 1, location)
+        end
+    end
+end
+
+if ARGV[3] ~= '' then
+    apply(ARGV[1] .. ARGV[3] .. ':', true, false)
+    return 1
+end
+local current = redis.call('GET', KEYS[1])
+local building = redis.call('GET', KEYS[2])
+local written = 0
+if current and current ~= building then
+    apply(ARGV[1] .. current .. ':', false, false)
+    written = written + 1
+end
+if building then
+    apply(ARGV[1] .. building .. ':', false, true)
+    written = written + 1
+end
+return written
+"""
+
+
+class FacetsUnavailable(Exception):
+    """Raised while no complete snapshot of the facets exists yet."""
+
+
+def _cents(price):
+    return int(Decimal(price).scaleb(2))
+
+
+def _price(cents):
+    return str(Decimal(int(cents)).scaleb(-2))
+
+
+def _snapshot_key(generation, name):
+    return cache.make_key(f'{FACETS_KEY_PREFIX}{generation}:{name}')
+
+
+def _queue_upsert(pipeline, args, generation=''):
+    # EVAL rather than a registered script: EVALSHA in a pipeline costs an
+    # extra SCRIPT EXISTS round trip, and Redis caches the compiled script
+    pipeline.eval(
+        _UPSERT_SCRIPT,
+        2,
+        cache.make_key(FACETS_CURRENT_KEY),
+        cache.make_key(FACETS_BUILDING_KEY),
+        cache.make_key(FACETS_KEY_PREFIX),
+        PRICE_BUCKET_WIDTH * 100,
+        generation,
+        *args,
+    )
+
+
+def queue_facet_changes(pipeline, rows, removed_ids):
+    """
+    Queue the facet updates for some committed properties on a pipeline.
+
+    Applied to the current snapshot and to the one being rebuilt, if any,
+    so neither misses the change; without a snapshot nothing is written.
+
+    Args:
+        pipeline: Redis pipeline of the default cache; the caller executes it
+        rows: (id, location, price) of properties that exist
+        removed_ids: Ids of properties that no longer exist
+    """
+    args = []
+    for pk, location, price in rows:
+        args += [pk, location, _cents(price)]
+    for pk in removed_ids:
+        args += [pk, '', 0]
+    if args:
+        _queue_upsert(pipeline, args)
+
+
+def mark_facets_stale():
+    """
+    Rebuild the facets out of band, after writes that bypass the signals.
+
+    Reads keep serving the current snapshot until the rebuild replaces it.
+    Without a snapshot there is nothing stale; the first read builds one.
+    """
+    if get_redis_connection("default").exists(cache.make_key(FACETS_CURRENT_KEY)):
+        transaction.on_commit(rebuild_facets_in_background)
+
+
+def rebuild_property_facets():
+    """
+    Rebuild every facet from the Property table into a new snapshot.
+
+    Returns:
+        dict: Number of properties and locations, or None if another
+        rebuild holds the lock
+
+    Cache Strategy:
+        - Point 'building' at a new generation first, so changes committed
+          during the rebuild reach the new snapshot as well as the current one
+        - Stream (id, location, price) with a server-side cursor into the
+          upsert script, FACETS_REBUILD_ROWS_PER_SCRIPT rows per call; rows
+          of properties changed since the rebuild began are skipped, as the
+          change already reached the new snapshot and the row may predate it
+        - Swap 'current' to the new generation in one transaction; readers
+          see the old snapshot until then, never a partial one, and the old
+          one expires after FACETS_RETIRED_SNAPSHOT_TTL
+    """
+    token = uuid.uuid4().hex
+    if not cache.add(FACETS_REBUILD_LOCK_KEY, token, FACETS_REBUILD_LOCK_TIMEOUT):
+        return None
+    try:
+        redis_conn = get_redis_connection("default")
+        generation = uuid.uuid4().hex[:12]
+        # Expires with the lock, should this process die mid-rebuild
+        redis_conn.set(cache.make_key(FACETS_BUILDING_KEY), generation, ex=FACETS_REBUILD_LOCK_TIMEOUT)
+
+        properties = 0
+        args = []
+        pipeline = redis_conn.pipeline(transaction=False)
+        rows = Property.objects.order_by().values_list('id', 'location', 'price')
+        for pk, location, price in rows.iterator(chunk_size=FACETS_REBUILD_BATCH_SIZE):
+            args += [pk, location, _cents(price)]
+            properties += 1
+            if len(args) >= FACETS_REBUILD_ROWS_PER_SCRIPT * 3:
+                _queue_upsert(pipeline, args, generation)
+                args = []
+            if len(pipeline) * FACETS_REBUILD_ROWS_PER_SCRIPT >= FACETS_REBUILD_BATCH_SIZE:
+                pipeline.execute()
+        if args:
+            _queue_upsert(pipeline, args, generation)
+        pipeline.execute()
+
+        swap = redis_conn.pipeline(transaction=True)
+        swap.getset(cache.make_key(FACETS_CURRENT_KEY), generation)
+        swap.delete(cache.make_key(FACETS_BUILDING_KEY), _snapshot_key(generation, FACETS_CHANGED_KEY))
+        swap.zcard(_snapshot_key(generation, FACETS_LOCATIONS_KEY))
+        previous, _, locations = swap.execute()
+        if previous is not None:
+            _retire_snapshot(redis_conn, previous.decode('utf-8'))
+    finally:
+        if cache.get(FACETS_REBUILD_LOCK_KEY) == token:
+            cache.delete(FACETS_REBUILD_LOCK_KEY)
+
+    logger.info(f"Rebuilt property facets: {properties} properties in {locations} locations")
+    return {'properties': properties, 'locations': locations}
+
+
+def _retire_snapshot(redis_conn, generation):
+    pipeline = redis_conn.pipeline(transaction=False)
+    for key in redis_conn.scan_iter(match=_snapshot_key(generation, '*'), count=1000):
+        pipeline.expire(key, FACETS_RETIRED_SNAPSHOT_TTL)
+        if len(pipeline) >= FACETS_REBUILD_BATCH_SIZE:
+            pipeline.execute()
+    pipeline.execute()
+
+
+# Held while this process runs a background rebuild
+_rebuilding = threading.Lock()
+
+
+def rebuild_facets_in_background():
+    """
+    Rebuild the facets from a thread, so no request waits for the aggregation.
+
+    At most one rebuild runs per process, and rebuild_property_facets()
+    takes a lock across processes. The thread is not a daemon, so a
+    management command that bulk-loaded rows waits for it before exiting.
+    """
+    if not _rebuilding.acquire(blocking=False):
+        return
+
+    def rebuild():
+        try:
+            rebuild_property_facets()
+        except Exception as e:
+            logger.error(f"Property facets rebuild failed: {e}")
+        finally:
+            connections.close_all()
+            _rebuilding.release()
+
+    threading.Thread(target=rebuild, name='property-facets-rebuild').start()
+
+
+def _current_generation(redis_conn, rebuild=True):
+    generation = redis_conn.get(cache.make_key(FACETS_CURRENT_KEY))
+    if generation is None:
+        if rebuild:
+            rebuild_facets_in_background()
+        raise FacetsUnavailable('The property facets are being built, try again later')
+    return generation.decode('utf-8')
+
+
+def _largest_locations(redis_conn, generation, limit):
+    return [
+        (location.decode('utf-8'), int(count))
+        for location, count in redis_conn.zrevrange(
+            _snapshot_key(generation, FACETS_LOCATIONS_KEY), 0, limit - 1, withscores=True
+        )
+    ]
+
+
+def get_location_counts(limit=DEFAULT_FACETS_LIMIT):
+    """
+    Get the locations with the most listings, without their price statistics.
+
+    Args:
+        limit: Most locations to return
+
+    Returns:
+        list: (location, count) tuples, largest location first
+
+    Cache Strategy:
+        - One ZREVRANGE of the location counts, the cheap way to list
+          locations instead of SELECT DISTINCT over the Property table
+
+    Raises:
+        FacetsUnavailable: Before the first snapshot is built
+    """
+    redis_conn = get_redis_connection("default")
+    return _largest_locations(redis_conn, _current_generation(redis_conn), limit)
+
+
+def get_property_facets(locations=None, limit=DEFAULT_FACETS_LIMIT):
+    """
+    Get listing counts and price statistics per location.
+
+    Args:
+        locations: Locations to return, or None for the largest ones
+        limit: Most locations to return when locations is None
+
+    Returns:
+        list: Dicts with location, count, min_price, max_price, avg_price,
+        median_price and histogram (buckets of PRICE_BUCKET_WIDTH), largest
+        location first
+
+    Cache Strategy:
+        - Two pipelined round trips: the location counts, then per location
+          the stats hash plus the min, max and median of its price sorted
+          set, which cost O(log n) whatever the catalogue size
+        - Never aggregates the Property table: without a snapshot, one is
+          rebuilt in the background and FacetsUnavailable raised
+
+    Raises:
+        FacetsUnavailable: Before the first snapshot is built
+    """
+    redis_conn = get_redis_connection("default")
+    generation = _current_generation(redis_conn)
+
+    locations_key = _snapshot_key(generation, FACETS_LOCATIONS_KEY)
+    if locations is None:
+        counted = _largest_locations(redis_conn, generation, limit)
+    else:
+        scores = redis_conn.zmscore(locations_key, locations) if locations else []
+        counted = sorted(
+            ((location, int(score)) for location, score in zip(locations, scores) if score),
+            key=lambda item: -item[1],
+        )
+
+    pipeline = redis_conn.pipeline(transaction=False)
+    for location, count in counted:
+        prices_key = _snapshot_key(generation, f'{FACETS_PRICES_KEY_PREFIX}{location}')
+        pipeline.hgetall(_snapshot_key(generation, f'{FACETS_STATS_KEY_PREFIX}{location}'))
+        pipeline.zrange(prices_key, 0, 0, withscores=True)
+        pipeline.zrange(prices_key, -1, -1, withscores=True)
+        pipeline.zrange(prices_key, (count - 1) // 2, count // 2, withscores=True)
+    results = pipeline.execute()
+
+    facets = []
+    width = PRICE_BUCKET_WIDTH * 100
+    for i, (location, count) in enumerate(counted):
+        stats, lowest, highest, middle = results[i * 4:i * 4 + 4]
+        if not lowest:
+            continue
+        histogram = sorted(
+            (int(field[2:]), int(value)) for field, value in stats.items() if field.startswith(b'h:')
+        )
+        facets.append({
+            'location': location,
+            'count': count,
+            'min_price': _price(lowest[0][1]),
+            'max_price': _price(highest[0][1]),
+            'avg_price': _price(round(int(stats.get(b'sum', 0)) / count)),
+            'median_price': _price(round(sum(score for _, score in middle) / len(middle))),
+            'histogram': [
+                {'min_price': _price(bucket * width), 'max_price': _price((bucket + 1) * width), 'count': value}
+                for bucket, value in histogram
+            ],
+        })
+    return facets
+
+
+def check_property_facets():
+    """
+    Compare the facets in Redis with GROUP BY aggregates of the Property table.
+
+    Returns:
+        list: Dicts with location, field, expected (database) and actual
+        (Redis) value for every count, sum, min or max that differs
+
+    Raises:
+        FacetsUnavailable: Before the first snapshot is built
+    """
+    expected = {
+        row['location']: {
+            'count': row['count'],
+            'sum': _cents(row['total']),
+            'min': _cents(row['lowest']),
+            'max': _cents(row['highest']),
+        }
+        for row in Property.objects.order_by().values('location').annotate(
+            count=Count('id'), total=Sum('price'), lowest=Min('price'), highest=Max('price')
+        )
+    }
+
+    redis_conn = get_redis_connection("default")
+    generation = _current_generation(redis_conn, rebuild=False)
+    actual_locations = [
+        location.decode('utf-8')
+        for location in redis_conn.zrange(_snapshot_key(generation, FACETS_LOCATIONS_KEY), 0, -1)
+    ]
+    locations = sorted(set(expected) | set(actual_locations))
+    pipeline = redis_conn.pipeline(transaction=False)
+    for location in locations:
+        prices_key = _snapshot_key(generation, f'{FACETS_PRICES_KEY_PREFIX}{location}')
+        pipeline.hgetall(_snapshot_key(generation, f'{FACETS_STATS_KEY_PREFIX}{location}'))
+        pipeline.zrange(prices_key, 0, 0, withscores=True)
+        pipeline.zrange(prices_key, -1, -1, withscores=True)
+        pipeline.zcard(prices_key)
+    results = pipeline.execute()
+
+    drift = []
+    for i, location in enumerate(locations):
+        stats, lowest, highest, members = results[i * 4:i * 4 + 4]
+        actual = {
+            'count': int(stats.get(b'count', 0)),
+            'sum': int(stats.get(b'sum', 0)),
+            'min': int(lowest[0][1]) if lowest else None,
+            'max': int(highest[0][1]) if highest else None,
+        }
+        if members != actual['count']:
+            actual['count'] = f"{actual['count']} (index holds {members})"
+        wanted = expected.get(location, {'count': 0, 'sum': 0, 'min': None, 'max': None})
+        for field, value in wanted.items():
+            if actual[field] != value:
+                drift.append({'location': location, 'field': field, 'expected': value, 'actual': actual[field]})
+    return drift
@@ -0,0 +1,420 @@
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+import bisect
+import contextvars
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (milliseconds) of the per-view request latency histogram
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Per-view aggregates live in Redis hashes, so every worker process and the
+# get_cache_metrics command see the same numbers
+REQUEST_METRICS_KEY_PREFIX = 'request_metrics:'
+REQUEST_METRICS_VIEWS_KEY = 'request_metrics:views'
+
+# Prometheus counters and call latency histograms of all workers are summed
+# into this hash, one field per series (see properties.prometheus)
+METRICS_COUNTERS_KEY = 'metrics:counters'
+
+# Upper bounds (seconds) of the Redis call and database query histograms
+CALL_LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# Seconds between flushes of a worker's pending metrics to Redis
+METRICS_FLUSH_INTERVAL = 1.0
+
+# Counters summed per view, in addition to the request count and histogram
+SUMMED_FIELDS = (
+    'duration_ms', 'cache_gets', 'cache_hits', 'cache_misses', 'redis_round_trips',
+    'redis_ms', 'db_queries', 'db_ms', 'serialize_ms',
+)
+
+
+class RequestMetrics:
+    """Cache, Redis, database and serialization counters for one request."""
+
+    __slots__ = (
+        'cache_gets', 'cache_hits', 'cache_misses', 'redis_round_trips',
+        'redis_seconds', 'db_queries', 'db_seconds', 'serialize_seconds',
+    )
+
+    def __init__(self):
+        self.cache_gets = self.cache_hits = self.cache_misses = 0
+        self.redis_round_trips = self.db_queries = 0
+        self.redis_seconds = self.db_seconds = self.serialize_seconds = 0.0
+
+    def as_dict(self, duration_seconds):
+        return {
+            'duration_ms': round(duration_seconds * 1000, 3),
+            'cache_gets': self.cache_gets,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'redis_round_trips': self.redis_round_trips,
+            'redis_ms': round(self.redis_seconds * 1000, 3),
+            'db_queries': self.db_queries,
+            'db_ms': round(self.db_seconds * 1000, 3),
+            'serialize_ms': round(self.serialize_seconds * 1000, 3),
+        }
+
+    def server_timing(self, duration_seconds):
+        """
+        Format the counters as a Server-Timing header value.
+
+        Args:
+            duration_seconds: Total time spent handling the request
+
+        Returns:
+            str: e.g. 'cache;desc="3 gets: 2 hits / 1 misses", redis;desc="4 round trips";dur=0.8, ...'
+        """
+        return ', '.join((
+            f'cache;desc="{self.cache_gets} gets: {self.cache_hits} hits / {self.cache_misses} misses"',
+            f'redis;desc="{self.redis_round_trips} round trips";dur={self.redis_seconds * 1000:.3f}',
+            f'db;desc="{self.db_queries} queries";dur={self.db_seconds * 1000:.3f}',
+            f'serialize;dur={self.serialize_seconds * 1000:.3f}',
+            f'total;dur={duration_seconds * 1000:.3f}',
+        ))
+
+
+# A context variable rather than a thread local, so concurrent requests on
+# one event loop stay apart and sync_to_async() threads see their request's
+_current_metrics = contextvars.ContextVar('request_metrics', default=None)
+
+
+def current_request_metrics():
+    """
+    Get the metrics of the request being measured in this context.
+
+    Returns:
+        RequestMetrics: The counters, or None when the request is not sampled
+    """
+    return _current_metrics.get()
+
+
+def start_request_metrics():
+    """
+    Start measuring in this context.
+
+    Returns:
+        RequestMetrics: The counters that instrumented code will update
+    """
+    metrics = RequestMetrics()
+    _current_metrics.set(metrics)
+    return metrics
+
+
+def stop_request_metrics():
+    """
+    Stop measuring in this context.
+
+    Returns:
+        RequestMetrics: The final counters, or None if nothing was measured
+    """
+    metrics = _current_metrics.get()
+    _current_metrics.set(None)
+    return metrics
+
+
+def key_family(key):
+    """
+    Get the family of a cache key, used as a metrics label.
+
+    Args:
+        key: An unprefixed cache key, e.g. 'property:42'
+
+    Returns:
+        str: e.g. 'property', 'all_properties' or 'cache_page'
+    """
+    if key.startswith('views.decorators.cache.'):
+        # cache_page keys: views.decorators.cache.cache_page.<prefix>...
+        return key.split('.', 4)[3]
+    return key.split(':', 1)[0]
+
+
+_cache_counter_fields = {}
+
+
+def _cache_counter_field(family, tier, hit):
+    field = _cache_counter_fields.get((family, tier, hit))
+    if field is None:
+        field = _cache_counter_fields[family, tier, hit] = (
+            f'properties_cache_requests_total{{family="{family}",tier="{tier}",'
+            f'result="{"hit" if hit else "miss"}"}}'
+        )
+    return field
+
+
+def record_cache_lookups(keys, found, tier='redis'):
+    """
+    Count cache lookups for the current request and the Prometheus counters.
+
+    Args:
+        keys: The looked up cache keys
+        found: Container of the keys that were found
+        tier: 'redis' or 'local' (the in-process tier)
+    """
+    counts = {}
+    hits = misses = 0
+    for key in keys:
+        hit = key in found
+        field = _cache_counter_field(key_family(key), tier, hit)
+        counts[field] = counts.get(field, 0) + 1
+        if hit:
+            hits += 1
+        else:
+            misses += 1
+
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        if tier == 'local':
+            # A local miss falls through to Redis and is counted there
+            misses = 0
+        metrics.cache_gets += hits + misses
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+    _increment_many(METRICS_COUNTERS_KEY, counts)
+
+
+class serialization_timer:
+    """Context manager adding the time spent in its block to the request's serialization time."""
+
+    __slots__ = ('metrics', 'start')
+
+    def __enter__(self):
+        self.metrics = _current_metrics.get()
+        if self.metrics is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.metrics is not None:
+            self.metrics.serialize_seconds += time.perf_counter() - self.start
+
+
+def time_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper timing every query (installed on each new connection).
+    """
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        seconds = time.perf_counter() - start
+        observe_latency('properties_db_query_seconds', f'alias="{context["connection"].alias}"', seconds)
+        metrics = _current_metrics.get()
+        if metrics is not None:
+            metrics.db_queries += 1
+            metrics.db_seconds += seconds
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """connection_created receiver adding time_query to every database connection."""
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+def sample_rate():
+    """
+    Get the fraction of requests to measure.
+
+    Returns:
+        float: PROPERTY_REQUEST_METRICS['SAMPLE_RATE'], 0 to turn measuring off
+    """
+    return getattr(settings, 'PROPERTY_REQUEST_METRICS', {}).get('SAMPLE_RATE', 1.0)
+
+
+# Pending increments per Redis hash, flushed by flush_metrics()
+_pending = {}
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def _increment_many(hash_name, amounts):
+    with _pending_lock:
+        pending = _pending.setdefault(hash_name, {})
+        for field, amount in amounts.items():
+            pending[field] = pending.get(field, 0) + amount
+
+
+def increment_counter(field, amount=1):
+    """
+    Add to a Prometheus counter series.
+
+    Args:
+        field: Series name with labels, e.g. 'properties_cache_fallbacks_total{operation="property_list"}'
+        amount: Increment
+    """
+    _increment_many(METRICS_COUNTERS_KEY, {field: amount})
+
+
+_histogram_fields = {}
+
+
+def observe_latency(name, labels, seconds):
+    """
+    Add one observation to a Prometheus latency histogram.
+
+    Args:
+        name: Metric name, e.g. 'properties_redis_call_seconds'
+        labels: Preformatted label pairs, e.g. 'command="GET"'
+        seconds: The observed duration
+    """
+    fields = _histogram_fields.get((name, labels))
+    if fields is None:
+        separator = ',' if labels else ''
+        fields = _histogram_fields[name, labels] = (
+            [f'{name}_bucket{{{labels}{separator}le="{bound}"}}' for bound in CALL_LATENCY_BUCKETS]
+            + [f'{name}_bucket{{{labels}{separator}le="+Inf"}}'],
+            f'{name}_sum{{{labels}}}',
+            f'{name}_count{{{labels}}}',
+        )
+    buckets, sum_field, count_field = fields
+    index = bisect.bisect_left(CALL_LATENCY_BUCKETS, seconds)
+    _increment_many(METRICS_COUNTERS_KEY, {buckets[index]: 1, sum_field: seconds, count_field: 1})
+
+
+def _bucket_field(duration_ms):
+    for bound in LATENCY_BUCKETS_MS:
+        if duration_ms <= bound:
+            return f'le:{bound}'
+    return 'le:inf'
+
+
+def record_request(view_name, duration_seconds, metrics):
+    """
+    Add one measured request to its view's aggregates.
+
+    Args:
+        view_name: e.g. 'properties:property_list'
+        duration_seconds: Total time spent handling the request
+        metrics: The request's RequestMetrics
+    """
+    values = metrics.as_dict(duration_seconds)
+    amounts = {field: values[field] for field in SUMMED_FIELDS}
+    amounts['count'] = 1
+    amounts[_bucket_field(values['duration_ms'])] = 1
+    _increment_many(f'{REQUEST_METRICS_KEY_PREFIX}{view_name}', amounts)
+
+
+def flush_due():
+    """
+    Check whether METRICS_FLUSH_INTERVAL has passed since the last flush.
+
+    Returns:
+        bool: True if maybe_flush_metrics() would write to Redis
+    """
+    return time.monotonic() - _last_flush >= METRICS_FLUSH_INTERVAL
+
+
+def maybe_flush_metrics():
+    """
+    Flush pending metrics if METRICS_FLUSH_INTERVAL has passed since the last flush.
+
+    Called at the end of every request; failures are logged, never raised.
+    """
+    if not flush_due():
+        return
+    try:
+        flush_metrics()
+    except Exception as e:
+        # Metrics must never fail the request they describe
+        logger.warning(f"Failed to flush metrics: {e}")
+
+
+def _metrics_key(view_name):
+    return cache.make_key(f'{REQUEST_METRICS_KEY_PREFIX}{view_name}')
+
+
+def flush_metrics():
+    """Write this process's pending counters and aggregates to Redis in one pipeline."""
+    global _pending, _last_flush
+    with _pending_lock:
+        pending, _pending = _pending, {}
+        _last_flush = time.monotonic()
+    if not pending:
+        return
+
+    pipeline = get_redis_connection("default").pipeline(transaction=False)
+    view_names = [
+        name[len(REQUEST_METRICS_KEY_PREFIX):] for name in pending
+        if name.startswith(REQUEST_METRICS_KEY_PREFIX)
+    ]
+    if view_names:
+        pipeline.sadd(cache.make_key(REQUEST_METRICS_VIEWS_KEY), *view_names)
+    for hash_name, amounts in pending.items():
+        key = cache.make_key(hash_name)
+        for field, amount in amounts.items():
+            if isinstance(amount, float):
+                pipeline.hincrbyfloat(key, field, amount)
+            else:
+                pipeline.hincrby(key, field, amount)
+    try:
+        pipeline.execute()
+    except Exception:
+        # Keep the increments for the next flush, so an outage loses none
+        for hash_name, amounts in pending.items():
+            _increment_many(hash_name, amounts)
+        raise
+
+
+def get_metric_counters():
+    """
+    Get the Prometheus counters and histograms summed across all worker processes.
+
+    Returns:
+        dict: Series (name with labels) to value; histogram buckets are not cumulative
+    """
+    flush_metrics()
+    raw = get_redis_connection("default").hgetall(cache.make_key(METRICS_COUNTERS_KEY))
+    return {field.decode('utf-8'): float(value) for field, value in raw.items()}
+
+
+def _percentile_ms(buckets, count, percent):
+    # Upper bound of the bucket holding the percentile
+    rank = count * percent / 100
+    seen = 0
+    for bound in LATENCY_BUCKETS_MS:
+        seen += buckets.get(f'le:{bound}', 0)
+        if seen >= rank:
+            return bound
+    return None
+
+
+def get_request_metrics():
+    """
+    Get per-view request metrics aggregated across all worker processes.
+
+    Returns:
+        dict: Per view name: request count, average and approximate p50/p99
+        latency, latency histogram (non-cumulative counts per bucket upper
+        bound in ms) and per-request averages of the cache, Redis, database
+        and serialization counters
+    """
+    flush_metrics()
+    redis_conn = get_redis_connection("default")
+    view_names = sorted(name.decode('utf-8') for name in redis_conn.smembers(cache.make_key(REQUEST_METRICS_VIEWS_KEY)))
+    pipeline = redis_conn.pipeline(transaction=False)
+    for view_name in view_names:
+        pipeline.hgetall(_metrics_key(view_name))
+
+    results = {}
+    for view_name, raw in zip(view_names, pipeline.execute()):
+        values = {field.decode('utf-8'): float(value) for field, value in raw.items()}
+        count = int(values.get('count', 0))
+        if not count:
+            continue
+        buckets = {field: int(value) for field, value in values.items() if field.startswith('le:')}
+        results[view_name] = {
+            'requests': count,
+            'p50_ms': _percentile_ms(buckets, count, 50),
+            'p99_ms': _percentile_ms(buckets, count, 99),
+            'histogram_ms': {
+                field[3:]: buckets.get(field, 0)
+                for field in [f'le:{bound}' for bound in LATENCY_BUCKETS_MS] + ['le:inf']
+            },
+            **{f'avg_{field}': round(values.get(field, 0) / count, 3) for field in SUMMED_FIELDS},
+        }
+    return results
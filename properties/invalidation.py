@@ -0,0 +1,144 @@
+from asgiref.local import Local
+from django.db import DEFAULT_DB_ALIAS, transaction
+from .resilience import on_redis_recovery
+from .utils import apply_property_changes, invalidate_property_caches
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Above this many changed rows, one bulk write invalidates everything instead
+# of refreshing each entry (see PropertyQuerySet)
+MAX_TRACKED_PROPERTY_IDS = 10_000
+
+# Pending batches per database alias, separate for every thread and async task
+_state = Local()
+
+# Set when a committed batch could not be applied, e.g. while Redis was down.
+# The caches may then hold rows that changed since, so the next batch, or
+# Redis answering again, invalidates everything.
+_missed = threading.Event()
+
+
+class PendingInvalidation:
+    """
+    Property cache invalidations collected during one transaction.
+
+    Applied once, by apply_property_changes(), when the transaction
+    commits. Every change registers flush() with on_commit(), and only the
+    first call does anything. A rollback discards the callbacks, so
+    rolled-back changes never touch the cache; a batch left behind by one
+    joins the next transaction's, which only refreshes a few more entries
+    from the committed rows. A batch that cannot be applied is not retried;
+    every property cache is invalidated instead once Redis answers again.
+    """
+
+    def __init__(self, using):
+        self.using = using
+        self.property_ids = set()
+        self.tags = set()
+        self.last_modified = None
+        self.count_changed = False
+        self.everything = False
+        self.flushed = False
+
+    def add(self, property_ids, tags, last_modified, count_changed, everything):
+        self.property_ids.update(property_ids)
+        self.tags.update(tags)
+        if last_modified is not None and (self.last_modified is None or last_modified > self.last_modified):
+            self.last_modified = last_modified
+        self.count_changed |= count_changed
+        self.everything |= everything or len(self.property_ids) > MAX_TRACKED_PROPERTY_IDS
+
+    def flush(self):
+        if self.flushed:
+            return
+        self.flushed = True
+        batches = getattr(_state, 'batches', {})
+        if batches.get(self.using) is self:
+            del batches[self.using]
+
+        # A batch missed earlier is covered by invalidating everything now
+        everything = self.everything or _missed.is_set()
+        _missed.clear()
+        
+        # The transaction has committed; a cache failure must not fail the write
+        try:
+            if everything:
+                invalidate_property_caches()
+                refreshed, evicted = [], []
+            else:
+                refreshed, evicted = apply_property_changes(
+                    self.property_ids, self.tags, self.last_modified, self.count_changed
+                )
+        except Exception as e:
+            _missed.set()
+            logger.error(
+                f"Failed to invalidate property caches for {len(self.property_ids)} properties, "
+                f"will invalidate all of them once Redis is back: {e}"
+            )
+            return
+
+        logger.info(
+            f"Property caches invalidated: {len(refreshed)} refreshed, {len(evicted)} evicted"
+            f"{' (full invalidation)' if everything else ''}",
+            extra={'property_invalidation': {
+                'refreshed': len(refreshed),
+                'evicted': len(evicted),
+                'tags': len(self.tags),
+                'count_changed': self.count_changed,
+                'full': everything,
+            }},
+        )
+
+
+def queue_property_invalidation(property_ids=(), tags=(), last_modified=None, count_changed=False,
+                                everything=False, using=None):
+    """
+    Invalidate the caches of some properties once the current transaction commits.
+
+    Every call in one transaction joins the same batch, applied with one
+    query and one Redis pipeline by transaction.on_commit(). Outside a
+    transaction the batch is applied immediately.
+
+    Args:
+        property_ids: Ids of the created, updated or deleted properties
+        tags: Tags of the values the properties had before the change
+        last_modified: When the change happened
+        count_changed: Whether properties were created or deleted
+        everything: Invalidate every property cache instead (bulk changes)
+        using: Database alias of the transaction (default: 'default')
+    """
+    using = using or DEFAULT_DB_ALIAS
+    if not hasattr(_state, 'batches'):
+        _state.batches = {}
+    batch = _state.batches.get(using)
+    if batch is None:
+        batch = _state.batches[using] = PendingInvalidation(using)
+    batch.add(property_ids, tags, last_modified, count_changed, everything)
+    # Registered by every change, as a rolled-back savepoint drops the
+    # callbacks registered inside it. Runs at once outside a transaction,
+    # so register after add().
+    transaction.on_commit(batch.flush, using=using)
+
+
+def invalidate_missed_changes():
+    """
+    Invalidate every property cache if a committed batch could not be applied.
+    
+    Runs when a Redis circuit breaker closes, so changes committed while
+    Redis was down do not leave stale entries behind until the next write.
+    """
+    if not _missed.is_set():
+        return
+    _missed.clear()
+    try:
+        invalidate_property_caches()
+    except Exception as e:
+        _missed.set()
+        logger.error(f"Failed to invalidate property caches after Redis recovered: {e}")
+        return
+    logger.info("Property caches invalidated after Redis recovered (changes were missed while it was down)")
+
+
+on_redis_recovery(invalidate_missed_changes)
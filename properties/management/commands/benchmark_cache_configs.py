@@ -0,0 +1,143 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils.module_loading import import_string
+from django_redis import get_redis_connection
+from properties.caching import listing_cache_aliases, local_cache
+from properties.models import Property
+from properties.utils import ALL_PROPERTIES_CACHE_KEY, PROPERTY_CACHE_VERSION
+from decimal import Decimal
+import statistics
+import time
+
+# Every configuration starts from an empty database, so never point this at
+# the database the application uses
+DEFAULT_BENCHMARK_LOCATION = 'redis://127.0.0.1:6379/15'
+
+
+class Command(BaseCommand):
+    help = 'Compare list endpoint latency and Redis round trips across serializer/compressor configurations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--location',
+            default=DEFAULT_BENCHMARK_LOCATION,
+            help='Redis URL to benchmark against; its database is FLUSHED for every configuration',
+        )
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=0,
+            help='Insert this many synthetic properties for the run (rolled back afterwards)',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Number of requests to time for each configuration and endpoint',
+        )
+        parser.add_argument(
+            '--serializer',
+            action='append',
+            choices=sorted(settings.REDIS_SERIALIZERS),
+            help='Serializer to include (repeatable; default: all)',
+        )
+        parser.add_argument(
+            '--compressor',
+            action='append',
+            choices=sorted(settings.REDIS_COMPRESSORS),
+            help='Compressor to include (repeatable; default: all)',
+        )
+        parser.add_argument(
+            '--l1',
+            action='store_true',
+            help='Keep the in-process cache tier; by default it is cleared before every request',
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests must be a positive integer')
+
+        with transaction.atomic():
+            if options['rows']:
+                Property.objects.bulk_create(
+                    Property(
+                        title=f'Benchmark Property {i}',
+                        description='Synthetic property used for cache benchmarks.',
+                        price=Decimal('100000.00') + i,
+                        location=f'Location {i % 50}',
+                    )
+                    for i in range(options['rows'])
+                )
+
+            try:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Cache configuration benchmark ({Property.objects.count():,} rows, "
+                    f"{options['requests']} requests, {options['location']})"
+                ))
+                for serializer in options['serializer'] or sorted(settings.REDIS_SERIALIZERS):
+                    for compressor in options['compressor'] or sorted(settings.REDIS_COMPRESSORS):
+                        self.run(serializer, compressor, options)
+            finally:
+                transaction.set_rollback(True)
+
+    def run(self, serializer, compressor, options):
+        name = f'{serializer}+{compressor}'
+        # Pages share the benchmark database, so clearing the default alias
+        # empties both; only property data is stored with the encoding tried
+        caches = {**settings.CACHES}
+        for alias in listing_cache_aliases():
+            caches[alias] = {**settings.CACHES[alias], 'LOCATION': options['location']}
+        caches['default']['OPTIONS'] = {
+            **settings.CACHES['default']['OPTIONS'],
+            'SERIALIZER': settings.REDIS_SERIALIZERS[serializer],
+            'COMPRESSOR': settings.REDIS_COMPRESSORS[compressor],
+        }
+        try:
+            import_string(caches['default']['OPTIONS']['SERIALIZER'])
+            import_string(caches['default']['OPTIONS']['COMPRESSOR'])
+        except ImportError as e:
+            self.stdout.write(self.style.WARNING(f'  {name:<14} skipped: {e}'))
+            return
+
+        with override_settings(
+            CACHES=caches,
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            # Every request must report its round trips
+            PROPERTY_REQUEST_METRICS={'SAMPLE_RATE': 1.0},
+        ):
+            cache.clear()
+            local_cache.clear()
+            client = Client()
+            for label, params in (('list', {}), ('page', {'page_size': '50'})):
+                # The first request fills the caches; the rest are hits
+                client.get(reverse('properties:property_list'), params)
+                timings = []
+                round_trips = []
+                for _ in range(options['requests']):
+                    if not options['l1']:
+                        local_cache.clear()
+                    start = time.perf_counter()
+                    response = client.get(reverse('properties:property_list'), params)
+                    timings.append((time.perf_counter() - start) * 1000)
+                    round_trips.append(int(response['X-Redis-Round-Trips']))
+
+                self.stdout.write(
+                    f'  {name:<14} {label:<5} p50: {statistics.median(timings):8.3f} ms  '
+                    f'p99: {self.percentile(timings, 99):8.3f} ms  '
+                    f'round trips: {statistics.mean(round_trips):5.1f}/request'
+                )
+
+            stored = get_redis_connection('default').strlen(
+                cache.make_key(ALL_PROPERTIES_CACHE_KEY, version=PROPERTY_CACHE_VERSION)
+            )
+            self.stdout.write(f'  {name:<14} all_properties stored: {stored:,} bytes')
+            cache.clear()
+
+    def percentile(self, timings, percent):
+        ordered = sorted(timings)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
@@ -0,0 +1,235 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from properties.benchmark import (
+    DEFAULT_SEED,
+    SCENARIOS,
+    ScenarioRunner,
+    compare_results,
+    dataset_loaded,
+    generate_property_rows,
+)
+from properties.caching import listing_cache_aliases, local_cache
+from properties.models import Property
+from datetime import datetime, timezone
+import django
+import json
+import os
+import platform
+import tempfile
+
+# Every scenario starts from an empty Redis database, so never point this at
+# the database the application uses
+DEFAULT_BENCHMARK_REDIS = 'redis://127.0.0.1:6379/15'
+
+
+class Command(BaseCommand):
+    help = 'Run request mixes against the property API and report throughput, latency, queries and cache hit ratio'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=sorted(SCENARIOS),
+            help='Scenario to run (repeatable; default: all)',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=1000,
+            help='Number of timed operations per scenario',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=100,
+            help='Untimed operations run first in each scenario',
+        )
+        parser.add_argument(
+            '--rows',
+            type=int,
+            help='Load this many generated properties first, unless already loaded (kept afterwards)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=DEFAULT_SEED,
+            help='Seed of the dataset and of the operation sequence',
+        )
+        parser.add_argument(
+            '--redis',
+            default=DEFAULT_BENCHMARK_REDIS,
+            help='Redis URL, FLUSHED before every scenario, or "fake" for fakeredis',
+        )
+        parser.add_argument(
+            '--l1',
+            action='store_true',
+            help='Keep the in-process cache tier; by default it is cleared before every request',
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the results to this JSON file',
+        )
+        parser.add_argument(
+            '--compare',
+            help='Results JSON of an earlier run; fail if a scenario regressed',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=10.0,
+            help='Percentage by which rps may drop or p99 rise before --compare fails',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Output results in JSON format',
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['warmup'] < 0:
+            raise CommandError('--requests must be positive and --warmup not negative')
+        baseline = self.read_results(options['compare']) if options['compare'] else None
+        if options['rows']:
+            self.load_dataset(options['rows'], options['seed'])
+
+        results = {
+            'meta': {
+                'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'properties': Property.objects.count(),
+                'seed': options['seed'],
+                'requests': options['requests'],
+                'warmup': options['warmup'],
+                'database': connection.vendor,
+                'redis': options['redis'],
+                'l1': options['l1'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+            },
+            'scenarios': {},
+        }
+        # Writes made by the scenarios are rolled back, so every run starts
+        # from the same dataset
+        with transaction.atomic(), override_settings(**self.benchmark_settings(options['redis'])):
+            try:
+                for scenario in options['scenario'] or list(SCENARIOS):
+                    cache.clear()
+                    local_cache.clear()
+                    runner = ScenarioRunner(scenario, options['seed'], l1=options['l1'])
+                    results['scenarios'][scenario] = runner.run(options['requests'], options['warmup'])
+            finally:
+                cache.clear()
+                transaction.set_rollback(True)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self.print_results(results)
+
+        if baseline is not None:
+            self.compare(baseline, results, options['threshold'])
+
+    def read_results(self, path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read results from {path}: {e}') from e
+
+    def load_dataset(self, rows, seed):
+        if dataset_loaded(rows, seed):
+            return
+        # populate_properties does the batching, upserts on external_id and
+        # cache invalidation; COPY on PostgreSQL
+        fd, path = tempfile.mkstemp(suffix='.ndjson')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                for row in generate_property_rows(rows, seed):
+                    f.write(json.dumps(row, separators=(',', ':')) + '\n')
+            call_command(
+                'populate_properties',
+                file=path,
+                batch_size=5000,
+                method='copy' if connection.vendor == 'postgresql' else 'bulk',
+                stdout=self.stdout,
+            )
+        finally:
+            os.remove(path)
+
+    def benchmark_settings(self, redis):
+        default = settings.CACHES['default']
+        pool_kwargs = default.get('OPTIONS', {}).get('CONNECTION_POOL_KWARGS', {})
+        async_redis = {'LOCATION': redis, 'CONNECTION_POOL_KWARGS': {}}
+        if redis == 'fake':
+            try:
+                from fakeredis import FakeConnection, FakeServer
+                from fakeredis.aioredis import FakeConnection as FakeAsyncConnection
+            except ImportError as e:
+                raise CommandError('--redis fake requires the fakeredis package') from e
+            server = FakeServer()
+            redis = 'redis://127.0.0.1:6379/0'
+            pool_kwargs = {**pool_kwargs, 'connection_class': FakeConnection, 'server': server}
+            async_redis = {
+                'LOCATION': redis,
+                'CONNECTION_POOL_KWARGS': {'connection_class': FakeAsyncConnection, 'server': server},
+            }
+
+        # Property data and pages share the benchmark database, so clearing
+        # the default alias empties both; sessions are left alone
+        listing_caches = {
+            alias: {
+                **settings.CACHES[alias],
+                'LOCATION': redis,
+                'OPTIONS': {**settings.CACHES[alias].get('OPTIONS', {}), 'CONNECTION_POOL_KWARGS': pool_kwargs},
+            }
+            for alias in listing_cache_aliases()
+        }
+        return {
+            'CACHES': {**settings.CACHES, **listing_caches},
+            'PROPERTY_ASYNC_REDIS': async_redis,
+            'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver'],
+            # The runner measures every operation itself, writes included
+            'PROPERTY_REQUEST_METRICS': {'SAMPLE_RATE': 0},
+        }
+
+    def print_results(self, results):
+        meta = results['meta']
+        self.stdout.write(self.style.SUCCESS(
+            f"Property API benchmark: {meta['requests']:,} operations per scenario, "
+            f"{meta['properties']:,} properties, {meta['database']}, redis {meta['redis']}"
+        ))
+        for name, result in results['scenarios'].items():
+            hit_ratio = result['cache_hit_ratio']
+            self.stdout.write(
+                f"  {name:<12} rps: {result['rps']:9.1f}  p50: {result['p50_ms']:8.3f} ms  "
+                f"p95: {result['p95_ms']:8.3f} ms  p99: {result['p99_ms']:8.3f} ms  "
+                f"queries/op: {result['db_queries_per_request']:6.2f}  "
+                f"round trips/op: {result['redis_round_trips_per_request']:6.2f}  "
+                f"hit ratio: {'-' if hit_ratio is None else f'{hit_ratio:.1%}'}  "
+                f"errors: {result['errors']}"
+            )
+            if result['invalidations']:
+                self.stdout.write(
+                    f"  {'':<12} invalidation after {result['invalidations']} writes, "
+                    f"p50: {result['invalidation_p50_ms']:8.3f} ms  max: {result['invalidation_max_ms']:8.3f} ms"
+                )
+
+    def compare(self, baseline, results, threshold):
+        rows = compare_results(baseline, results, threshold)
+        self.stdout.write(f'Compared with {baseline["meta"]["timestamp"]} (threshold {threshold:g}%)')
+        for row in rows:
+            line = (
+                f"  {row['scenario']:<12} rps: {row['rps_change']:+6.1f}%  p99: {row['p99_change']:+6.1f}%  "
+                f"queries/op: {row['db_queries_change']:+.2f}"
+            )
+            self.stdout.write(self.style.ERROR(line) if row['regression'] else line)
+        regressions = [row['scenario'] for row in rows if row['regression']]
+        if regressions:
+            raise CommandError(f"Regressions beyond {threshold:g}%: {', '.join(regressions)}")
@@ -0,0 +1,119 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse
+from django.test.utils import override_settings
+from properties.caching import listing_cache_aliases, local_cache
+from properties.models import Property
+from properties.serializers import serialize_property
+from properties.utils import get_property_list_payload
+from decimal import Decimal
+import pickle
+import statistics
+import time
+
+LEGACY_CACHE_KEY = 'benchmark:legacy_all_properties'
+
+# The database is FLUSHED before and after the run, so never point this at
+# the database the application uses
+DEFAULT_BENCHMARK_LOCATION = 'redis://127.0.0.1:6379/15'
+
+
+class Command(BaseCommand):
+    help = 'Compare cache hit latency and payload size of pickled QuerySets vs serialized payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--location',
+            default=DEFAULT_BENCHMARK_LOCATION,
+            help='Redis URL to benchmark against; its database is FLUSHED before and after the run',
+        )
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=0,
+            help='Insert this many synthetic properties for the run (rolled back afterwards)',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=200,
+            help='Number of cache hits to time for each strategy',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['rows']:
+                Property.objects.bulk_create(
+                    Property(
+                        title=f'Benchmark Property {i}',
+                        description='Synthetic property used for cache benchmarks.',
+                        price=Decimal('100000.00') + i,
+                        location=f'Location {i % 50}',
+                    )
+                    for i in range(options['rows'])
+                )
+
+            # Uncommitted rows are cached during the run, so only ever in
+            # the benchmark database, which starts and ends empty
+            caches = {**settings.CACHES}
+            for alias in listing_cache_aliases():
+                caches[alias] = {**settings.CACHES[alias], 'LOCATION': options['location']}
+            with override_settings(CACHES=caches):
+                cache.clear()
+                local_cache.clear()
+                try:
+                    self.run(options['iterations'])
+                finally:
+                    cache.clear()
+                    local_cache.clear()
+                    transaction.set_rollback(True)
+
+    def run(self, iterations):
+        # Legacy strategy: pickle the QuerySet, rebuild dicts on every hit
+        cache.set(LEGACY_CACHE_KEY, Property.objects.all(), 3600)
+
+        def legacy_hit():
+            properties = cache.get(LEGACY_CACHE_KEY)
+            return JsonResponse({
+                'properties': [serialize_property(property) for property in properties],
+                'count': len(properties),
+            })
+
+        # New strategy: cached bytes go straight into the response. Both
+        # start from an empty cache, so both are built from the same rows.
+        get_property_list_payload()
+
+        def payload_hit():
+            return HttpResponse(get_property_list_payload(), content_type='application/json')
+
+        def clear_local_cache():
+            # Read from Redis, as the legacy strategy does, not the in-process tier
+            local_cache.clear()
+
+        legacy_size = len(pickle.dumps(cache.get(LEGACY_CACHE_KEY), pickle.HIGHEST_PROTOCOL))
+        payload_size = len(pickle.dumps(get_property_list_payload(), pickle.HIGHEST_PROTOCOL))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Property cache benchmark ({Property.objects.count():,} rows, {iterations} hits)'
+        ))
+        for name, hit, before, size in (
+            ('pickled QuerySet', legacy_hit, None, legacy_size),
+            ('serialized payload', payload_hit, clear_local_cache, payload_size),
+        ):
+            timings = self.time_calls(hit, iterations, before)
+            self.stdout.write(
+                f'  {name:<20} p50: {statistics.median(timings):8.3f} ms  '
+                f'max: {max(timings):8.3f} ms  stored: {size:,} bytes'
+            )
+
+    def time_calls(self, func, iterations, before=None):
+        timings = []
+        for _ in range(iterations):
+            if before is not None:
+                before()
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
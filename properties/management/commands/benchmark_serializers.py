@@ -0,0 +1,96 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+from properties.models import Property
+from properties.serializers import (
+    JSON_BACKEND,
+    JSON_BACKENDS,
+    PROPERTY_ROW_FIELDS,
+    encode_property,
+    encode_property_rows,
+    serialize_property,
+    serialize_property_row,
+)
+from datetime import timedelta
+from decimal import Decimal
+import time
+
+DEFAULT_ROW_COUNTS = [1_000, 10_000, 100_000]
+
+
+class Command(BaseCommand):
+    help = 'Compare rows per second of the property JSON encoders on synthetic rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            action='append',
+            help='Number of rows to encode (repeatable; default: 1000, 10000 and 100000)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Runs per encoder and size; the fastest is reported',
+        )
+
+    def handle(self, *args, **options):
+        row_counts = options['rows'] or DEFAULT_ROW_COUNTS
+        if min(row_counts) < 1 or options['repeat'] < 1:
+            raise CommandError('--rows and --repeat must be positive integers')
+
+        encoders = [
+            # What cache misses did before: model instances, a dict per row, json.dumps
+            ('instances + dicts + json', self.encode_instances),
+            ('rows + dicts + json', self.encode_row_dicts),
+        ]
+        encoders += [
+            (f'rows + {backend}', lambda rows, backend=backend: encode_property_rows(rows, backend))
+            for backend in sorted(JSON_BACKENDS)
+        ]
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Serializer benchmark (best of {options['repeat']}; default backend: {JSON_BACKEND})"
+        ))
+        for count in row_counts:
+            rows = self.make_rows(count)
+            self.stdout.write(f'  {count:,} rows')
+            baseline = None
+            for name, encode in encoders:
+                seconds = min(self.time_encode(encode, rows) for _ in range(options['repeat']))
+                rate = count / seconds
+                baseline = baseline or rate
+                self.stdout.write(
+                    f'    {name:<26} {rate:12,.0f} rows/s  {seconds * 1000:9.1f} ms  {rate / baseline:5.1f}x'
+                )
+
+    def make_rows(self, count):
+        now = timezone.now().replace(microsecond=123456)
+        return [
+            (
+                i + 1,
+                f'Benchmark Property {i}',
+                f'Bright {i % 5 + 1}-bedroom home with a "garden", close to shops and transit.',
+                Decimal('100000.00') + i,
+                f'Location {i % 50}',
+                now - timedelta(minutes=i),
+                now,
+            )
+            for i in range(count)
+        ]
+
+    def encode_instances(self, rows):
+        # from_db() is how the ORM builds instances from fetched rows
+        return [
+            encode_property(serialize_property(Property.from_db(DEFAULT_DB_ALIAS, PROPERTY_ROW_FIELDS, row)))
+            for row in rows
+        ]
+
+    def encode_row_dicts(self, rows):
+        return [encode_property(serialize_property_row(row)) for row in rows]
+
+    def time_encode(self, encode, rows):
+        start = time.perf_counter()
+        encode(rows)
+        return time.perf_counter() - start
@@ -1,5 +1,8 @@
-from django.core.management.base import BaseCommand
-from django.core.cache import cache
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from properties.caching import broadcast_invalidation, bump_tags, clear_cache_alias, listing_cache_aliases
+from properties.utils import invalidate_property_caches, preserve_access_counts
 
 class Command(BaseCommand):
     help = 'Clear the property cache from Redis'
@@ -8,18 +11,46 @@ class Command(BaseCommand):
         parser.add_argument(
             '--all',
             action='store_true',
-            help='Clear all cache instead of just property cache',
+            help='Clear all listing cache aliases (never sessions) instead of just property cache',
+        )
+        parser.add_argument(
+            '--alias',
+            action='append',
+            default=[],
+            choices=list(settings.CACHES),
+            help='Clear only this cache alias (repeatable); name the sessions alias to log every user out',
+        )
+        parser.add_argument(
+            '--tag',
+            action='append',
+            default=[],
+            help='Invalidate only results cached with this tag, e.g. location:Downtown (repeatable)',
         )
 
     def handle(self, *args, **options):
-        if options['all']:
-            cache.clear()
+        if options['tag']:
+            bump_tags(options['tag'])
+            self.stdout.write(
+                self.style.SUCCESS(f"Successfully invalidated tags: {', '.join(options['tag'])}")
+            )
+        elif options['all'] or options['alias']:
+            aliases = options['alias'] or listing_cache_aliases()
+            # Keep the access counts so warm_property_cache can refill the
+            # popular pages and searches afterwards
+            try:
+                with preserve_access_counts():
+                    for alias in aliases:
+                        clear_cache_alias(alias)
+            except ImproperlyConfigured as e:
+                raise CommandError(str(e)) from e
+            broadcast_invalidation(None)
             self.stdout.write(
-                self.style.SUCCESS('Successfully cleared all cache')
+                self.style.SUCCESS(f"Successfully cleared cache aliases: {', '.join(aliases)}")
             )
         else:
-            # Clear only the property cache
-            cache.delete('all_properties')
+            # Clear only the property cache: lists, per-property entries,
+            # pages and search results
+            invalidate_property_caches()
             self.stdout.write(
-                self.style.SUCCESS('Successfully cleared property cache (all_properties)')
+                self.style.SUCCESS('Successfully cleared property cache (all_properties, property:<id>, pages, searches)')
             )
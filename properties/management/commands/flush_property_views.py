@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from properties.utils import flush_property_views
+import time
+
+
+class Command(BaseCommand):
+    help = 'Write the property views counted in Redis to Property.view_count'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=int,
+            help='Keep running and flush every INTERVAL seconds',
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        if interval is not None and interval < 1:
+            raise CommandError('--interval must be a positive integer')
+
+        while True:
+            views = flush_property_views()
+            if views is None:
+                self.stdout.write(self.style.WARNING('Another flush is running; skipped'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'Flushed {views:,} property views'))
+            if interval is None:
+                return
+            time.sleep(interval)
@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+from properties.benchmark import DEFAULT_SEED, generate_property_rows
+from properties.management.commands.populate_properties import IMPORT_FIELDS
+import csv
+import json
+
+
+class Command(BaseCommand):
+    help = 'Write a deterministic synthetic property dataset as CSV or NDJSON for populate_properties'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=10_000,
+            help='Number of properties to generate',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=DEFAULT_SEED,
+            help='Seed of the generator; the same seed always gives the same rows',
+        )
+        parser.add_argument(
+            '--start',
+            type=int,
+            default=0,
+            help='Index of the first row, to generate a large dataset in parts',
+        )
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'ndjson'],
+            default='ndjson',
+            help='Output format',
+        )
+        parser.add_argument(
+            '--output',
+            default='-',
+            help='File to write ("-" writes stdout)',
+        )
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['start'] < 0:
+            raise CommandError('--rows must be positive and --start not negative')
+
+        if options['output'] == '-':
+            stream = self.stdout
+        else:
+            try:
+                stream = open(options['output'], 'w', newline='', encoding='utf-8')
+            except OSError as e:
+                raise CommandError(f"Cannot open {options['output']}: {e}") from e
+
+        rows = generate_property_rows(options['rows'], options['seed'], options['start'])
+        try:
+            if options['format'] == 'csv':
+                writer = csv.DictWriter(stream, fieldnames=IMPORT_FIELDS)
+                writer.writeheader()
+                writer.writerows(rows)
+            else:
+                for row in rows:
+                    stream.write(json.dumps(row, separators=(',', ':')) + '\n')
+        finally:
+            if stream is not self.stdout:
+                stream.close()
+
+        if stream is not self.stdout:
+            self.stdout.write(self.style.SUCCESS(
+                f"Wrote {options['rows']:,} properties (seed {options['seed']}) to {options['output']}"
+            ))
@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from properties.instrumentation import get_request_metrics
 from properties.utils import get_redis_cache_metrics
 import json
 
@@ -6,6 +8,12 @@ class Command(BaseCommand):
     help = 'Get Redis cache performance metrics'
 
     def add_arguments(self, parser):
+        parser.add_argument(
+            '--alias',
+            default='default',
+            choices=list(settings.CACHES),
+            help='Cache alias to measure (default: default)',
+        )
         parser.add_argument(
             '--json',
             action='store_true',
@@ -19,11 +27,14 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         # Get cache metrics
-        metrics = get_redis_cache_metrics()
+        metrics = get_redis_cache_metrics(options['alias'])
+        
+        # Per-view request metrics; unavailable when Redis is down
+        views = {} if metrics['error'] else get_request_metrics()
         
         if options['json']:
             # Output in JSON format
-            self.stdout.write(json.dumps(metrics, indent=2))
+            self.stdout.write(json.dumps({**metrics, 'views': views}, indent=2))
         else:
             # Output in human-readable format
             if metrics['error']:
@@ -32,12 +43,19 @@ class Command(BaseCommand):
                 )
             else:
                 self.stdout.write(
-                    self.style.SUCCESS("Redis Cache Metrics:")
+                    self.style.SUCCESS(f"Redis Cache Metrics ({metrics['alias']}):")
                 )
                 self.stdout.write(f"  Hits: {metrics['keyspace_hits']:,}")
                 self.stdout.write(f"  Misses: {metrics['keyspace_misses']:,}")
                 self.stdout.write(f"  Total Requests: {metrics['total_requests']:,}")
                 self.stdout.write(f"  Hit Ratio: {metrics['hit_ratio']:.4f} ({metrics['hit_ratio']*100:.2f}%)")
+                self.stdout.write(f"  Keys: {metrics['keys']:,}")
+                breaker = metrics['circuit_breaker']
+                if breaker:
+                    self.stdout.write(
+                        f"  Circuit Breaker ({breaker['server']}): {breaker['state']}, "
+                        f"{breaker['failures']:,} failed or slow calls, opened {breaker['trips']:,} times"
+                    )
                 
                 if options['verbose']:
                     self.stdout.write("")
@@ -45,4 +63,19 @@ class Command(BaseCommand):
                     self.stdout.write(f"  - Cache hits represent successful key retrievals")
                     self.stdout.write(f"  - Cache misses represent failed key retrievals")
                     self.stdout.write(f"  - Hit ratio indicates cache effectiveness")
+                    self.stdout.write(f"  - Hits and misses are server-wide; keys are this alias' database only")
                     self.stdout.write(f"  - Higher hit ratios indicate better cache performance")
+                
+                if views:
+                    self.stdout.write("")
+                    self.stdout.write(self.style.SUCCESS("Per-View Request Metrics:"))
+                    for view_name, view in views.items():
+                        self.stdout.write(
+                            f"  {view_name}: {view['requests']:,} requests, "
+                            f"p50 <= {view['p50_ms']} ms, p99 <= {view['p99_ms']} ms"
+                        )
+                        self.stdout.write(
+                            f"    per request: {view['avg_cache_hits']} cache hits / {view['avg_cache_misses']} misses, "
+                            f"redis {view['avg_redis_ms']} ms, {view['avg_db_queries']} queries in {view['avg_db_ms']} ms, "
+                            f"serialization {view['avg_serialize_ms']} ms"
+                        )
@@ -0,0 +1,158 @@
+from django.core.management.base import BaseCommand, CommandError
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import http.client
+import itertools
+import json
+import statistics
+import threading
+import time
+
+# docker-compose serves the WSGI deployment on 8000 and the ASGI one on 8001
+DEFAULT_TARGETS = ['wsgi=http://127.0.0.1:8000', 'asgi=http://127.0.0.1:8001']
+
+
+class Command(BaseCommand):
+    help = 'Compare requests per second and tail latency of running WSGI and ASGI deployments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target',
+            action='append',
+            metavar='NAME=URL',
+            help=f"Deployment to load (repeatable; default: {' '.join(DEFAULT_TARGETS)})",
+        )
+        parser.add_argument(
+            '--path',
+            action='append',
+            help='Path to request (repeatable; default: /properties/)',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=2000,
+            help='Number of timed requests per target and path',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=50,
+            help='Number of concurrent keep-alive connections',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=100,
+            help='Untimed requests sent first to fill caches and open connections',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Output results in JSON format',
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be positive integers')
+        targets = [self.parse_target(target) for target in options['target'] or DEFAULT_TARGETS]
+        paths = options['path'] or ['/properties/']
+
+        results = []
+        for path in paths:
+            for name, url in targets:
+                self.load(url, path, options['warmup'], options['concurrency'])
+                result = self.load(url, path, options['requests'], options['concurrency'])
+                results.append({'target': name, 'url': url, 'path': path, **result})
+
+        if options['json']:
+            self.stdout.write(json.dumps({'concurrency': options['concurrency'], 'results': results}, indent=2))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Load test: {options['requests']} requests per target and path, "
+            f"{options['concurrency']} concurrent connections"
+        ))
+        for path in paths:
+            self.stdout.write(f'  {path}')
+            rows = [result for result in results if result['path'] == path]
+            for result in rows:
+                self.stdout.write(
+                    f"    {result['target']:<6} rps: {result['rps']:9.1f}  "
+                    f"p50: {result['p50_ms']:8.3f} ms  p95: {result['p95_ms']:8.3f} ms  "
+                    f"p99: {result['p99_ms']:8.3f} ms  max: {result['max_ms']:8.3f} ms  "
+                    f"errors: {result['errors']}"
+                )
+            baseline = rows[0]
+            for result in rows[1:]:
+                if baseline['rps'] and baseline['p99_ms']:
+                    self.stdout.write(
+                        f"    {result['target']} vs {baseline['target']}: "
+                        f"{result['rps'] / baseline['rps']:.2f}x rps, "
+                        f"{result['p99_ms'] / baseline['p99_ms']:.2f}x p99"
+                    )
+
+    def parse_target(self, target):
+        name, separator, url = target.partition('=')
+        parts = urlsplit(url)
+        if not separator or parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise CommandError(f'Invalid --target {target!r}; expected NAME=http://host:port')
+        return name, url
+
+    def load(self, url, path, requests, concurrency):
+        """
+        Send requests over keep-alive connections and time each one.
+
+        Returns:
+            dict: Throughput, latency percentiles and error count
+        """
+        parts = urlsplit(url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        remaining = itertools.count()
+        timings = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker():
+            connection = connection_class(parts.hostname, parts.port, timeout=30)
+            local_timings = []
+            local_errors = 0
+            while next(remaining) < requests:
+                start = time.perf_counter()
+                try:
+                    connection.request('GET', path)
+                    response = connection.getresponse()
+                    response.read()
+                    if response.status >= 400:
+                        local_errors += 1
+                except (OSError, http.client.HTTPException):
+                    local_errors += 1
+                    connection.close()
+                    continue
+                local_timings.append((time.perf_counter() - start) * 1000)
+            connection.close()
+            with lock:
+                timings.extend(local_timings)
+                errors.append(local_errors)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for _ in range(concurrency):
+                executor.submit(worker)
+        elapsed = time.perf_counter() - start
+
+        return {
+            'requests': requests,
+            'errors': sum(errors),
+            'seconds': round(elapsed, 3),
+            'rps': round(len(timings) / elapsed, 1) if elapsed else 0.0,
+            'p50_ms': round(statistics.median(timings), 3) if timings else 0.0,
+            'p95_ms': round(self.percentile(timings, 95), 3),
+            'p99_ms': round(self.percentile(timings, 99), 3),
+            'max_ms': round(max(timings, default=0.0), 3),
+        }
+
+    def percentile(self, timings, percent):
+        if not timings:
+            return 0.0
+        ordered = sorted(timings)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
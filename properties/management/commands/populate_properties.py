@@ -1,11 +1,51 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 from properties.models import Property
-from decimal import Decimal
+from properties.utils import invalidate_property_caches
+from decimal import Decimal, InvalidOperation
+import csv
+import io
+import json
+import sys
+import time
+
+IMPORT_FIELDS = ('external_id', 'title', 'description', 'price', 'location')
+
+# Columns overwritten when an imported row matches an existing external_id
+UPSERT_FIELDS = ['title', 'description', 'price', 'location', 'updated_at']
+
 
 class Command(BaseCommand):
-    help = 'Populate the database with sample property data'
+    help = 'Populate the database with sample property data, or bulk load properties from a CSV/NDJSON feed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            help='Bulk load properties from this CSV or NDJSON file ("-" reads stdin)',
+        )
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'ndjson'],
+            help='Input format (default: from the file extension, otherwise csv)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of rows inserted per statement and transaction',
+        )
+        parser.add_argument(
+            '--method',
+            choices=['bulk', 'copy'],
+            default='bulk',
+            help='bulk_create upserts, or PostgreSQL COPY into a staging table',
+        )
 
     def handle(self, *args, **options):
+        if options['file']:
+            self.ingest(options)
+            return
+
         # Sample property data
         sample_properties = [
             {
@@ -60,3 +100,139 @@ class Command(BaseCommand):
         self.stdout.write(
             self.style.SUCCESS(f'Successfully created {created_count} new properties')
         )
+
+    def ingest(self, options):
+        """
+        Stream rows from a feed into the database in batches.
+
+        Rows are upserted on external_id (rows without one are inserted).
+        bulk_create and COPY do not send post_save, so the property caches are
+        invalidated once after the last batch instead of once per row.
+        """
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be a positive integer')
+        if options['method'] == 'copy' and connection.vendor != 'postgresql':
+            raise CommandError('--method copy requires PostgreSQL')
+
+        path = options['file']
+        input_format = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+        write_batch = self.copy_batch if options['method'] == 'copy' else self.bulk_create_batch
+
+        if path == '-':
+            stream = sys.stdin
+        else:
+            try:
+                stream = open(path, newline='', encoding='utf-8')
+            except OSError as e:
+                raise CommandError(f'Cannot open {path}: {e}') from e
+
+        total = 0
+        start = time.perf_counter()
+        try:
+            batch = []
+            for line_number, record in self.read_records(stream, input_format):
+                batch.append(self.clean_record(record, line_number))
+                if len(batch) >= options['batch_size']:
+                    total += self.write(write_batch, batch)
+                    batch = []
+                    self.report_progress(total, start, options['verbosity'])
+            if batch:
+                total += self.write(write_batch, batch)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if total:
+                invalidate_property_caches()
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {total:,} properties in {elapsed:.2f}s '
+            f'({total / elapsed if elapsed else 0:,.0f} rows/sec)'
+        ))
+
+    def read_records(self, stream, input_format):
+        if input_format == 'ndjson':
+            for line_number, line in enumerate(stream, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    raise CommandError(f'Line {line_number}: invalid JSON ({e})') from e
+                if not isinstance(record, dict):
+                    raise CommandError(f'Line {line_number}: expected a JSON object')
+                yield line_number, record
+        else:
+            reader = csv.DictReader(stream)
+            for record in reader:
+                yield reader.line_num, record
+
+    def clean_record(self, record, line_number):
+        for field in ('title', 'price', 'location'):
+            if record.get(field) in (None, ''):
+                raise CommandError(f'Line {line_number}: missing {field}')
+        try:
+            price = Decimal(str(record['price'])).quantize(Decimal('0.01'))
+        except (InvalidOperation, ValueError) as e:
+            raise CommandError(f"Line {line_number}: invalid price {record['price']!r}") from e
+        return (
+            str(record.get('external_id') or '') or None,
+            str(record['title']),
+            str(record.get('description') or ''),
+            price,
+            str(record['location']),
+        )
+
+    def write(self, write_batch, batch):
+        # ON CONFLICT cannot touch the same row twice in one statement, so
+        # the last occurrence of a repeated external_id wins
+        keyed = {row[0]: row for row in batch if row[0] is not None}
+        rows = [row for row in batch if row[0] is None] + list(keyed.values())
+        with transaction.atomic():
+            write_batch(rows)
+        # Rows actually written, so the reported count and rate are not inflated
+        return len(rows)
+
+    def bulk_create_batch(self, rows):
+        properties = [Property(**dict(zip(IMPORT_FIELDS, row))) for row in rows]
+        new = [property for property in properties if property.external_id is None]
+        keyed = [property for property in properties if property.external_id is not None]
+        if new:
+            Property.objects.bulk_create(new)
+        if keyed:
+            Property.objects.bulk_create(
+                keyed,
+                update_conflicts=True,
+                unique_fields=['external_id'],
+                update_fields=UPSERT_FIELDS,
+            )
+
+    def copy_batch(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            ('' if value is None else value for value in row) for row in rows
+        )
+        buffer.seek(0)
+
+        table = connection.ops.quote_name(Property._meta.db_table)
+        columns = ', '.join(IMPORT_FIELDS)
+        updates = ', '.join(f'{field} = EXCLUDED.{field}' for field in UPSERT_FIELDS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMP TABLE property_import ({", ".join(f"{field} text" for field in IMPORT_FIELDS)}) '
+                f'ON COMMIT DROP'
+            )
+            # Empty CSV fields load as NULL, so rows without external_id never conflict
+            cursor.copy_expert(f'COPY property_import ({columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+            cursor.execute(
+                f'INSERT INTO {table} ({columns}, created_at, updated_at) '
+                f'SELECT external_id, title, coalesce(description, \'\'), price::numeric, location, now(), now() '
+                f'FROM property_import '
+                f'ON CONFLICT (external_id) DO UPDATE SET {updates}'
+            )
+
+    def report_progress(self, total, start, verbosity):
+        if verbosity < 2:
+            return
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'  {total:,} rows ({total / elapsed if elapsed else 0:,.0f} rows/sec)')
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from properties.changes import prune_property_tombstones
+
+
+class Command(BaseCommand):
+    # Retention is only read from settings: the changes feed answers cursors
+    # older than it with 410, so no accepted cursor can miss a pruned delete
+    help = "Delete tombstones of deleted properties older than PROPERTY_CHANGES['RETENTION_DAYS']"
+
+    def handle(self, *args, **options):
+        deleted = prune_property_tombstones()
+        self.stdout.write(self.style.SUCCESS(f'Pruned {deleted:,} property tombstones'))
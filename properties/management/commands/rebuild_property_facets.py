@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from properties.facets import FacetsUnavailable, check_property_facets, rebuild_property_facets
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-location facets in Redis from the database, or check them for drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Compare the facets with GROUP BY aggregates instead; fail if any drifted',
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            try:
+                drift = check_property_facets()
+            except FacetsUnavailable as e:
+                raise CommandError('The property facets have not been built; run rebuild_property_facets') from e
+            for row in drift:
+                self.stdout.write(
+                    f"  {row['location']}: {row['field']} is {row['actual']}, expected {row['expected']}"
+                )
+            if drift:
+                raise CommandError(
+                    f'{len(drift)} facet values drifted; run rebuild_property_facets to rebuild them'
+                )
+            self.stdout.write(self.style.SUCCESS('Property facets match the database'))
+            return
+
+        result = rebuild_property_facets()
+        if result is None:
+            raise CommandError('Another rebuild of the property facets is running')
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt property facets: {result['properties']:,} properties in {result['locations']:,} locations"
+        ))
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from properties.warming import (
+    DEFAULT_WARM_PAGES,
+    DEFAULT_WARM_SEARCHES,
+    DEFAULT_WARM_WORKERS,
+    warm_property_caches,
+)
+
+
+class Command(BaseCommand):
+    help = 'Warm the property caches: all_properties, property:<id> entries and the most popular pages and searches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=DEFAULT_WARM_WORKERS,
+            help='Number of threads warming in parallel',
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=DEFAULT_WARM_PAGES,
+            help='Number of most requested listing pages to warm',
+        )
+        parser.add_argument(
+            '--searches',
+            type=int,
+            default=DEFAULT_WARM_SEARCHES,
+            help='Number of most requested searches to warm',
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be a positive integer')
+        for option in ('pages', 'searches'):
+            if options[option] < 0:
+                raise CommandError(f'--{option} must not be negative')
+
+        stats = warm_property_caches(
+            workers=options['workers'],
+            pages=options['pages'],
+            searches=options['searches'],
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Warmed property cache in {stats['seconds']:.2f}s: "
+            f"{stats['bytes']:,} bytes written"
+        ))
+        self.stdout.write(f"  Property entries: {stats['entries']:,}")
+        self.stdout.write(f"  Property lists:   {stats['lists']:,}")
+        self.stdout.write(f"  Listing pages:    {stats['pages']:,}")
+        self.stdout.write(f"  Searches:         {stats['searches']:,}")
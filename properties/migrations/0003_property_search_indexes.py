@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:41
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+
+
+def search_gin_index():
+    # Must match properties.search.property_search_vector() exactly
+    return GinIndex(
+        SearchVector('title', 'description', config='english'),
+        name='property_search_gin_idx',
+    )
+
+
+def create_search_gin_index(apps, schema_editor):
+    # tsvector/GIN are PostgreSQL-only; other backends fall back to icontains
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.add_index(apps.get_model('properties', 'Property'), search_gin_index())
+
+
+def drop_search_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.remove_index(apps.get_model('properties', 'Property'), search_gin_index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0002_property_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['location', 'price'], name='property_location_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['location', '-created_at'], name='property_location_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['price'], name='property_price_idx'),
+        ),
+        migrations.RunPython(create_search_gin_index, drop_search_gin_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0004_property_external_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='view_count',
+            field=models.PositiveIntegerField(db_default=0, default=0),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0005_property_view_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('property_id', models.BigIntegerField()),
+                ('external_id', models.CharField(blank=True, max_length=64, null=True)),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['updated_at', 'id'], name='property_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='propertytombstone',
+            index=models.Index(fields=['deleted_at', 'property_id'], name='tombstone_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:17
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0006_property_changes_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyViewFlush',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('flush_id', models.CharField(max_length=32, unique=True)),
+                ('flushed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -1,7 +1,76 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 # Create your models here.
 
+class PropertyQuerySet(models.QuerySet):
+    """
+    QuerySet whose bulk writes invalidate the property caches.
+
+    update() and bulk_update() send no post_save, so without this they would
+    leave cached entries, lists and search results stale. Like the signals,
+    they queue the changed ids on the transaction's invalidation batch (see
+    properties.invalidation), and they set updated_at, which auto_now only
+    does in save(), so the changes feed sees the rows. Writes that only
+    touch fields outside the cached payload, such as view_count, do neither.
+    """
+
+    def update(self, **kwargs):
+        if not self._touches_cached_fields(kwargs):
+            return super().update(**kwargs)
+        from .invalidation import MAX_TRACKED_PROPERTY_IDS
+
+        kwargs.setdefault('updated_at', timezone.now())
+        with transaction.atomic(using=self.db, savepoint=False):
+            # Read the old values first: results tagged with them must go too
+            before = list(self.values_list('id', 'location', 'price')[:MAX_TRACKED_PROPERTY_IDS + 1])
+            rows = super().update(**kwargs)
+            self._queue_invalidation(
+                [pk for pk, _, _ in before],
+                [(location, price) for _, location, price in before],
+            )
+        return rows
+
+    update.alters_data = True
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        objs = list(objs)
+        touches_cached_fields = self._touches_cached_fields(fields)
+        if touches_cached_fields and 'updated_at' not in fields:
+            now = timezone.now()
+            for obj in objs:
+                obj.updated_at = now
+            fields = [*fields, 'updated_at']
+        rows = super().bulk_update(objs, fields, batch_size=batch_size)
+        if touches_cached_fields:
+            loaded = [getattr(obj, '_loaded_values', {}) for obj in objs]
+            self._queue_invalidation(
+                [obj.pk for obj in objs],
+                [(values['location'], values['price']) for values in loaded if 'location' in values and 'price' in values],
+            )
+        return rows
+
+    bulk_update.alters_data = True
+
+    def _touches_cached_fields(self, fields):
+        from .serializers import PROPERTY_ROW_FIELDS
+        return bool(set(fields) & set(PROPERTY_ROW_FIELDS))
+
+    def _queue_invalidation(self, property_ids, old_values):
+        from .invalidation import MAX_TRACKED_PROPERTY_IDS, queue_property_invalidation
+        from .search import property_tags
+
+        if not property_ids:
+            return
+        queue_property_invalidation(
+            property_ids,
+            tags=[tag for location, price in old_values for tag in property_tags(location, price)],
+            last_modified=timezone.now(),
+            everything=len(property_ids) > MAX_TRACKED_PROPERTY_IDS,
+            using=self.db,
+        )
+
+
 class Property(models.Model):
     title  = models.CharField(max_length=255)
     description = models.TextField()
@@ -9,6 +78,72 @@ class Property(models.Model):
     location = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Natural key from an upstream data feed; bulk imports upsert on it
+    external_id = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    # Detail views counted in Redis and written back by flush_property_views.
+    # db_default covers the raw INSERT of populate_properties --method copy.
+    view_count = models.PositiveIntegerField(default=0, db_default=0)
+
+    objects = PropertyQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Supports keyset pagination on (created_at, id), newest first
+            models.Index(fields=['-created_at', '-id'], name='property_created_id_idx'),
+            # Search filters: location with a price range or price sort,
+            # location with recency sort, and price on its own
+            models.Index(fields=['location', 'price'], name='property_location_price_idx'),
+            models.Index(fields=['location', '-created_at'], name='property_location_created_idx'),
+            models.Index(fields=['price'], name='property_price_idx'),
+            # Supports the changes feed's keyset on (updated_at, id)
+            models.Index(fields=['updated_at', 'id'], name='property_updated_id_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored values so signal handlers can tell what changed
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def __str__(self):
+        return self.title
+
+
+class PropertyTombstone(models.Model):
+    """
+    Record of a deleted Property, served by the changes feed.
+
+    Written by the post_delete handler in the deleting transaction, so a
+    rolled-back delete leaves none. Pruned after
+    settings.PROPERTY_CHANGES['RETENTION_DAYS'] by prune_property_tombstones.
+    """
+    property_id = models.BigIntegerField()
+    external_id = models.CharField(max_length=64, null=True, blank=True)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Supports the changes feed's keyset on (deleted_at, property_id)
+            # and pruning by age
+            models.Index(fields=['deleted_at', 'property_id'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f'Property {self.property_id} deleted at {self.deleted_at}'
+
+
+class PropertyViewFlush(models.Model):
+    """
+    Id of the last snapshot of Redis view counts added to view_count.
+
+    Written in the same transaction as the counts, so a flush that dies
+    after committing but before deleting its snapshot in Redis is not
+    applied twice by the next one (see properties.utils.flush_property_views).
+    Only the latest row is kept.
+    """
+    flush_id = models.CharField(max_length=32, unique=True)
+    flushed_at = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f'View flush {self.flush_id} at {self.flushed_at}'
@@ -0,0 +1,165 @@
+from django.db import connection, connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from .models import Property
+from .serializers import PROPERTY_ROW_FIELDS
+import base64
+import binascii
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Below this many rows an exact COUNT(*) is cheap enough to run
+COUNT_ESTIMATE_THRESHOLD = 100_000
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor or page size cannot be used."""
+
+
+def encode_cursor(created_at, pk):
+    """
+    Encode a (created_at, id) position as an opaque URL-safe cursor.
+
+    Args:
+        created_at: The created_at timestamp of the last row on a page
+        pk: The id of the last row on a page
+
+    Returns:
+        str: The cursor to pass back as ?cursor=
+    """
+    raw = f'{created_at.isoformat()}|{pk}'.encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor().
+
+    Args:
+        cursor: The opaque cursor string
+
+    Returns:
+        tuple: (created_at, id)
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded).decode('utf-8').split('|')
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursor(f'Invalid cursor: {cursor!r}') from e
+    if created_at is None:
+        raise InvalidCursor(f'Invalid cursor: {cursor!r}')
+    return created_at, pk
+
+
+def parse_page_size(value):
+    """
+    Validate a ?page_size= value.
+
+    Args:
+        value: The raw query string value, or None for the default
+
+    Returns:
+        int: A page size between 1 and MAX_PAGE_SIZE
+
+    Raises:
+        InvalidCursor: If the value is not a positive integer
+    """
+    if value in (None, ''):
+        return DEFAULT_PAGE_SIZE
+    try:
+        page_size = int(value)
+    except ValueError as e:
+        raise InvalidCursor(f'Invalid page_size: {value!r}') from e
+    if page_size < 1:
+        raise InvalidCursor(f'Invalid page_size: {value!r}')
+    return min(page_size, MAX_PAGE_SIZE)
+
+
+def fetch_property_page(cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Fetch one page of properties, newest first, by seeking on (created_at, id).
+
+    Unlike OFFSET pagination, the database only reads page_size + 1 rows from
+    the (created_at, id) index no matter how deep the page is.
+
+    Args:
+        cursor: Cursor returned with the previous page, or None for the first page
+        page_size: Number of properties per page
+
+    Returns:
+        tuple: (list of values_list() rows in PROPERTY_ROW_FIELDS order, next cursor or None)
+    """
+    queryset = Property.objects.order_by('-created_at', '-id')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+
+    # Fetch one extra row to find out whether there is a next page
+    rows = list(queryset.values_list(*PROPERTY_ROW_FIELDS)[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        pk, created_at = rows[-1][0], rows[-1][PROPERTY_ROW_FIELDS.index('created_at')]
+        next_cursor = encode_cursor(created_at, pk)
+    return rows, next_cursor
+
+
+def estimate_property_count():
+    """
+    Count properties without a full table scan on large tables.
+
+    On PostgreSQL the planner statistics in pg_class.reltuples are used once
+    the table is large enough for an exact COUNT(*) to be slow.
+
+    Returns:
+        tuple: (total, is_estimate)
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [Property._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] >= COUNT_ESTIMATE_THRESHOLD:
+            return int(row[0]), True
+    return Property.objects.count(), False
+
+
+def estimate_queryset_count(queryset):
+    """
+    Count the rows of a Property QuerySet without scanning all of them.
+
+    An unfiltered QuerySet is counted by estimate_property_count(). On
+    PostgreSQL a filtered one is counted by the planner's row estimate from
+    EXPLAIN, which reads only the table statistics; an exact COUNT(*) runs
+    only when the estimate is below COUNT_ESTIMATE_THRESHOLD.
+
+    Args:
+        queryset: A QuerySet of Property, e.g. an admin changelist's
+
+    Returns:
+        tuple: (total, is_estimate)
+    """
+    if not queryset.query.has_filters() and not queryset.query.distinct:
+        return estimate_property_count()
+    if connections[queryset.db].vendor == 'postgresql':
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        rows = plan[0]['Plan']['Plan Rows']
+        if rows >= COUNT_ESTIMATE_THRESHOLD:
+            return int(rows), True
+    return queryset.count(), False
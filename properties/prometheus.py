@@ -0,0 +1,240 @@
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+from .instrumentation import (
+    CALL_LATENCY_BUCKETS,
+    LATENCY_BUCKETS_MS,
+    REQUEST_METRICS_KEY_PREFIX,
+    REQUEST_METRICS_VIEWS_KEY,
+    get_metric_counters,
+)
+from .resilience import CLOSED, HALF_OPEN, OPEN, REDIS_ERRORS, get_circuit_breakers
+from .utils import (
+    ALL_PROPERTIES_CACHE_KEY,
+    PROPERTY_CACHE_VERSION,
+    PROPERTY_COUNT_CACHE_KEY,
+    PROPERTY_INDEX_CACHE_KEY,
+    PROPERTY_INDEX_SENTINEL,
+    property_cache_key,
+)
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Property entries whose MEMORY USAGE is sampled on each scrape
+KEY_MEMORY_SAMPLE_SIZE = 20
+
+# Keys of which there is exactly one, measured on each scrape
+SINGLE_KEYS = (ALL_PROPERTIES_CACHE_KEY, PROPERTY_COUNT_CACHE_KEY, PROPERTY_INDEX_CACHE_KEY)
+
+# Counters and histograms recorded by properties.instrumentation
+COUNTER_HELP = {
+    'properties_cache_requests_total': ('counter', 'Cache lookups by key family, tier and result.'),
+    'properties_redis_call_seconds': ('histogram', 'Latency of Redis commands and pipelines.'),
+    'properties_db_query_seconds': ('histogram', 'Latency of database queries.'),
+    'properties_cache_fallbacks_total': ('counter', 'Reads served without Redis because it failed or its circuit breaker was open.'),
+    'properties_redis_short_circuited_total': ('counter', 'Redis calls skipped by an open circuit breaker.'),
+}
+
+# INFO fields exported as (metric name, type, help)
+REDIS_INFO_METRICS = {
+    'used_memory': ('properties_redis_used_memory_bytes', 'gauge', 'Memory used by Redis.'),
+    'evicted_keys': ('properties_redis_evicted_keys_total', 'counter', 'Keys evicted by Redis because of maxmemory.'),
+    'expired_keys': ('properties_redis_expired_keys_total', 'counter', 'Keys expired by Redis.'),
+    'keyspace_hits': ('properties_redis_keyspace_hits_total', 'counter', 'Successful key lookups, all Redis clients.'),
+    'keyspace_misses': ('properties_redis_keyspace_misses_total', 'counter', 'Failed key lookups, all Redis clients.'),
+}
+
+_SERIES = re.compile(r'^(?P<name>[a-z_]+?)(?:_(?P<suffix>bucket|sum|count))?\{(?P<labels>.*)\}$')
+_LE_LABEL = re.compile(r',?le="[^"]*"')
+
+
+def _format_value(value):
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def _header(lines, name, kind, help_text):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} {kind}')
+
+
+def _render_counters(lines, counters):
+    series = {}
+    for field, value in counters.items():
+        match = _SERIES.match(field)
+        if match is None:
+            continue
+        name, suffix, labels = match.group('name', 'suffix', 'labels')
+        series.setdefault(name, []).append((suffix, labels, value))
+
+    for name, (kind, help_text) in COUNTER_HELP.items():
+        if name not in series:
+            continue
+        _header(lines, name, kind, help_text)
+        if kind == 'counter':
+            for _, labels, value in sorted(series[name], key=lambda sample: sample[1]):
+                lines.append(f'{name}{{{labels}}} {_format_value(value)}')
+            continue
+
+        # Histogram buckets are stored per bucket; Prometheus wants them cumulative
+        by_labels = {}
+        for suffix, labels, value in series[name]:
+            base_labels = _LE_LABEL.sub('', labels)
+            by_labels.setdefault(base_labels, {})[suffix, labels] = value
+        for base_labels, samples in sorted(by_labels.items()):
+            separator = ',' if base_labels else ''
+            cumulative = 0
+            for bound in [*CALL_LATENCY_BUCKETS, '+Inf']:
+                bucket_labels = f'{base_labels}{separator}le="{bound}"'
+                cumulative += samples.get(('bucket', bucket_labels), 0)
+                lines.append(f'{name}_bucket{{{bucket_labels}}} {_format_value(cumulative)}')
+            lines.append(f'{name}_sum{{{base_labels}}} {_format_value(samples.get(("sum", base_labels), 0))}')
+            lines.append(f'{name}_count{{{base_labels}}} {_format_value(samples.get(("count", base_labels), 0))}')
+
+
+def _render_request_histograms(lines, redis_conn):
+    view_names = sorted(
+        name.decode('utf-8') for name in redis_conn.smembers(cache.make_key(REQUEST_METRICS_VIEWS_KEY))
+    )
+    if not view_names:
+        return
+    pipeline = redis_conn.pipeline(transaction=False)
+    for view_name in view_names:
+        pipeline.hgetall(cache.make_key(f'{REQUEST_METRICS_KEY_PREFIX}{view_name}'))
+
+    name = 'properties_request_duration_seconds'
+    _header(lines, name, 'histogram', 'Latency of sampled requests by view.')
+    for view_name, raw in zip(view_names, pipeline.execute()):
+        values = {field.decode('utf-8'): float(value) for field, value in raw.items()}
+        cumulative = 0
+        for bound in LATENCY_BUCKETS_MS:
+            cumulative += values.get(f'le:{bound}', 0)
+            lines.append(f'{name}_bucket{{view="{view_name}",le="{bound / 1000}"}} {_format_value(cumulative)}')
+        cumulative += values.get('le:inf', 0)
+        lines.append(f'{name}_bucket{{view="{view_name}",le="+Inf"}} {_format_value(cumulative)}')
+        lines.append(f'{name}_sum{{view="{view_name}"}} {_format_value(values.get("duration_ms", 0) / 1000)}')
+        lines.append(f'{name}_count{{view="{view_name}"}} {_format_value(values.get("count", 0))}')
+
+
+def _render_redis_info(lines, redis_conn):
+    try:
+        info = redis_conn.info()
+    except Exception as e:
+        logger.error(f"Failed to read Redis INFO for /metrics: {e}")
+        info = None
+
+    _header(lines, 'properties_redis_up', 'gauge', 'Whether Redis INFO could be read.')
+    lines.append(f'properties_redis_up {0 if info is None else 1}')
+    if info is None:
+        return
+    for field, (name, kind, help_text) in REDIS_INFO_METRICS.items():
+        if field in info:
+            _header(lines, name, kind, help_text)
+            lines.append(f'{name} {_format_value(info[field])}')
+
+
+def _render_cache_aliases(lines):
+    name = 'properties_cache_keys'
+    _header(lines, name, 'gauge', 'Keys in the Redis database of each cache alias.')
+    for alias in settings.CACHES:
+        try:
+            keys = get_redis_connection(alias).dbsize()
+        except Exception as e:
+            logger.error(f"Failed to count keys of cache alias '{alias}' for /metrics: {e}")
+            continue
+        lines.append(f'{name}{{alias="{alias}"}} {_format_value(keys)}')
+
+
+def _render_circuit_breakers(lines):
+    breakers = get_circuit_breakers()
+    if not breakers:
+        return
+    name = 'properties_redis_circuit_state'
+    _header(lines, name, 'gauge', 'State of the Redis circuit breakers of the scraped worker (1 for the current state).')
+    for breaker in breakers:
+        stats = breaker.stats()
+        for state in (CLOSED, OPEN, HALF_OPEN):
+            lines.append(f'{name}{{server="{stats["server"]}",state="{state}"}} {int(stats["state"] == state)}')
+
+
+def _render_key_memory(lines, redis_conn):
+    index_key = cache.make_key(PROPERTY_INDEX_CACHE_KEY, version=PROPERTY_CACHE_VERSION)
+    sample_ids = [
+        member for member in redis_conn.zrandmember(index_key, KEY_MEMORY_SAMPLE_SIZE) or []
+        if member != PROPERTY_INDEX_SENTINEL
+    ]
+    keys = [(key, cache.make_key(key, version=PROPERTY_CACHE_VERSION)) for key in SINGLE_KEYS]
+    keys += [
+        ('property', cache.make_key(property_cache_key(member.decode('utf-8')), version=PROPERTY_CACHE_VERSION))
+        for member in sample_ids
+    ]
+
+    pipeline = redis_conn.pipeline(transaction=False)
+    pipeline.zcard(index_key)
+    for _, key in keys:
+        pipeline.memory_usage(key)
+    results = pipeline.execute(raise_on_error=False)
+    indexed, sizes = results[0], results[1:]
+
+    single = {}
+    sampled = []
+    for (family, key), size in zip(keys, sizes):
+        if isinstance(size, Exception):
+            logger.error(f"Failed to sample memory of {key} for /metrics: {size}")
+            continue
+        if size is None:
+            continue
+        if family == 'property':
+            sampled.append(size)
+        else:
+            single[family] = size
+
+    if single:
+        name = 'properties_cache_key_memory_bytes'
+        _header(lines, name, 'gauge', 'MEMORY USAGE of single property cache keys.')
+        for family, size in sorted(single.items()):
+            lines.append(f'{name}{{key="{family}"}} {size}')
+
+    if sampled and not isinstance(indexed, Exception):
+        entries = max(indexed - 1, 0)  # minus the index sentinel
+        average = sum(sampled) / len(sampled)
+        name = 'properties_cache_entry_memory_bytes'
+        _header(lines, name, 'gauge', f'Average MEMORY USAGE of up to {KEY_MEMORY_SAMPLE_SIZE} sampled property:<id> entries.')
+        lines.append(f'{name}{{family="property"}} {_format_value(round(average, 1))}')
+        name = 'properties_cache_entries_estimated_memory_bytes'
+        _header(lines, name, 'gauge', 'Sampled average entry size times the number of indexed properties.')
+        lines.append(f'{name}{{family="property"}} {_format_value(round(average * entries))}')
+
+
+def render_metrics():
+    """
+    Render all metrics in the Prometheus text exposition format.
+
+    Returns:
+        str: Scrape body
+
+    Counters and histograms are summed across worker processes in Redis
+    (see properties.instrumentation); Redis memory and key sizes are read
+    at scrape time. While Redis is unavailable only properties_redis_up
+    and the circuit breaker states are rendered.
+    """
+    lines = []
+    redis_conn = get_redis_connection("default")
+    try:
+        _render_counters(lines, get_metric_counters())
+        _render_request_histograms(lines, redis_conn)
+    except REDIS_ERRORS as e:
+        logger.error(f"Failed to read metrics from Redis for /metrics: {e}")
+    _render_redis_info(lines, redis_conn)
+    _render_cache_aliases(lines)
+    try:
+        _render_key_memory(lines, redis_conn)
+    except REDIS_ERRORS as e:
+        logger.error(f"Failed to sample key memory for /metrics: {e}")
+    _render_circuit_breakers(lines)
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,245 @@
+from django.conf import settings
+from django_redis.exceptions import ConnectionInterrupted
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+from .instrumentation import increment_counter
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Defaults for settings.PROPERTY_REDIS_CIRCUIT_BREAKER
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 10
+SLOW_CALL_SECONDS = 0.25
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# What a call raises when Redis could not answer it: redis-py's errors, the
+# same wrapped by the django_redis cache API, or an open circuit breaker
+REDIS_ERRORS = (ConnectionInterrupted, RedisConnectionError, RedisTimeoutError)
+
+
+class CircuitOpen(RedisConnectionError):
+    """Raised instead of calling Redis while its circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker in front of one Redis server, shared by every client of it.
+
+    Closed, every call goes through. FAILURE_THRESHOLD consecutive calls that
+    fail or take longer than SLOW_CALL_SECONDS open it: calls then raise
+    CircuitOpen without touching the network, so requests fall back at once
+    instead of each waiting for a socket timeout. After RESET_TIMEOUT seconds
+    one call is let through as a probe (half-open); its success closes the
+    breaker and runs the on_redis_recovery() callbacks, and its failure
+    opens it again.
+    """
+
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT,
+                 slow_call_seconds=SLOW_CALL_SECONDS, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+        self.clock = clock
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.failures = 0
+        self.short_circuited = 0
+        self.trips = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """
+        Check whether a call may go to Redis now.
+
+        Returns:
+            bool: True if the call is the half-open probe, whose outcome
+            must be passed back to record()
+
+        Raises:
+            CircuitOpen: If the breaker is open, or half-open with the probe
+                already in flight
+        """
+        if self.state == CLOSED:
+            return False
+        with self._lock:
+            if self.state == OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self.probing = False
+            if self.state == HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            if self.state == CLOSED:
+                return False
+            self.short_circuited += 1
+        increment_counter(f'properties_redis_short_circuited_total{{server="{self.name}"}}')
+        raise CircuitOpen(f"Circuit breaker for Redis at {self.name} is open")
+
+    def record(self, seconds, failed, probe=False, bulk=False):
+        """
+        Record the outcome of a call that before_call() let through.
+
+        Args:
+            seconds: How long the call took; a slow call counts as a failure
+            failed: Whether Redis could not answer
+            probe: The value before_call() returned for the call
+            bulk: The call was a pipeline, whose duration grows with its
+                size, so a slow one counts neither way
+        """
+        slow = seconds >= self.slow_call_seconds
+        if bulk and slow and not failed:
+            return
+        failed = failed or slow
+        if not failed and not probe and not self.consecutive_failures:
+            return
+        recovered = False
+        with self._lock:
+            if failed:
+                self.failures += 1
+                self.consecutive_failures += 1
+                if probe or (self.state == CLOSED and self.consecutive_failures >= self.failure_threshold):
+                    self._open(seconds)
+            else:
+                self.consecutive_failures = 0
+                if probe:
+                    self.state = CLOSED
+                    self.probing = False
+                    recovered = True
+        if recovered:
+            logger.warning(f"Circuit breaker for Redis at {self.name} closed; Redis is answering again")
+            for callback in list(_recovery_callbacks):
+                try:
+                    callback()
+                except Exception as e:
+                    # Never fail the probe, which already succeeded
+                    logger.error(f"Redis recovery callback {callback.__qualname__} failed: {e}")
+
+    def _open(self, seconds):
+        self.state = OPEN
+        self.opened_at = self.clock()
+        self.probing = False
+        self.trips += 1
+        logger.error(
+            f"Circuit breaker for Redis at {self.name} opened after {self.consecutive_failures} "
+            f"failed or slow calls (last took {seconds * 1000:.0f} ms); "
+            f"retrying in {self.reset_timeout}s"
+        )
+
+    def stats(self):
+        """
+        Get the state and counters of this breaker.
+
+        Returns:
+            dict: server, state, consecutive and total failures, calls
+            short-circuited while open and the number of times it opened
+        """
+        with self._lock:
+            return {
+                'server': self.name,
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'failures': self.failures,
+                'short_circuited': self.short_circuited,
+                'trips': self.trips,
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name):
+    """
+    Get the circuit breaker of one Redis server, creating it on first use.
+
+    Args:
+        name: The server, e.g. 'redis:6379' or the path of its socket
+
+    Returns:
+        CircuitBreaker: Configured by settings.PROPERTY_REDIS_CIRCUIT_BREAKER
+    """
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                options = getattr(settings, 'PROPERTY_REDIS_CIRCUIT_BREAKER', {})
+                breaker = _breakers[name] = CircuitBreaker(
+                    name,
+                    failure_threshold=options.get('FAILURE_THRESHOLD', FAILURE_THRESHOLD),
+                    reset_timeout=options.get('RESET_TIMEOUT', RESET_TIMEOUT),
+                    slow_call_seconds=options.get('SLOW_CALL_SECONDS', SLOW_CALL_SECONDS),
+                )
+    return breaker
+
+
+def get_circuit_breakers():
+    """
+    Get the circuit breakers created by this process so far.
+
+    Returns:
+        list: CircuitBreaker instances, by server name
+    """
+    with _breakers_lock:
+        return [_breakers[name] for name in sorted(_breakers)]
+
+
+def reset_circuit_breakers():
+    """Forget every breaker and fallback count, e.g. between tests."""
+    with _breakers_lock:
+        _breakers.clear()
+    with _fallbacks_lock:
+        _fallbacks.clear()
+
+
+# Called, in the calling thread, whenever a half-open probe closes a breaker
+_recovery_callbacks = []
+
+
+def on_redis_recovery(callback):
+    """
+    Register a zero-argument callable to run when a Redis server answers again.
+
+    Args:
+        callback: Called after the probe that closed the breaker
+    """
+    _recovery_callbacks.append(callback)
+
+
+# Reads served without Redis, per operation, in this process
+_fallbacks = {}
+_fallbacks_lock = threading.Lock()
+
+
+def record_fallback(operation, error):
+    """
+    Count a read that was served without Redis.
+
+    Args:
+        operation: What fell back, e.g. 'property_list'
+        error: The Redis error; only errors other than an open breaker are
+            logged, once per failed call rather than once per request
+    """
+    with _fallbacks_lock:
+        _fallbacks[operation] = _fallbacks.get(operation, 0) + 1
+    increment_counter(f'properties_cache_fallbacks_total{{operation="{operation}"}}')
+    if not isinstance(error, CircuitOpen) and not isinstance(error.__cause__, CircuitOpen):
+        logger.warning(f"Redis unavailable for {operation}, falling back: {error}")
+
+
+def get_fallback_counts():
+    """
+    Get the number of reads served without Redis by this process.
+
+    Returns:
+        dict: Operation to count
+    """
+    with _fallbacks_lock:
+        return dict(_fallbacks)
@@ -0,0 +1,253 @@
+from datetime import datetime, time as datetime_time, timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from .models import Property
+import hashlib
+import json
+
+DEFAULT_SEARCH_LIMIT = 50
+MAX_SEARCH_LIMIT = 200
+
+# Text search configuration shared by queries and the GIN index (see
+# migration 0003), which only match when the expressions are identical
+SEARCH_CONFIG = 'english'
+
+# Cache tags (see properties.caching.tagged_cache_key). Every property change
+# bumps its location and price-bucket tags, old and new, plus CATALOGUE_TAG.
+CATALOGUE_TAG = 'catalogue'
+PRICE_BUCKET_WIDTH = 100_000
+
+# Carried by every search result and bumped only by bulk changes that bypass
+# the signals (see properties.utils.invalidate_property_caches)
+CATALOGUE_EPOCH_TAG = 'catalogue-epoch'
+
+# Bounded price queries spanning more buckets than this are tagged CATALOGUE_TAG
+MAX_PRICE_BUCKET_TAGS = 10
+
+SORT_ORDERS = {
+    'recent': ('-created_at', '-id'),
+    'price': ('price', 'id'),
+    '-price': ('-price', '-id'),
+}
+
+
+class InvalidSearch(ValueError):
+    """Raised when search parameters cannot be parsed."""
+
+
+def property_search_vector():
+    """
+    Get the full-text search expression over title and description.
+
+    Returns:
+        SearchVector: The expression indexed by property_search_gin_idx
+    """
+    return SearchVector('title', 'description', config=SEARCH_CONFIG)
+
+
+def _parse_price(name, value):
+    try:
+        price = Decimal(value).quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError) as e:
+        raise InvalidSearch(f'Invalid {name}: {value!r}') from e
+    if not price.is_finite() or price < 0:
+        raise InvalidSearch(f'Invalid {name}: {value!r}')
+    return str(price)
+
+
+def _parse_timestamp(name, value, end_of_day=False):
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is not None:
+                parsed = datetime.combine(day, datetime_time.max if end_of_day else datetime_time.min)
+    except ValueError as e:
+        raise InvalidSearch(f'Invalid {name}: {value!r}') from e
+    if parsed is None:
+        raise InvalidSearch(f'Invalid {name}: {value!r}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed.astimezone(dt_timezone.utc).isoformat()
+
+
+def normalize_search_params(params):
+    """
+    Validate search query parameters and bring them into a canonical form.
+
+    Equivalent queries (different parameter order, spacing, price formatting,
+    dates vs. timestamps) normalize to the same dictionary, and therefore
+    share one cache entry.
+
+    Args:
+        params: Mapping of raw query string values (e.g. request.GET)
+
+    Returns:
+        dict: Normalized parameters; absent filters are left out
+
+    Raises:
+        InvalidSearch: If a parameter cannot be parsed
+    """
+    normalized = {}
+
+    location = (params.get('location') or '').strip()
+    if location:
+        normalized['location'] = location
+
+    for name in ('min_price', 'max_price'):
+        if params.get(name):
+            normalized[name] = _parse_price(name, params[name])
+
+    if params.get('created_after'):
+        normalized['created_after'] = _parse_timestamp('created_after', params['created_after'])
+    if params.get('created_before'):
+        normalized['created_before'] = _parse_timestamp(
+            'created_before', params['created_before'], end_of_day=True
+        )
+
+    q = ' '.join((params.get('q') or '').split()).lower()
+    if q:
+        normalized['q'] = q
+
+    sort = params.get('sort') or 'recent'
+    if sort not in SORT_ORDERS:
+        raise InvalidSearch(f"Invalid sort: {sort!r}. Use one of {', '.join(SORT_ORDERS)}")
+    normalized['sort'] = sort
+
+    try:
+        limit = int(params.get('limit') or DEFAULT_SEARCH_LIMIT)
+    except ValueError as e:
+        raise InvalidSearch(f"Invalid limit: {params.get('limit')!r}") from e
+    if limit < 1:
+        raise InvalidSearch(f'Invalid limit: {limit!r}')
+    normalized['limit'] = min(limit, MAX_SEARCH_LIMIT)
+
+    return normalized
+
+
+def search_cache_key_suffix(normalized):
+    """
+    Hash normalized search parameters into a short cache key component.
+
+    Args:
+        normalized: Dictionary returned by normalize_search_params()
+
+    Returns:
+        str: Hex digest identifying the query
+    """
+    canonical = json.dumps(normalized, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+def location_tag(location):
+    """
+    Get the cache tag for a location.
+
+    Args:
+        location: The property location
+
+    Returns:
+        str: e.g. 'location:Downtown'
+    """
+    return f'location:{location}'
+
+
+def price_bucket_tag(price):
+    """
+    Get the cache tag for the price bucket a price falls into.
+
+    Args:
+        price: A Decimal or decimal string
+
+    Returns:
+        str: e.g. 'price-bucket:200k-300k'
+    """
+    low = int(Decimal(price) // PRICE_BUCKET_WIDTH) * PRICE_BUCKET_WIDTH
+    return f'price-bucket:{low // 1000}k-{(low + PRICE_BUCKET_WIDTH) // 1000}k'
+
+
+def property_tags(location, price):
+    """
+    Get the cache tags affected by a property with these values.
+
+    Args:
+        location: The property location
+        price: The property price
+
+    Returns:
+        list: Tags to bump when such a property appears, changes or disappears
+    """
+    return [location_tag(location), price_bucket_tag(price)]
+
+
+def search_tags(normalized):
+    """
+    Get the cache tags a search result depends on.
+
+    A result is tagged with its most selective filter only: any change that
+    can alter it bumps at least one of these tags, while changes elsewhere
+    (another location, a distant price bucket) leave it cached. Every result
+    also carries CATALOGUE_EPOCH_TAG, so bulk changes can retire them all.
+
+    Args:
+        normalized: Dictionary returned by normalize_search_params()
+
+    Returns:
+        list: Tag names
+    """
+    if 'location' in normalized:
+        return [location_tag(normalized['location']), CATALOGUE_EPOCH_TAG]
+
+    if 'min_price' in normalized and 'max_price' in normalized:
+        low = int(Decimal(normalized['min_price']) // PRICE_BUCKET_WIDTH)
+        high = int(Decimal(normalized['max_price']) // PRICE_BUCKET_WIDTH)
+        if 0 <= high - low < MAX_PRICE_BUCKET_TAGS:
+            return [
+                *(price_bucket_tag(bucket * PRICE_BUCKET_WIDTH) for bucket in range(low, high + 1)),
+                CATALOGUE_EPOCH_TAG,
+            ]
+
+    return [CATALOGUE_TAG, CATALOGUE_EPOCH_TAG]
+
+
+def search_properties(normalized):
+    """
+    Build the QuerySet for normalized search parameters.
+
+    Filters map onto the indexes declared on Property: (location, price),
+    (location, created_at), price and (created_at, id). On PostgreSQL, q uses
+    the GIN full-text index; other databases fall back to icontains.
+
+    Args:
+        normalized: Dictionary returned by normalize_search_params()
+
+    Returns:
+        QuerySet: Matching properties, sorted and limited
+    """
+    queryset = Property.objects.all()
+
+    if 'location' in normalized:
+        queryset = queryset.filter(location=normalized['location'])
+    if 'min_price' in normalized:
+        queryset = queryset.filter(price__gte=Decimal(normalized['min_price']))
+    if 'max_price' in normalized:
+        queryset = queryset.filter(price__lte=Decimal(normalized['max_price']))
+    if 'created_after' in normalized:
+        queryset = queryset.filter(created_at__gte=parse_datetime(normalized['created_after']))
+    if 'created_before' in normalized:
+        queryset = queryset.filter(created_at__lte=parse_datetime(normalized['created_before']))
+
+    if 'q' in normalized:
+        if connection.vendor == 'postgresql':
+            queryset = queryset.annotate(search=property_search_vector()).filter(
+                search=SearchQuery(normalized['q'], config=SEARCH_CONFIG)
+            )
+        else:
+            for term in normalized['q'].split():
+                queryset = queryset.filter(Q(title__icontains=term) | Q(description__icontains=term))
+
+    return queryset.order_by(*SORT_ORDERS[normalized['sort']])[:normalized['limit']]
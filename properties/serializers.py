@@ -0,0 +1,371 @@
+from json.encoder import encode_basestring_ascii
+import json
+
+try:
+    import orjson
+except ImportError:  # Optional; see JSON_BACKEND
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # Optional; see JSON_BACKEND
+    msgspec = None
+
+
+def serialize_property(property):
+    """
+    Convert a Property instance into a JSON-serializable dictionary.
+
+    Args:
+        property: The Property instance to serialize
+
+    Returns:
+        dict: The public representation of the property
+    """
+    return {
+        'id': property.id,
+        'title': property.title,
+        'description': property.description,
+        'price': str(property.price),  # Convert Decimal to string for JSON
+        'location': property.location,
+        'created_at': property.created_at.isoformat(),
+        'updated_at': property.updated_at.isoformat(),
+    }
+
+
+def encode_property(property_data):
+    """
+    Encode one serialized property as compact JSON.
+
+    Args:
+        property_data: Dictionary produced by serialize_property()
+
+    Returns:
+        bytes: UTF-8 JSON object, suitable for caching per property
+    """
+    return json.dumps(property_data, separators=(',', ':')).encode('utf-8')
+
+
+def join_property_list(encoded_properties):
+    """
+    Build the property list response body from already-encoded properties.
+
+    The entries are spliced together as bytes, so nothing is decoded or
+    re-encoded.
+
+    Args:
+        encoded_properties: List of bytes produced by encode_property()
+
+    Returns:
+        bytes: JSON body of the form {"properties": [...], "count": N}
+    """
+    return b''.join((
+        b'{"properties":[',
+        b','.join(encoded_properties),
+        b'],"count":',
+        str(len(encoded_properties)).encode('ascii'),
+        b'}',
+    ))
+
+
+def encode_property_page(encoded_properties, next_cursor, total, total_is_estimate):
+    """
+    Encode one cursor-paginated page from already-encoded properties.
+    
+    Args:
+        encoded_properties: List of bytes produced by encode_property_rows()
+        next_cursor: Cursor for the following page, or None on the last page
+        total: Cached or estimated number of properties overall
+        total_is_estimate: True if total comes from planner statistics
+        
+    Returns:
+        bytes: Compact UTF-8 JSON ready to be sent as the response body
+    """
+    return b''.join((
+        b'{"properties":[',
+        b','.join(encoded_properties),
+        b'],"count":',
+        str(len(encoded_properties)).encode('ascii'),
+        b',"next_cursor":',
+        json.dumps(next_cursor).encode('ascii'),
+        b',"total":',
+        str(total).encode('ascii'),
+        b',"total_is_estimate":',
+        b'true' if total_is_estimate else b'false',
+        b'}',
+    ))
+
+
+# Column order used when reading properties with values_list()
+PROPERTY_ROW_FIELDS = ('id', 'title', 'description', 'price', 'location', 'created_at', 'updated_at')
+
+
+def serialize_property_row(row):
+    """
+    Convert a values_list() row into the same dictionary as serialize_property().
+
+    Args:
+        row: Tuple of values in PROPERTY_ROW_FIELDS order
+
+    Returns:
+        dict: The public representation of the property
+    """
+    pk, title, description, price, location, created_at, updated_at = row
+    return {
+        'id': pk,
+        'title': title,
+        'description': description,
+        'price': str(price),
+        'location': location,
+        'created_at': created_at.isoformat(),
+        'updated_at': updated_at.isoformat(),
+    }
+
+
+# Same bytes as json.dumps(serialize_property_row(row), separators=(',', ':'))
+_JSON_ROW_TEMPLATE = (
+    '{"id":%d,"title":%s,"description":%s,"price":"%s","location":%s,'
+    '"created_at":"%s","updated_at":"%s"}'
+)
+
+
+def _encode_rows_json(rows):
+    # Formats each row straight into its JSON text: no dict per row and no
+    # pass of the generic encoder; only the free-text fields need escaping
+    return [
+        (_JSON_ROW_TEMPLATE % (
+            pk,
+            encode_basestring_ascii(title),
+            encode_basestring_ascii(description),
+            price,
+            encode_basestring_ascii(location),
+            created_at.isoformat(),
+            updated_at.isoformat(),
+        )).encode('ascii')
+        for pk, title, description, price, location, created_at, updated_at in rows
+    ]
+
+
+def _encode_rows_orjson(rows):
+    # orjson writes aware datetimes exactly like isoformat()
+    dumps = orjson.dumps
+    return [
+        dumps({
+            'id': pk,
+            'title': title,
+            'description': description,
+            'price': str(price),
+            'location': location,
+            'created_at': created_at,
+            'updated_at': updated_at,
+        })
+        for pk, title, description, price, location, created_at, updated_at in rows
+    ]
+
+
+def _encode_rows_msgspec(rows):
+    # msgspec writes UTC as 'Z', so datetimes are formatted by isoformat()
+    encode = msgspec.json.Encoder().encode
+    return [
+        encode({
+            'id': pk,
+            'title': title,
+            'description': description,
+            'price': str(price),
+            'location': location,
+            'created_at': created_at.isoformat(),
+            'updated_at': updated_at.isoformat(),
+        })
+        for pk, title, description, price, location, created_at, updated_at in rows
+    ]
+
+
+# Row encoders by name; only installed libraries are offered
+JSON_BACKENDS = {'json': _encode_rows_json}
+if msgspec is not None:
+    JSON_BACKENDS['msgspec'] = _encode_rows_msgspec
+if orjson is not None:
+    JSON_BACKENDS['orjson'] = _encode_rows_orjson
+
+# Fastest installed encoder. All of them produce the same JSON; the bytes
+# only differ in that orjson and msgspec write non-ASCII text as UTF-8
+# rather than \u escapes.
+JSON_BACKEND = 'orjson' if orjson is not None else 'msgspec' if msgspec is not None else 'json'
+
+
+def property_row(property):
+    """
+    Get the values_list() row for a Property instance.
+    
+    Args:
+        property: The Property instance
+        
+    Returns:
+        tuple: Values in PROPERTY_ROW_FIELDS order
+    """
+    return (
+        property.id,
+        property.title,
+        property.description,
+        property.price,
+        property.location,
+        property.created_at,
+        property.updated_at,
+    )
+
+
+def encode_property_rows(rows, backend=None):
+    """
+    Encode values_list() rows into one compact JSON object per property.
+    
+    Args:
+        rows: Iterable of rows in PROPERTY_ROW_FIELDS order
+        backend: Name from JSON_BACKENDS; defaults to JSON_BACKEND
+        
+    Returns:
+        list: bytes per row, as cached under 'property:<id>'
+    """
+    return JSON_BACKENDS[backend or JSON_BACKEND](rows)
+
+
+def iter_property_export(rows, format='json', batch_size=500):
+    """
+    Encode property rows chunk by chunk for a streaming response.
+
+    Only one batch of encoded rows is held in memory at a time, so memory use
+    does not depend on how many rows are exported.
+
+    Args:
+        rows: Iterable of values_list() rows in PROPERTY_ROW_FIELDS order
+        format: 'json' for a single JSON document, 'ndjson' for one object per line
+        batch_size: Number of rows encoded into each yielded chunk
+
+    Yields:
+        bytes: Consecutive pieces of the response body
+    """
+    ndjson = format == 'ndjson'
+    count = 0
+    batch = []
+
+    if not ndjson:
+        yield b'{"properties":['
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield _encode_export_batch(batch, ndjson, count)
+            count += len(batch)
+            batch = []
+
+    if batch:
+        yield _encode_export_batch(batch, ndjson, count)
+        count += len(batch)
+
+    if not ndjson:
+        yield f'],"count":{count}}}'.encode('utf-8')
+
+
+def _encode_export_batch(batch, ndjson, rows_before):
+    encoded = encode_property_rows(batch)
+    if ndjson:
+        return b'\n'.join(encoded) + b'\n'
+    chunk = b','.join(encoded)
+    if rows_before:
+        # Continue the JSON array started by an earlier batch
+        chunk = b',' + chunk
+    return chunk
+
+
+def encode_property_batch(encoded_properties, missing_ids):
+    """
+    Encode a batch lookup from already-encoded properties.
+    
+    Args:
+        encoded_properties: List of bytes produced by encode_property_rows()
+        missing_ids: Requested ids that do not exist
+        
+    Returns:
+        bytes: Compact UTF-8 JSON ready to be sent as the response body
+    """
+    return b''.join((
+        b'{"properties":[',
+        b','.join(encoded_properties),
+        b'],"count":',
+        str(len(encoded_properties)).encode('ascii'),
+        b',"missing":[',
+        ','.join(str(pk) for pk in missing_ids).encode('ascii'),
+        b']}',
+    ))
+
+
+def encode_property_changes(encoded_properties, tombstones, next_cursor, has_more):
+    """
+    Encode one page of the changes feed from already-encoded properties.
+    
+    Args:
+        encoded_properties: List of bytes produced by encode_property_rows()
+            for the created or updated properties
+        tombstones: List of (property_id, external_id, deleted_at) tuples
+        next_cursor: Cursor to pass back as ?since= for the next page
+        has_more: Whether more changes are waiting after this page
+        
+    Returns:
+        bytes: Compact UTF-8 JSON ready to be sent as the response body
+    """
+    deleted = [
+        {'id': pk, 'external_id': external_id, 'deleted_at': deleted_at.isoformat()}
+        for pk, external_id, deleted_at in tombstones
+    ]
+    return b''.join((
+        b'{"changes":[',
+        b','.join(encoded_properties),
+        b'],"deleted":',
+        json.dumps(deleted, separators=(',', ':')).encode('utf-8'),
+        b',"next_cursor":',
+        json.dumps(next_cursor).encode('utf-8'),
+        b',"has_more":',
+        b'true' if has_more else b'false',
+        b'}',
+    ))
+
+
+def encode_popular_properties(ranked):
+    """
+    Encode the most viewed properties from already-encoded properties.
+    
+    Args:
+        ranked: List of (bytes produced by encode_property_rows(), views)
+        
+    Returns:
+        bytes: Compact UTF-8 JSON with a view_count added to each property
+    """
+    return b''.join((
+        b'{"properties":[',
+        # Every encoded property is an object, so the count goes before its '}'
+        b','.join(entry[:-1] + b',"view_count":' + str(views).encode('ascii') + b'}' for entry, views in ranked),
+        b'],"count":',
+        str(len(ranked)).encode('ascii'),
+        b'}',
+    ))
+
+
+def encode_search_results(encoded_properties, query):
+    """
+    Encode property search results from already-encoded properties.
+    
+    Args:
+        encoded_properties: List of bytes produced by encode_property_rows()
+        query: Normalized search parameters the results answer
+        
+    Returns:
+        bytes: Compact UTF-8 JSON ready to be sent as the response body
+    """
+    return b''.join((
+        b'{"properties":[',
+        b','.join(encoded_properties),
+        b'],"count":',
+        str(len(encoded_properties)).encode('ascii'),
+        b',"query":',
+        json.dumps(query, separators=(',', ':')).encode('utf-8'),
+        b'}',
+    ))
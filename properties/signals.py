@@ -1,33 +1,93 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.core.cache import cache
-from .models import Property
+from django.utils import timezone
+from .invalidation import queue_property_invalidation
+from .models import Property, PropertyTombstone
+from .search import CATALOGUE_TAG, property_tags
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _changed_tags(instance):
+    # Tags for both the values loaded from the database and the saved ones,
+    # so results that contained the property before the change are retired too
+    tags = [CATALOGUE_TAG, *property_tags(instance.location, instance.price)]
+    loaded = getattr(instance, '_loaded_values', {})
+    if 'location' in loaded and 'price' in loaded:
+        tags.extend(property_tags(loaded['location'], loaded['price']))
+    # The saved values are what the next save of this instance changes from
+    instance._loaded_values = {**loaded, 'location': instance.location, 'price': instance.price}
+    return tags
 
 
 @receiver(post_save, sender=Property)
-def clear_property_cache_on_save(sender, instance, created, **kwargs):
+def clear_property_cache_on_save(sender, instance, created, using, **kwargs):
     """
-    Clear the 'all_properties' cache when a Property is created or updated.
+    Refresh the cached entry of a Property when it is created or updated.
+    
+    Only 'property:<id>' and the list index are touched; other entries stay
+    cached. The assembled 'all_properties' body is dropped so it is rebuilt
+    from the entries, and cached listing pages are retired. Every worker's
+    in-process cache is told to drop the same keys over Redis pub/sub.
+    Search results are retired only if tagged with the property's old or
+    new location or price bucket.
+    
+    Nothing happens before the transaction commits: the change joins the
+    transaction's batch (see properties.invalidation), applied once with
+    one query and one Redis pipeline, and dropped on rollback.
     
     Args:
         sender: The Property model class
         instance: The Property instance that was saved
         created: Boolean indicating if this is a new instance
+        using: Database alias the instance was saved to
         **kwargs: Additional keyword arguments
     """
-    cache.delete('all_properties')
-    print(f"Cache cleared: Property '{instance.title}' was {'created' if created else 'updated'}")
+    queue_property_invalidation(
+        [instance.id],
+        tags=_changed_tags(instance),
+        last_modified=instance.updated_at,
+        count_changed=created,
+        using=using,
+    )
+    action = 'created' if created else 'updated'
+    logger.info(
+        f"Property {instance.id} {action}: '{instance.title}'",
+        extra={'property_change': {'id': instance.id, 'action': action, 'title': instance.title}},
+    )
 
 
 @receiver(post_delete, sender=Property)
-def clear_property_cache_on_delete(sender, instance, **kwargs):
+def clear_property_cache_on_delete(sender, instance, using, **kwargs):
     """
-    Clear the 'all_properties' cache when a Property is deleted.
+    Evict the cached entry of a Property when it is deleted.
+    
+    Once the transaction commits, removes 'property:<id>', its list index
+    membership and its view counters, drops the assembled 'all_properties'
+    body (in Redis and in every worker's in-process cache) and retires
+    cached listing pages and search results tagged with the property's
+    location or price bucket.
+    
+    A tombstone is written in the deleting transaction, so the changes
+    feed can tell clients about the delete (see properties.changes).
     
     Args:
         sender: The Property model class
         instance: The Property instance that was deleted
+        using: Database alias the instance was deleted from
         **kwargs: Additional keyword arguments
     """
-    cache.delete('all_properties')
-    print(f"Cache cleared: Property '{instance.title}' was deleted")
+    PropertyTombstone.objects.using(using).create(property_id=instance.id, external_id=instance.external_id)
+    queue_property_invalidation(
+        [instance.id],
+        tags=[CATALOGUE_TAG, *property_tags(instance.location, instance.price)],
+        # Deletes leave no updated_at behind, so record the time of the delete
+        last_modified=timezone.now(),
+        count_changed=True,
+        using=using,
+    )
+    logger.info(
+        f"Property {instance.id} deleted: '{instance.title}'",
+        extra={'property_change': {'id': instance.id, 'action': 'deleted', 'title': instance.title}},
+    )
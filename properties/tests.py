@@ -1,16 +1,124 @@
-from django.test import TestCase, Client
+from django.conf import settings
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.urls import reverse
-from django.core.cache import cache
-from .models import Property
-from .utils import get_all_properties, get_redis_cache_metrics
+from django.views.decorators.cache import cache_page
+from django.db import connection, connections, transaction
+from unittest import skipUnless
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import cache, caches
+from .models import Property, PropertyTombstone, PropertyViewFlush
+from .utils import (
+    ALL_PROPERTIES_CACHE_KEY,
+    PROPERTY_CACHE_VERSION,
+    PROPERTY_INDEX_CACHE_KEY,
+    PROPERTY_NOT_FOUND,
+    PROPERTY_VIEWS_FLUSH_LOCK_KEY,
+    PROPERTY_VIEWS_FLUSHING_KEY,
+    PROPERTY_VIEWS_FLUSH_ID_KEY,
+    apply_property_changes,
+    flush_property_views,
+    get_all_properties,
+    get_catalogue_etag,
+    get_property_list_payload,
+    get_property_ids,
+    get_property_page_payload,
+    get_popular_pages,
+    get_popular_property_views,
+    get_property_list_generation,
+    get_popular_searches,
+    get_redis_cache_metrics,
+    invalidate_property_caches,
+    property_cache_key,
+    record_page_access,
+)
+from .caching import (
+    acache_aside,
+    aget,
+    broadcast_invalidation,
+    cache_aside,
+    get_cache_aside_value,
+    get_tier_stats,
+    listing_cache_aliases,
+    local_cache,
+    LocalCache,
+    tiered_get,
+    INVALIDATION_CHANNEL,
+    _apply_invalidation,
+    _local_cache_enabled,
+)
+from . import caching
+from .cache_backends import CountingAsyncRedis, CountingRedis, MsgpackSerializer, circuit_breaker_for, get_round_trip_total, msgpack
+from .middleware import RequestMetricsMiddleware
+from . import invalidation
+from .instrumentation import (
+    METRICS_COUNTERS_KEY,
+    flush_metrics,
+    get_request_metrics,
+    start_request_metrics,
+    stop_request_metrics,
+)
+from django_redis import get_redis_connection
+from redis.exceptions import ConnectionError as RedisConnectionError
+from .pagination import InvalidCursor, decode_cursor, encode_cursor, estimate_queryset_count
+from . import serializers
+from .serializers import (
+    JSON_BACKENDS,
+    PROPERTY_ROW_FIELDS,
+    encode_property_rows,
+    property_row,
+    serialize_property_row,
+)
+from .views import (
+    MAX_BATCH_IDS,
+    cache_metrics_async,
+    property_batch_async,
+    property_detail_async,
+    property_list_async,
+)
+from .warming import warm_property_caches
+from .benchmark import ScenarioRunner, compare_results, generate_property_rows
+from .changes import CHANGES_END, encode_changes_cursor
+from .facets import (
+    FACETS_CURRENT_KEY, FACETS_STATS_KEY_PREFIX, _queue_upsert, check_property_facets, get_property_facets,
+    rebuild_property_facets,
+)
+from .resilience import CircuitBreaker, CircuitOpen, get_fallback_counts, reset_circuit_breakers
+from .search import InvalidSearch, normalize_search_params, search_properties, search_tags
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from io import StringIO
+from datetime import timedelta
 from decimal import Decimal
+import asyncio
+import importlib
 import json
-from unittest.mock import patch, MagicMock
+import os
+import redis
+import tempfile
+import threading
+import time
+import tracemalloc
+from unittest.mock import patch, AsyncMock, MagicMock
 
 # Create your tests here.
 
+def clear_caches():
+    """Clear every cache alias in Redis, this process's in-process cache tier and circuit breakers."""
+    reset_circuit_breakers()
+    for alias in settings.CACHES:
+        caches[alias].clear()
+    local_cache.clear()
+
+
 class PropertyListViewTest(TestCase):
     def setUp(self):
+        # Clear cache so earlier tests can't leak cached responses
+        clear_caches()
         self.client = Client()
         # Create a test property
         self.property = Property.objects.create(
@@ -64,7 +172,7 @@ class PropertyListViewTest(TestCase):
 class GetAllPropertiesTest(TestCase):
     def setUp(self):
         # Clear cache before each test
-        cache.clear()
+        clear_caches()
         # Create test properties
         self.property1 = Property.objects.create(
             title='Test Property 1',
@@ -79,135 +187,2773 @@ class GetAllPropertiesTest(TestCase):
             location='Test Location 2'
         )
 
+    def cached_payload(self):
+        return get_cache_aside_value(ALL_PROPERTIES_CACHE_KEY, version=PROPERTY_CACHE_VERSION)
+
     def test_get_all_properties_from_database(self):
         """Test that get_all_properties fetches from database when cache is empty"""
         # Clear cache to ensure we fetch from database
-        cache.clear()
+        clear_caches()
         
         properties = get_all_properties()
         
         # Should return all properties
-        self.assertEqual(properties.count(), 2)
-        self.assertIn(self.property1, properties)
-        self.assertIn(self.property2, properties)
+        self.assertEqual(len(properties), 2)
+        self.assertEqual(
+            {p['title'] for p in properties},
+            {'Test Property 1', 'Test Property 2'}
+        )
         
-        # Should now be cached
-        cached_properties = cache.get('all_properties')
-        self.assertIsNotNone(cached_properties)
-        self.assertEqual(cached_properties.count(), 2)
+        # Should now be cached as encoded JSON, not a QuerySet
+        cached_payload = self.cached_payload()
+        self.assertIsInstance(cached_payload, bytes)
+        self.assertEqual(json.loads(cached_payload)['count'], 2)
 
     def test_get_all_properties_from_cache(self):
         """Test that get_all_properties returns cached data when available"""
         # First call should cache the data
         properties1 = get_all_properties()
-        self.assertEqual(properties1.count(), 2)
+        self.assertEqual(len(properties1), 2)
         
-        # Delete from database to simulate cache-only scenario
-        Property.objects.all().delete()
+        # Change the database without firing signals to simulate cache-only scenario
+        Property.objects.all().update(title='Changed In Database')
         
         # Second call should return cached data
         properties2 = get_all_properties()
-        self.assertEqual(properties2.count(), 2)
-        self.assertIn(self.property1, properties2)
-        self.assertIn(self.property2, properties2)
+        self.assertEqual(properties2, properties1)
 
     def test_get_all_properties_empty_database(self):
         """Test that get_all_properties handles empty database correctly"""
         # Clear cache and delete all properties
-        cache.clear()
+        clear_caches()
         Property.objects.all().delete()
         
         properties = get_all_properties()
         
-        # Should return empty queryset
-        self.assertEqual(properties.count(), 0)
+        # Should return empty list
+        self.assertEqual(properties, [])
         
         # Should be cached
-        cached_properties = cache.get('all_properties')
-        self.assertIsNotNone(cached_properties)
-        self.assertEqual(cached_properties.count(), 0)
+        cached_payload = self.cached_payload()
+        self.assertIsNotNone(cached_payload)
+        self.assertEqual(json.loads(cached_payload)['count'], 0)
 
+    def test_cache_hit_does_not_query_database(self):
+        """Test that a cache hit is served without touching the ORM"""
+        payload = get_property_list_payload()
+        
+        with self.assertNumQueries(0):
+            self.assertEqual(get_property_list_payload(), payload)
 
-class PropertySignalsTest(TestCase):
+    def test_legacy_unversioned_entry_is_ignored(self):
+        """Test that entries written under an older cache version are not read"""
+        cache.set(ALL_PROPERTIES_CACHE_KEY, 'stale pickled queryset', version=1)
+        cache.set(ALL_PROPERTIES_CACHE_KEY, b'{"properties":[],"count":0}', version=2)
+        
+        properties = get_all_properties()
+        
+        self.assertEqual(len(properties), 2)
+
+
+class PropertyPaginationTest(TestCase):
     def setUp(self):
-        # Clear cache before each test
-        cache.clear()
+        clear_caches()
+        self.client = Client()
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(5):
+                Property.objects.create(
+                    title=f'Paged Property {i}',
+                    description='Paged Description',
+                    price=Decimal('100000.00') + i,
+                    location='Test Location'
+                )
+            # Give two rows the same created_at so the id tiebreak is exercised
+            first = Property.objects.order_by('id').first()
+            Property.objects.filter(id=first.id + 1).update(created_at=first.created_at)
 
-    def test_post_save_signal_clears_cache_on_create(self):
-        """Test that post_save signal clears cache when property is created"""
-        # Populate cache first
-        properties = get_all_properties()
-        self.assertIsNotNone(cache.get('all_properties'))
+    def expected_ids(self):
+        return list(Property.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def test_cursor_pages_walk_every_row_once(self):
+        """Test that following next_cursor returns all rows in (created_at, id) order"""
+        seen = []
+        cursor = None
+        while True:
+            data = json.loads(get_property_page_payload(cursor, page_size=2))
+            seen.extend(p['id'] for p in data['properties'])
+            self.assertEqual(data['total'], 5)
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
         
-        # Create a new property (this should trigger the signal)
-        with patch('builtins.print') as mock_print:
+        self.assertEqual(seen, self.expected_ids())
+
+    def test_page_view_returns_first_page(self):
+        """Test that ?page_size= switches the list view to cursor pagination"""
+        response = self.client.get(reverse('properties:property_list'), {'page_size': 3})
+        
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertEqual([p['id'] for p in data['properties']], self.expected_ids()[:3])
+        self.assertEqual(data['count'], 3)
+        self.assertIsNotNone(data['next_cursor'])
+
+    def test_invalid_cursor_returns_400(self):
+        """Test that a malformed cursor is rejected"""
+        response = self.client.get(reverse('properties:property_list'), {'cursor': 'not-a-cursor'})
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', json.loads(response.content))
+
+    def test_cursor_round_trip(self):
+        """Test that cursors decode to the position they encode"""
+        property = Property.objects.first()
+        
+        cursor = encode_cursor(property.created_at, property.id)
+        
+        self.assertEqual(decode_cursor(cursor), (property.created_at, property.id))
+        with self.assertRaises(InvalidCursor):
+            decode_cursor('bm90LWEtY3Vyc29y')
+
+    def test_pages_are_cached_per_cursor(self):
+        """Test that a cached page is served without database queries"""
+        first_page = get_property_page_payload(page_size=2)
+        cursor = json.loads(first_page)['next_cursor']
+        
+        # Cold page: one seek query plus the cached total
+        with self.assertNumQueries(1):
+            second_page = get_property_page_payload(cursor, page_size=2)
+        
+        with self.assertNumQueries(0):
+            self.assertEqual(get_property_page_payload(page_size=2), first_page)
+            self.assertEqual(get_property_page_payload(cursor, page_size=2), second_page)
+
+    def test_save_retires_cached_pages(self):
+        """Test that saving a property invalidates cached pages"""
+        get_property_page_payload(page_size=2)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Property.objects.create(
+                title='Newest Property',
+                description='Newest Description',
+                price=Decimal('1.00'),
+                location='Test Location'
+            )
+        
+        data = json.loads(get_property_page_payload(page_size=2))
+        self.assertEqual(data['properties'][0]['title'], 'Newest Property')
+        self.assertEqual(data['total'], 6)
+
+
+class PropertySerializerTest(TestCase):
+    def setUp(self):
+        created_at = timezone.now().replace(microsecond=123456)
+        self.rows = [
+            (1, 'Plain title', 'Plain description', Decimal('250000.00'), 'Downtown', created_at, created_at),
+            (2, 'Quote " and \\ backslash', 'Line\nbreak\ttab', Decimal('0.50'), 'Zürich ☀', created_at, created_at),
+        ]
+
+    def test_backends_encode_same_json(self):
+        """Test that every installed backend encodes what serialize_property_row() describes"""
+        for backend in JSON_BACKENDS:
+            with self.subTest(backend=backend):
+                encoded = encode_property_rows(self.rows, backend)
+                self.assertEqual([json.loads(entry) for entry in encoded], [serialize_property_row(row) for row in self.rows])
+
+    def test_stdlib_backend_matches_json_dumps(self):
+        """Test that the stdlib fallback is byte-for-byte json.dumps output"""
+        self.assertEqual(
+            encode_property_rows(self.rows, 'json'),
+            [json.dumps(serialize_property_row(row), separators=(',', ':')).encode('utf-8') for row in self.rows],
+        )
+
+    @skipUnless(serializers.orjson is not None, 'orjson is not installed')
+    def test_orjson_matches_stdlib_for_ascii(self):
+        """Test that orjson only differs from the fallback in how it writes non-ASCII text"""
+        self.assertEqual(encode_property_rows(self.rows[:1], 'orjson'), encode_property_rows(self.rows[:1], 'json'))
+
+    def test_falls_back_to_stdlib_json(self):
+        """Test that the serializers work without orjson and msgspec"""
+        try:
+            with patch.dict('sys.modules', {'orjson': None, 'msgspec': None}):
+                importlib.reload(serializers)
+                self.assertEqual(serializers.JSON_BACKEND, 'json')
+                self.assertEqual(list(serializers.JSON_BACKENDS), ['json'])
+                self.assertEqual(len(serializers.encode_property_rows(self.rows)), 2)
+        finally:
+            importlib.reload(serializers)
+
+    def test_instance_and_row_encode_alike(self):
+        """Test that entries cached from instances (signals) match entries from rows"""
+        with self.captureOnCommitCallbacks(execute=True):
             property = Property.objects.create(
-                title='New Property',
-                description='New Description',
-                price=Decimal('500000.00'),
-                location='New Location'
+                title='Instance', description='Saved', price=Decimal('1.00'), location='Uptown'
             )
+        row = Property.objects.values_list(*PROPERTY_ROW_FIELDS).get(pk=property.pk)
+        self.assertEqual(encode_property_rows([property_row(property)]), encode_property_rows([row]))
+
+    def test_benchmark_command(self):
+        """Test the serializer microbenchmark on a small row count"""
+        out = StringIO()
+        call_command('benchmark_serializers', rows=[10], repeat=1, stdout=out)
+        output = out.getvalue()
+        self.assertIn('instances + dicts + json', output)
+        self.assertIn('rows + json', output)
+
+
+class PropertyExportTest(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = Client()
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(3):
+                Property.objects.create(
+                    title=f'Export Property {i}',
+                    description='Export Description',
+                    price=Decimal('200000.00'),
+                    location='Test Location'
+                )
+
+    def stream(self, **params):
+        response = self.client.get(reverse('properties:property_export'), params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def test_export_json(self):
+        """Test that the JSON export matches the property list representation"""
+        response, body = self.stream()
         
-        # Cache should be cleared
-        self.assertIsNone(cache.get('all_properties'))
+        self.assertEqual(response['Content-Type'], 'application/json')
+        data = json.loads(body)
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(data['properties'], sorted(get_all_properties(), key=lambda p: p['id']))
+
+    def test_export_ndjson(self):
+        """Test that the NDJSON export emits one property per line"""
+        response, body = self.stream(format='ndjson')
         
-        # Check that print statement was called
-        mock_print.assert_called_with("Cache cleared: Property 'New Property' was created")
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = body.decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[0])['title'], 'Export Property 0')
 
-    def test_post_save_signal_clears_cache_on_update(self):
-        """Test that post_save signal clears cache when property is updated"""
-        # Create a property first
-        property = Property.objects.create(
-            title='Test Property',
-            description='Test Description',
-            price=Decimal('300000.00'),
-            location='Test Location'
+    def test_export_unknown_format(self):
+        """Test that an unsupported format is rejected"""
+        response = self.client.get(reverse('properties:property_export'), {'format': 'xml'})
+        
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_memory_stays_flat(self):
+        """Test that peak memory does not grow with the number of exported rows"""
+        def add_rows(count):
+            Property.objects.bulk_create(
+                Property(
+                    title=f'Synthetic Property {i}',
+                    description='Synthetic Description',
+                    price=Decimal('150000.00'),
+                    location='Synthetic Location'
+                )
+                for i in range(count)
+            )
+
+        def peak_export_memory():
+            response = self.client.get(reverse('properties:property_export'))
+            tracemalloc.start()
+            try:
+                for _ in response.streaming_content:
+                    pass
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        add_rows(10_000)
+        peak_10k = peak_export_memory()
+        add_rows(90_000)
+        peak_100k = peak_export_memory()
+        
+        # Ten times the rows must not need anywhere near ten times the memory
+        self.assertLess(peak_100k, peak_10k * 1.5)
+
+
+class PerPropertyCacheTest(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = Client()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property1 = Property.objects.create(
+                title='Entry Property 1',
+                description='Entry Description 1',
+                price=Decimal('300000.00'),
+                location='Test Location'
+            )
+            self.property2 = Property.objects.create(
+                title='Entry Property 2',
+                description='Entry Description 2',
+                price=Decimal('400000.00'),
+                location='Test Location'
+            )
+
+    def cached_entry(self, property):
+        return cache.get(property_cache_key(property.id), version=PROPERTY_CACHE_VERSION)
+
+    def test_save_caches_entry_and_index(self):
+        """Test that saving a property writes its own entry and index membership"""
+        self.assertEqual(json.loads(self.cached_entry(self.property1))['title'], 'Entry Property 1')
+        self.assertEqual(get_property_ids(), [self.property1.id, self.property2.id])
+
+    def test_list_rebuilt_from_entries_without_database(self):
+        """Test that the list is assembled from cached entries with no queries"""
+        get_property_list_payload()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property1.title = 'Renamed Property'
+            self.property1.save()
+        
+        # The update refreshed only property1's entry; rebuilding needs no DB
+        with self.assertNumQueries(0):
+            properties = get_all_properties()
+        self.assertEqual(
+            [p['title'] for p in properties],
+            ['Renamed Property', 'Entry Property 2']
         )
+
+    def test_update_leaves_other_entries_cached(self):
+        """Test that updating one property does not evict other entries"""
+        entry2 = self.cached_entry(self.property2)
         
-        # Populate cache
-        properties = get_all_properties()
-        self.assertIsNotNone(cache.get('all_properties'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property1.price = Decimal('1.00')
+            self.property1.save()
         
-        # Update the property (this should trigger the signal)
-        with patch('builtins.print') as mock_print:
-            property.title = 'Updated Property'
+        self.assertEqual(self.cached_entry(self.property2), entry2)
+
+    def test_delete_removes_entry_and_membership(self):
+        """Test that deleting a property evicts only its entry and index member"""
+        get_property_ids()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property1.delete()
+        
+        self.assertIsNone(cache.get(property_cache_key(self.property1.id), version=PROPERTY_CACHE_VERSION))
+        self.assertIsNotNone(self.cached_entry(self.property2))
+        with self.assertNumQueries(0):
+            self.assertEqual([p['id'] for p in get_all_properties()], [self.property2.id])
+
+    def test_missing_entries_loaded_with_one_query(self):
+        """Test that evicted entries are reloaded from the database in one query"""
+        get_property_ids()
+        cache.delete(property_cache_key(self.property1.id), version=PROPERTY_CACHE_VERSION)
+        
+        with self.assertNumQueries(1):
+            properties = get_all_properties()
+        
+        self.assertEqual(len(properties), 2)
+        self.assertIsNotNone(self.cached_entry(self.property1))
+
+    def test_missing_index_rebuilt_from_database(self):
+        """Test that a lost index is rebuilt from the database"""
+        clear_caches()
+        
+        self.assertEqual(get_property_ids(), [self.property1.id, self.property2.id])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_property_ids(), [self.property1.id, self.property2.id])
+
+    def test_list_view_not_stale_after_save(self):
+        """Test that the cached list response is retired when a property changes"""
+        self.client.get(reverse('properties:property_list'))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property2.title = 'Fresh Title'
+            self.property2.save()
+        
+        response = self.client.get(reverse('properties:property_list'))
+        titles = [p['title'] for p in json.loads(response.content)['properties']]
+        self.assertIn('Fresh Title', titles)
+
+
+class CacheAsideTest(TransactionTestCase):
+    # The concurrency test runs real queries from threads, whose connections
+    # only see committed rows
+
+    def setUp(self):
+        clear_caches()
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+
+    def slow_query(self):
+        # Stands in for the full-table query behind a cached getter
+        with self.calls_lock:
+            self.calls += 1
+        time.sleep(0.2)
+        return b'payload'
+
+    def test_concurrent_misses_run_one_query(self):
+        """Test that simultaneous misses on the cold property list run the database queries once"""
+        for i in range(3):
+            Property.objects.create(
+                title=f'Cold Property {i}', description='Cold', price=Decimal('1000.00'), location='Downtown'
+            )
+        queries = []
+        queries_lock = threading.Lock()
+        
+        def count_query(execute, sql, params, many, context):
+            with queries_lock:
+                queries.append(sql)
+            # A slow query keeps the other workers waiting on the rebuild lock
+            time.sleep(0.05)
+            return execute(sql, params, many, context)
+        
+        def load():
+            # Wrappers are per connection, and every thread has its own
+            with connections['default'].execute_wrapper(count_query):
+                return get_property_list_payload()
+        
+        clear_caches()
+        expected = load()
+        cold_queries = len(queries)
+        self.assertGreater(cold_queries, 0)
+        clear_caches()
+        queries.clear()
+        
+        workers = 10
+        barrier = threading.Barrier(workers)
+        results = []
+        
+        def request():
+            barrier.wait()
+            try:
+                results.append(load())
+            finally:
+                connections.close_all()
+        
+        threads = [threading.Thread(target=request) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(len(queries), cold_queries)
+        self.assertEqual(results, [expected] * workers)
+
+    def test_stale_value_served_while_another_worker_recomputes(self):
+        """Test that a stale value is returned when the recompute lock is taken"""
+        cache.set('cache_aside:test', (b'stale', time.time() - 1, 0.0), 60)
+        cache.add('lock:cache_aside:test', 'other-worker', 30)
+        
+        self.assertEqual(cache_aside('cache_aside:test', self.slow_query, 60), b'stale')
+        self.assertEqual(self.calls, 0)
+
+    def test_stale_value_refreshed_by_lock_winner(self):
+        """Test that the worker holding the lock replaces a stale value"""
+        cache.set('cache_aside:test', (b'stale', time.time() - 1, 0.0), 60)
+        
+        self.assertEqual(cache_aside('cache_aside:test', self.slow_query, 60), b'payload')
+        self.assertEqual(get_cache_aside_value('cache_aside:test'), b'payload')
+        self.assertIsNone(cache.get('lock:cache_aside:test'))
+
+    def test_probabilistic_early_expiration(self):
+        """Test that an expensive value close to expiry can be recomputed early"""
+        cache.set('cache_aside:test', (b'old', time.time() + 5, 2.0), 60)
+        
+        # random() close to 1 makes -log(1 - r) large, i.e. volunteer early
+        with patch('properties.caching.random.random', return_value=0.99):
+            self.assertEqual(cache_aside('cache_aside:test', self.slow_query, 60), b'payload')
+        self.assertEqual(self.calls, 1)
+        
+        # A fresh value far from expiry is left alone
+        with patch('properties.caching.random.random', return_value=0.5):
+            self.assertEqual(cache_aside('cache_aside:test', self.slow_query, 60), b'payload')
+        self.assertEqual(self.calls, 1)
+
+
+class LocalCacheTierTest(TestCase):
+    def setUp(self):
+        clear_caches()
+        # Wait for this process's invalidation listener to subscribe
+        _local_cache_enabled()
+        self.assertTrue(caching._listener.subscribed.wait(2))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when full"""
+        lru = LocalCache(max_entries=2, timeout=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('c'), 3)
+
+    def test_ttl_expiry(self):
+        """Test that entries expire after their TTL"""
+        lru = LocalCache(max_entries=2, timeout=60)
+        lru.set('a', 1, timeout=0)
+        
+        self.assertIsNone(lru.get('a'))
+        self.assertEqual(lru.stats()['misses'], 1)
+
+    def test_tiered_get_serves_repeat_reads_locally(self):
+        """Test that a value read from Redis is then served from the local tier"""
+        cache.set('tier:test', 'value')
+        before = get_tier_stats()
+        
+        self.assertEqual(tiered_get('tier:test'), 'value')
+        with patch('properties.caching.cache.get') as mock_get:
+            self.assertEqual(tiered_get('tier:test'), 'value')
+            mock_get.assert_not_called()
+        
+        after = get_tier_stats()
+        self.assertEqual(after['l2']['hits'] - before['l2']['hits'], 1)
+        self.assertEqual(after['l1']['hits'] - before['l1']['hits'], 1)
+
+    def test_broadcast_publishes_and_drops_local_entry(self):
+        """Test that invalidations are published for other workers"""
+        pubsub = get_redis_connection("default").pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(INVALIDATION_CHANNEL)
+        cache.set('tier:test', 'value')
+        tiered_get('tier:test')
+        
+        broadcast_invalidation(['tier:test'])
+        
+        self.assertIs(local_cache.get(cache.make_key('tier:test'), None), None)
+        # The first read only consumes the subscribe confirmation
+        message = pubsub.get_message(timeout=1) or pubsub.get_message(timeout=1)
+        self.assertEqual(json.loads(message['data']), [cache.make_key('tier:test')])
+        pubsub.close()
+
+    def test_received_invalidation_drops_entries(self):
+        """Test that a message from another worker clears matching local entries"""
+        local_cache.set('a', 1)
+        local_cache.set('b', 2)
+        
+        _apply_invalidation(json.dumps(['a']))
+        self.assertIsNone(local_cache.get('a'))
+        self.assertEqual(local_cache.get('b'), 2)
+        
+        _apply_invalidation(json.dumps('*'))
+        self.assertIsNone(local_cache.get('b'))
+
+    def test_listener_applies_published_invalidation(self):
+        """Test that this worker's listener drops entries published by another worker"""
+        local_cache.set('from-other-worker', 1)
+        
+        get_redis_connection("default").publish(INVALIDATION_CHANNEL, json.dumps(['from-other-worker']))
+        
+        deadline = time.monotonic() + 2
+        while local_cache.get('from-other-worker') is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertIsNone(local_cache.get('from-other-worker'))
+
+    def test_signal_drops_local_list_payload(self):
+        """Test that saving a property drops the locally cached list"""
+        with self.captureOnCommitCallbacks(execute=True):
+            property = Property.objects.create(
+                title='Local Property',
+                description='Local Description',
+                price=Decimal('100000.00'),
+                location='Test Location'
+            )
+            get_property_list_payload()
+            property.title = 'Renamed Local Property'
             property.save()
         
-        # Cache should be cleared
-        self.assertIsNone(cache.get('all_properties'))
+        self.assertEqual(get_all_properties()[0]['title'], 'Renamed Local Property')
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = Client()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property = Property.objects.create(
+                title='Conditional Property',
+                description='Conditional Description',
+                price=Decimal('300000.00'),
+                location='Test Location'
+            )
+
+    def test_list_sends_validators(self):
+        """Test that the list response carries a strong ETag and Last-Modified"""
+        response = self.client.get(reverse('properties:property_list'))
         
-        # Check that print statement was called
-        mock_print.assert_called_with("Cache cleared: Property 'Updated Property' was updated")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', response)
 
-    def test_post_delete_signal_clears_cache(self):
-        """Test that post_delete signal clears cache when property is deleted"""
-        # Create a property first
-        property = Property.objects.create(
-            title='Test Property',
-            description='Test Description',
-            price=Decimal('300000.00'),
-            location='Test Location'
+    def test_matching_etag_returns_304_without_work(self):
+        """Test that If-None-Match short-circuits before the ORM or serializer"""
+        etag = self.client.get(reverse('properties:property_list'))['ETag']
+        
+        with self.assertNumQueries(0), \
+                patch('properties.views.get_property_list_payload') as mock_payload:
+            response = self.client.get(reverse('properties:property_list'), HTTP_IF_NONE_MATCH=etag)
+        
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        mock_payload.assert_not_called()
+
+    def test_if_modified_since_returns_304(self):
+        """Test that If-Modified-Since at or after Last-Modified returns 304"""
+        last_modified = self.client.get(reverse('properties:property_list'))['Last-Modified']
+        
+        response = self.client.get(
+            reverse('properties:property_list'),
+            HTTP_IF_MODIFIED_SINCE=last_modified
         )
         
-        # Populate cache
-        properties = get_all_properties()
-        self.assertIsNotNone(cache.get('all_properties'))
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_after_save_and_delete(self):
+        """Test that the signals move the catalogue version on every change"""
+        etag = self.client.get(reverse('properties:property_list'))['ETag']
         
-        # Delete the property (this should trigger the signal)
-        with patch('builtins.print') as mock_print:
-            property.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property.price = Decimal('1.00')
+            self.property.save()
+        response = self.client.get(reverse('properties:property_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
         
-        # Cache should be cleared
-        self.assertIsNone(cache.get('all_properties'))
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property.delete()
+        response = self.client.get(reverse('properties:property_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['count'], 0)
+
+    def test_last_modified_falls_back_to_database(self):
+        """Test that a cold cache recovers Last-Modified from MAX(updated_at)"""
+        clear_caches()
+        
+        response = self.client.get(reverse('properties:property_list'))
+        
+        self.assertIn('Last-Modified', response)
+
+
+class PropertySearchTest(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = Client()
+        with self.captureOnCommitCallbacks(execute=True):
+            for title, description, price, location in (
+                ('Harbor Loft', 'Open plan loft with marina views', '250000.00', 'Downtown'),
+                ('Garden Cottage', 'Quiet cottage with a large garden', '180000.00', 'Suburbs'),
+                ('Sky Penthouse', 'Penthouse with panoramic city views', '850000.00', 'Downtown'),
+            ):
+                Property.objects.create(
+                    title=title,
+                    description=description,
+                    price=Decimal(price),
+                    location=location
+                )
+
+    def search(self, **params):
+        response = self.client.get(reverse('properties:property_search'), params)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)
+
+    def test_filter_by_location_and_price(self):
+        """Test that location and price range filters combine"""
+        data = self.search(location='Downtown', max_price='300000')
+        
+        self.assertEqual([p['title'] for p in data['properties']], ['Harbor Loft'])
+
+    def test_sort_by_price(self):
+        """Test ascending and descending price sorts"""
+        titles = [p['title'] for p in self.search(sort='price')['properties']]
+        self.assertEqual(titles, ['Garden Cottage', 'Harbor Loft', 'Sky Penthouse'])
+        
+        titles = [p['title'] for p in self.search(sort='-price')['properties']]
+        self.assertEqual(titles, ['Sky Penthouse', 'Harbor Loft', 'Garden Cottage'])
+
+    def test_created_window(self):
+        """Test that created_after and created_before bound the results"""
+        self.assertEqual(self.search(created_after='2000-01-01')['count'], 3)
+        self.assertEqual(self.search(created_before='2000-01-01')['count'], 0)
+
+    def test_text_search(self):
+        """Test full-text search over title and description"""
+        data = self.search(q='  Views ')
+        
+        self.assertEqual(
+            sorted(p['title'] for p in data['properties']),
+            ['Harbor Loft', 'Sky Penthouse']
+        )
+
+    def test_equivalent_queries_normalize_identically(self):
+        """Test that spelling a query differently yields the same normalized form"""
+        self.assertEqual(
+            normalize_search_params({'location': ' Downtown', 'min_price': '100000', 'q': 'City  VIEWS'}),
+            normalize_search_params({'q': 'city views', 'min_price': '100000.00', 'location': 'Downtown'}),
+        )
+
+    def test_results_cached_per_normalized_query(self):
+        """Test that a repeated equivalent query is served from cache"""
+        self.search(location='Downtown', min_price='100000')
+        
+        with self.assertNumQueries(0):
+            data = self.search(min_price='100000.0', location='Downtown ')
+        self.assertEqual(data['count'], 2)
+
+    def test_cached_results_retired_on_save(self):
+        """Test that saving a property invalidates cached search results"""
+        self.search(location='Suburbs')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Property.objects.create(
+                title='New Suburban Home',
+                description='Fresh listing',
+                price=Decimal('300000.00'),
+                location='Suburbs'
+            )
+        
+        self.assertEqual(self.search(location='Suburbs')['count'], 2)
+
+    def test_invalid_parameters_rejected(self):
+        """Test that unparseable parameters return 400"""
+        for params in ({'min_price': 'cheap'}, {'created_after': 'yesterday'}, {'sort': 'title'}, {'limit': '0'}):
+            response = self.client.get(reverse('properties:property_search'), params)
+            self.assertEqual(response.status_code, 400, params)
+        with self.assertRaises(InvalidSearch):
+            normalize_search_params({'max_price': '-1'})
+
+
+class TaggedSearchInvalidationTest(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = Client()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.downtown = Property.objects.create(
+                title='Downtown Flat',
+                description='Flat',
+                price=Decimal('250000.00'),
+                location='Downtown'
+            )
+            self.uptown = Property.objects.create(
+                title='Uptown Villa',
+                description='Villa',
+                price=Decimal('850000.00'),
+                location='Uptown'
+            )
+
+    def search(self, **params):
+        return json.loads(self.client.get(reverse('properties:property_search'), params).content)
+
+    def assertCached(self, **params):
+        with self.assertNumQueries(0):
+            return self.search(**params)
+
+    def save(self, property, **changes):
+        property = Property.objects.get(pk=property.pk)
+        for field, value in changes.items():
+            setattr(property, field, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            property.save()
+
+    def test_search_tags(self):
+        """Test that results are tagged by their most selective filter"""
+        self.assertEqual(
+            search_tags({'location': 'Downtown', 'max_price': '1.00'}),
+            ['location:Downtown', 'catalogue-epoch']
+        )
+        self.assertEqual(
+            search_tags({'min_price': '200000.00', 'max_price': '350000.00'}),
+            ['price-bucket:200k-300k', 'price-bucket:300k-400k', 'catalogue-epoch']
+        )
+        self.assertEqual(search_tags({'min_price': '200000.00'}), ['catalogue', 'catalogue-epoch'])
+
+    def test_unrelated_location_edit_keeps_results(self):
+        """Test that editing an Uptown property keeps Downtown results cached"""
+        self.search(location='Downtown')
+        
+        self.save(self.uptown, price=Decimal('900000.00'))
+        
+        self.assertEqual(self.assertCached(location='Downtown')['count'], 1)
+
+    def test_same_location_edit_retires_results(self):
+        """Test that editing a Downtown property retires Downtown results"""
+        self.search(location='Downtown')
+        
+        self.save(self.downtown, title='Renamed Flat')
+        
+        data = self.search(location='Downtown')
+        self.assertEqual(data['properties'][0]['title'], 'Renamed Flat')
+
+    def test_moving_location_retires_old_and_new(self):
+        """Test that a location change retires results for both locations"""
+        self.search(location='Downtown')
+        self.search(location='Uptown')
+        
+        self.save(self.downtown, location='Uptown')
+        
+        self.assertEqual(self.search(location='Downtown')['count'], 0)
+        self.assertEqual(self.search(location='Uptown')['count'], 2)
+
+    def test_price_bucket_tags(self):
+        """Test that only edits in the queried price buckets retire results"""
+        self.search(min_price='200000', max_price='299999')
+        
+        self.save(self.uptown, title='Still Expensive')
+        self.assertCached(min_price='200000', max_price='299999')
+        
+        # Moving the villa into the bucket must show up
+        self.save(self.uptown, price=Decimal('260000.00'))
+        self.assertEqual(self.search(min_price='200000', max_price='299999')['count'], 2)
+
+    def test_unselective_results_retired_by_any_edit(self):
+        """Test that results without a selective filter are retired by any change"""
+        self.search(sort='price')
+        
+        self.save(self.uptown, title='Any Change')
+        
+        titles = [p['title'] for p in self.search(sort='price')['properties']]
+        self.assertIn('Any Change', titles)
+
+    def test_clear_property_cache_tag_option(self):
+        """Test that clear_property_cache --tag retires only that tag"""
+        self.search(location='Downtown')
+        self.search(location='Uptown')
+        
+        out = StringIO()
+        call_command('clear_property_cache', tag=['location:Downtown'], stdout=out)
+        
+        self.assertIn('location:Downtown', out.getvalue())
+        self.assertCached(location='Uptown')
+        with self.assertNumQueries(1):
+            self.search(location='Downtown')
+
+
+class PropertySearchIndexTest(TestCase):
+    """EXPLAIN-based checks that search filters are served by indexes."""
+
+    def explain(self, **params):
+        queryset = search_properties(normalize_search_params(params))
+        if connection.vendor == 'postgresql':
+            # The planner prefers sequential scans on tiny test tables
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def test_location_price_range_uses_composite_index(self):
+        plan = self.explain(location='Downtown', min_price='100000', max_price='300000')
+        self.assertIn('property_location_price_idx', plan)
+
+    def test_location_recent_uses_location_created_index(self):
+        plan = self.explain(location='Downtown', sort='recent')
+        self.assertIn('property_location_created_idx', plan)
+
+    def test_price_sort_uses_price_index(self):
+        plan = self.explain(min_price='100000', sort='price')
+        self.assertIn('property_price_idx', plan)
+
+    def test_created_window_uses_created_index(self):
+        plan = self.explain(created_after='2024-01-01')
+        self.assertIn('property_created_id_idx', plan)
+
+    @skipUnless(connection.vendor == 'postgresql', 'GIN full-text index is PostgreSQL-only')
+    def test_text_search_uses_gin_index(self):
+        plan = self.explain(q='city views')
+        self.assertIn('property_search_gin_idx', plan)
+
+
+class PopulatePropertiesBulkTest(TestCase):
+    def setUp(self):
+        clear_caches()
+
+    def write_feed(self, suffix, content):
+        feed = tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False, encoding='utf-8')
+        with feed:
+            feed.write(content)
+        self.addCleanup(os.remove, feed.name)
+        return feed.name
+
+    def populate(self, path, **options):
+        out = StringIO()
+        # bulk_create sends no post_save; the command invalidates once itself
+        with self.captureOnCommitCallbacks() as callbacks:
+            call_command('populate_properties', file=path, stdout=out, **options)
+        self.assertEqual(callbacks, [])
+        return out.getvalue()
+
+    def test_loads_csv_in_batches(self):
+        """Test that CSV rows are inserted in batches and the rate is reported"""
+        rows = ''.join(
+            f'ext-{i},Property {i},Description {i},{100000 + i}.00,Location {i % 3}\n'
+            for i in range(25)
+        )
+        path = self.write_feed('.csv', 'external_id,title,description,price,location\n' + rows)
+
+        with self.assertNumQueries(6):  # per batch: SAVEPOINT, INSERT, RELEASE
+            out = self.populate(path, batch_size=20)
+
+        self.assertEqual(Property.objects.count(), 25)
+        self.assertEqual(Property.objects.get(external_id='ext-7').price, Decimal('100007.00'))
+        self.assertIn('Imported 25 properties', out)
+        self.assertIn('rows/sec', out)
+
+    def test_ndjson_upserts_on_external_id(self):
+        """Test that rows matching an existing external_id update it in place"""
+        with self.captureOnCommitCallbacks(execute=True):
+            existing = Property.objects.create(
+                external_id='ext-1',
+                title='Old Title',
+                description='Old',
+                price=Decimal('100000.00'),
+                location='Downtown'
+            )
+        path = self.write_feed('.ndjson', '\n'.join([
+            json.dumps({'external_id': 'ext-1', 'title': 'New Title', 'price': '120000', 'location': 'Downtown'}),
+            json.dumps({'title': 'No Key', 'price': '90000', 'location': 'Uptown'}),
+            '',
+        ]))
+
+        self.populate(path)
+
+        self.assertEqual(Property.objects.count(), 2)
+        existing.refresh_from_db()
+        self.assertEqual(existing.title, 'New Title')
+        self.assertEqual(existing.price, Decimal('120000.00'))
+        self.assertTrue(Property.objects.filter(title='No Key', external_id__isnull=True).exists())
+
+    def test_repeated_external_ids_are_counted_once(self):
+        """Test that rows dropped as repeated external_ids are not reported as imported"""
+        path = self.write_feed('.csv', (
+            'external_id,title,price,location\n'
+            'ext-1,First,1,X\n'
+            'ext-1,Second,2,X\n'
+            ',No Key,3,Y\n'
+        ))
+        
+        out = self.populate(path)
+        
+        self.assertIn('Imported 2 properties', out)
+        self.assertEqual(Property.objects.get(external_id='ext-1').title, 'Second')
+
+    def test_invalidates_caches_once(self):
+        """Test that one invalidation replaces the per-row signals"""
+        payload = get_all_properties()
+        self.assertEqual(payload, [])
+        path = self.write_feed('.csv', 'title,price,location\nA,1,X\nB,2,Y\nC,3,Z\n')
+
+        with patch(
+            'properties.management.commands.populate_properties.invalidate_property_caches',
+            wraps=invalidate_property_caches
+        ) as mock_invalidate:
+            self.populate(path, batch_size=1)
+
+        mock_invalidate.assert_called_once_with()
+        self.assertEqual(len(get_all_properties()), 3)
+
+    def test_bulk_load_retires_cached_searches(self):
+        """Test that searches cached before a bulk load are recomputed"""
+        url = reverse('properties:property_search')
+        self.assertEqual(json.loads(self.client.get(url, {'location': 'Downtown'}).content)['count'], 0)
+        path = self.write_feed('.csv', 'title,price,location\nA,1,Downtown\n')
+
+        self.populate(path)
+
+        self.assertEqual(json.loads(self.client.get(url, {'location': 'Downtown'}).content)['count'], 1)
+
+    def test_bad_row_reports_line_number(self):
+        """Test that an unparseable row aborts with its line number"""
+        path = self.write_feed('.csv', 'title,price,location\nA,1,X\nB,abc,Y\n')
+
+        with self.assertRaisesMessage(CommandError, "Line 3: invalid price 'abc'"):
+            self.populate(path)
+
+
+class WarmPropertyCacheTest(TransactionTestCase):
+    # Warming runs on a thread pool, whose connections only see committed rows
+
+    def setUp(self):
+        clear_caches()
+        self.client = Client()
+        for i in range(5):
+            Property.objects.create(
+                title=f'Warm Property {i}',
+                description='Warm',
+                price=Decimal('100000.00') * (i + 1),
+                location='Downtown' if i % 2 else 'Uptown'
+            )
+
+    def test_warms_list_and_entries_after_full_clear(self):
+        """Test that warming refills all_properties and every property entry"""
+        call_command('clear_property_cache', all=True, stdout=StringIO())
+        
+        out = StringIO()
+        call_command('warm_property_cache', workers=2, stdout=out)
+        
+        ids = list(Property.objects.values_list('id', flat=True))
+        self.assertEqual(
+            len(cache.get_many([property_cache_key(pk) for pk in ids], version=PROPERTY_CACHE_VERSION)),
+            5
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(len(get_all_properties()), 5)
+        self.assertIn('bytes written', out.getvalue())
+        self.assertIn('Property entries: 5', out.getvalue())
+
+    def test_warms_popular_pages_and_searches(self):
+        """Test that recorded requests survive a full clear and are prewarmed"""
+        url = reverse('properties:property_list')
+        search_url = reverse('properties:property_search')
+        for _ in range(3):
+            self.client.get(url, {'page_size': '2'})
+            self.client.get(search_url, {'location': 'Downtown'})
+        self.client.get(search_url, {'location': 'Uptown'})
+        self.client.get(search_url, {'sort': 'bogus'})  # 400s are not counted
+        
+        self.assertEqual(get_popular_pages(10), [(None, 2)])
+        self.assertEqual(
+            [search['location'] for search in get_popular_searches(10)],
+            ['Downtown', 'Uptown']
+        )
+        
+        call_command('clear_property_cache', all=True, stdout=StringIO())
+        self.assertEqual(get_popular_pages(10), [(None, 2)])
+        
+        stats = warm_property_caches(workers=2, pages=10, searches=1)
+        self.assertEqual((stats['pages'], stats['searches']), (1, 1))
+        self.assertGreater(stats['bytes'], 0)
+        
+        with self.assertNumQueries(0):
+            self.assertEqual(json.loads(self.client.get(url, {'page_size': '2'}).content)['count'], 2)
+            self.assertEqual(json.loads(self.client.get(search_url, {'location': 'Downtown'}).content)['count'], 2)
+
+    def test_invalid_cursors_are_never_warmed(self):
+        """Test that a 304 for a bogus cursor is not counted and bad entries are skipped"""
+        url = reverse('properties:property_list')
+        etag = self.client.get(url, {'page_size': '2'})['ETag']
+        response = self.client.get(url, {'cursor': 'bogus', 'page_size': '2'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(get_popular_pages(10), [(None, 2)])
+        
+        # Counted by an earlier release, before cursors were validated
+        record_page_access('bogus', 2)
+        call_command('clear_property_cache', all=True, stdout=StringIO())
+        with self.assertLogs('properties.warming', 'WARNING'):
+            stats = warm_property_caches(workers=2, pages=10)
+        self.assertEqual(stats['pages'], 1)
+
+    def test_zero_or_negative_limits_warm_nothing(self):
+        """Test that a limit of 0 returns no popular entries and negative options are rejected"""
+        record_page_access(None, 2)
+        self.assertEqual(get_popular_pages(0), [])
+        self.assertEqual(get_popular_pages(-1), [])
+        
+        for option in ('pages', 'searches'):
+            with self.subTest(option=option), self.assertRaises(CommandError):
+                call_command('warm_property_cache', **{option: -1}, stdout=StringIO())
+
+    def test_access_counts_survive_a_failed_clear(self):
+        """Test that access counts are restored when clearing an alias fails partway"""
+        record_page_access(None, 2)
+        
+        def clear_then_fail(alias):
+            caches[alias].clear()
+            raise ConnectionError('connection lost')
+        
+        with patch('properties.management.commands.clear_property_cache.clear_cache_alias', clear_then_fail), \
+                self.assertRaises(ConnectionError):
+            call_command('clear_property_cache', all=True, stdout=StringIO())
+        
+        self.assertEqual(get_popular_pages(10), [(None, 2)])
+
+    def test_warming_skips_cached_payloads(self):
+        """Test that only payloads missing from Redis count as written"""
+        get_property_list_payload()
+        
+        stats = warm_property_caches(workers=1)
+        
+        self.assertEqual(stats['lists'], 0)
+        self.assertEqual(stats['entries'], 5)
+
+
+class PropertySignalsTest(TestCase):
+    def setUp(self):
+        # Clear cache before each test
+        clear_caches()
+
+    def test_post_save_signal_clears_cache_on_create(self):
+        """Test that post_save signal clears cache when property is created"""
+        # Populate cache first
+        properties = get_all_properties()
+        self.assertIsNotNone(get_cache_aside_value(ALL_PROPERTIES_CACHE_KEY, version=PROPERTY_CACHE_VERSION))
+        
+        # Create a new property (this should trigger the signal)
+        with self.captureOnCommitCallbacks(execute=True), self.assertLogs('properties.signals', 'INFO') as logs:
+            property = Property.objects.create(
+                title='New Property',
+                description='New Description',
+                price=Decimal('500000.00'),
+                location='New Location'
+            )
+        
+        # Cache should be cleared
+        self.assertIsNone(get_cache_aside_value(ALL_PROPERTIES_CACHE_KEY, version=PROPERTY_CACHE_VERSION))
+        
+        # Check that the change was logged with structured fields
+        self.assertEqual(logs.records[-1].getMessage(), f"Property {property.id} created: 'New Property'")
+        self.assertEqual(
+            logs.records[-1].property_change,
+            {'id': property.id, 'action': 'created', 'title': 'New Property'}
+        )
+
+    def test_post_save_signal_clears_cache_on_update(self):
+        """Test that post_save signal clears cache when property is updated"""
+        # Create a property first
+        with self.captureOnCommitCallbacks(execute=True):
+            property = Property.objects.create(
+                title='Test Property',
+                description='Test Description',
+                price=Decimal('300000.00'),
+                location='Test Location'
+            )
+        
+        # Populate cache
+        properties = get_all_properties()
+        self.assertIsNotNone(get_cache_aside_value(ALL_PROPERTIES_CACHE_KEY, version=PROPERTY_CACHE_VERSION))
+        
+        # Update the property (this should trigger the signal)
+        with self.captureOnCommitCallbacks(execute=True), self.assertLogs('properties.signals', 'INFO') as logs:
+            property.title = 'Updated Property'
+            property.save()
+        
+        # Cache should be cleared
+        self.assertIsNone(get_cache_aside_value(ALL_PROPERTIES_CACHE_KEY, version=PROPERTY_CACHE_VERSION))
+        
+        # Check that the change was logged
+        self.assertEqual(logs.records[-1].getMessage(), f"Property {property.id} updated: 'Updated Property'")
+
+    def test_post_delete_signal_clears_cache(self):
+        """Test that post_delete signal clears cache when property is deleted"""
+        # Create a property first
+        with self.captureOnCommitCallbacks(execute=True):
+            property = Property.objects.create(
+                title='Test Property',
+                description='Test Description',
+                price=Decimal('300000.00'),
+                location='Test Location'
+            )
+        
+        # Populate cache
+        properties = get_all_properties()
+        self.assertIsNotNone(get_cache_aside_value(ALL_PROPERTIES_CACHE_KEY, version=PROPERTY_CACHE_VERSION))
+        
+        # Delete the property (this should trigger the signal)
+        property_id = property.id
+        with self.captureOnCommitCallbacks(execute=True), self.assertLogs('properties.signals', 'INFO') as logs:
+            property.delete()
+        
+        # Cache should be cleared
+        self.assertIsNone(get_cache_aside_value(ALL_PROPERTIES_CACHE_KEY, version=PROPERTY_CACHE_VERSION))
+        
+        # Check that the change was logged
+        self.assertEqual(logs.records[-1].getMessage(), f"Property {property_id} deleted: 'Test Property'")
+
+
+class TransactionAwareInvalidationTest(TestCase):
+    def setUp(self):
+        clear_caches()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.properties = [
+                Property.objects.create(
+                    title=f'Batched Property {i}',
+                    description='Batched',
+                    price=Decimal('150000.00'),
+                    location='Harbor' if i % 2 else 'Hillside'
+                )
+                for i in range(4)
+            ]
+        get_property_list_payload()
+
+    def cached_entry(self, property):
+        entry = cache.get(property_cache_key(property.id), version=PROPERTY_CACHE_VERSION)
+        return json.loads(entry) if entry else None
+
+    def test_transaction_flushes_once_on_commit(self):
+        """Test that many writes in one transaction cost one query and one pipeline on commit"""
+        metrics = start_request_metrics()
+        try:
+            with self.captureOnCommitCallbacks() as callbacks:
+                for property in self.properties:
+                    property.title = f'{property.title} (edited)'
+                    property.save()
+                Property.objects.create(
+                    title='Batched New', description='New', price=Decimal('1.00'), location='Harbor'
+                )
+            writes_round_trips = metrics.redis_round_trips
+            metrics.db_queries = 0
+            for callback in callbacks:
+                callback()
+        finally:
+            stop_request_metrics()
+        
+        self.assertEqual({callback.__self__ for callback in callbacks}, {callbacks[0].__self__})
+        self.assertEqual(writes_round_trips, 0)
+        self.assertEqual(metrics.redis_round_trips, 1)
+        self.assertEqual(metrics.db_queries, 1)
+        titles = [p['title'] for p in get_all_properties()]
+        self.assertEqual(len(titles), 5)
+        self.assertTrue(all(title.endswith('(edited)') for title in titles[:4]))
+
+    def test_cache_untouched_until_commit(self):
+        """Test that readers never see, or re-cache, uncommitted changes through the cache"""
+        property = self.properties[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            property.title = 'Committed Title'
+            property.save()
+            self.assertEqual(self.cached_entry(property)['title'], 'Batched Property 0')
+            self.assertIsNotNone(get_cache_aside_value(ALL_PROPERTIES_CACHE_KEY, version=PROPERTY_CACHE_VERSION))
+        
+        self.assertEqual(self.cached_entry(property)['title'], 'Committed Title')
+        self.assertIsNone(get_cache_aside_value(ALL_PROPERTIES_CACHE_KEY, version=PROPERTY_CACHE_VERSION))
+
+    def test_rollback_leaves_cache_alone(self):
+        """Test that rolled-back writes never invalidate anything"""
+        generation = get_property_list_generation()
+        
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.properties[1].title = 'Rolled Back'
+                self.properties[1].save()
+                self.properties[2].delete()
+                raise RuntimeError('abort')
+        
+        self.assertEqual(callbacks, [])
+        self.assertEqual(get_property_list_generation(), generation)
+        self.assertIsNotNone(get_cache_aside_value(ALL_PROPERTIES_CACHE_KEY, version=PROPERTY_CACHE_VERSION))
+        self.assertEqual(self.cached_entry(self.properties[1])['title'], 'Batched Property 1')
+
+    def test_changes_after_rollback_get_a_new_batch(self):
+        """Test that a batch whose transaction rolled back is not reused"""
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            with self.captureOnCommitCallbacks():
+                self.properties[0].save()
+            raise RuntimeError('abort')
+        
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.properties[3].title = 'After Rollback'
+            self.properties[3].save()
+        
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.cached_entry(self.properties[3])['title'], 'After Rollback')
+
+    def test_delete_evicts_on_commit(self):
+        """Test that deleted ids are evicted from the entries and the index"""
+        deleted = self.properties[0]
+        deleted_id = deleted.id
+        with self.captureOnCommitCallbacks(execute=True):
+            deleted.delete()
+        
+        self.assertIsNone(cache.get(property_cache_key(deleted_id), version=PROPERTY_CACHE_VERSION))
+        self.assertNotIn(deleted_id, get_property_ids())
+
+    def test_queryset_update_invalidates(self):
+        """Test that QuerySet.update() refreshes entries and retires old search tags"""
+        search_url = reverse('properties:property_search')
+        self.assertEqual(json.loads(self.client.get(search_url, {'location': 'Harbor'}).content)['count'], 2)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            updated = Property.objects.filter(location='Harbor').update(location='Hillside', price=Decimal('9.00'))
+        
+        self.assertEqual(updated, 2)
+        self.assertEqual(json.loads(self.client.get(search_url, {'location': 'Harbor'}).content)['count'], 0)
+        self.assertEqual(self.cached_entry(self.properties[1])['price'], '9.00')
+        self.assertEqual({p['location'] for p in get_all_properties()}, {'Hillside'})
+
+    def test_update_of_uncached_fields_invalidates_nothing(self):
+        """Test that updates outside the cached payload skip invalidation"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            Property.objects.update(view_count=3)
+        
+        self.assertEqual(callbacks, [])
+
+    def test_bulk_update_invalidates(self):
+        """Test that bulk_update() refreshes the entries of the updated objects"""
+        properties = list(Property.objects.order_by('id'))
+        for property in properties:
+            property.title = f'Bulk {property.id}'
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Property.objects.bulk_update(properties, ['title'])
+        
+        self.assertEqual([p['title'] for p in get_all_properties()], [f'Bulk {p.id}' for p in properties])
+
+    def test_large_update_invalidates_everything(self):
+        """Test that an update of more rows than are tracked falls back to a full invalidation"""
+        with patch.object(invalidation, 'MAX_TRACKED_PROPERTY_IDS', 2), \
+                patch.object(invalidation, 'invalidate_property_caches') as mock_invalidate, \
+                self.captureOnCommitCallbacks(execute=True):
+            Property.objects.update(description='Everything')
+        
+        mock_invalidate.assert_called_once_with()
+
+    def test_cache_failure_does_not_fail_commit(self):
+        """Test that a Redis failure after commit is logged, not raised"""
+        with patch.object(invalidation, 'apply_property_changes', side_effect=ConnectionError('down')), \
+                self.assertLogs('properties.invalidation', 'ERROR') as logs, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.properties[0].save()
+        
+        self.assertIn('down', logs.output[0])
+
+
+class RedisAccessLayerTest(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = Client()
+        with self.captureOnCommitCallbacks(execute=True):
+            Property.objects.create(
+                title='Counted Property',
+                description='Counted',
+                price=Decimal('250000.00'),
+                location='Downtown'
+            )
+
+    def test_pipeline_counts_as_one_round_trip(self):
+        """Test that pipelines and MGETs count once, single commands once each"""
+        redis_conn = get_redis_connection("default")
+        metrics = start_request_metrics()
+        self.addCleanup(stop_request_metrics)
+        
+        pipeline = redis_conn.pipeline()
+        for i in range(3):
+            pipeline.set(f'round-trip-test:{i}', i)
+        pipeline.execute()
+        self.assertEqual(metrics.redis_round_trips, 1)
+        
+        cache.set_many({'a': 1, 'b': 2, 'c': 3})
+        cache.get_many(['a', 'b', 'c', 'd'])
+        self.assertEqual(metrics.redis_round_trips, 3)
+        self.assertEqual((metrics.cache_gets, metrics.cache_hits, metrics.cache_misses), (4, 3, 1))
+        
+        cache.get('a')
+        cache.get('missing')
+        redis_conn.zcard('round-trip-test')
+        self.assertEqual(metrics.redis_round_trips, 6)
+        self.assertEqual((metrics.cache_gets, metrics.cache_hits, metrics.cache_misses), (6, 4, 2))
+
+    def test_round_trips_reported_per_request(self):
+        """Test that each response reports its own Redis round trips"""
+        url = reverse('properties:property_list')
+        cold = int(self.client.get(url)['X-Redis-Round-Trips'])
+        warm = int(self.client.get(url)['X-Redis-Round-Trips'])
+        
+        self.assertGreater(cold, 0)
+        self.assertLess(warm, cold)
+        
+        metrics = json.loads(self.client.get(reverse('properties:cache_metrics')).content)
+        self.assertGreaterEqual(metrics['redis_round_trips'], cold + warm)
+
+    @skipUnless(msgpack, 'msgpack is not installed')
+    def test_msgpack_serializer_falls_back_to_pickle(self):
+        """Test that msgpack packs payloads natively and pickles other types"""
+        serializer = MsgpackSerializer({})
+        envelope = (b'{"properties":[]}', 1.5, 0.25)
+        
+        self.assertEqual(serializer.loads(serializer.dumps(envelope)), list(envelope))
+        now = timezone.now()
+        self.assertEqual(serializer.loads(serializer.dumps({'at': now})), {'at': now})
+
+    @skipUnless(msgpack, 'msgpack is not installed')
+    def test_endpoints_work_with_msgpack_and_zlib(self):
+        """Test the list and search endpoints under the msgpack + zlib configuration"""
+        default = settings.CACHES['default']
+        caches = {**settings.CACHES, 'default': {**default, 'OPTIONS': {
+            **default['OPTIONS'],
+            'SERIALIZER': settings.REDIS_SERIALIZERS['msgpack'],
+            'COMPRESSOR': settings.REDIS_COMPRESSORS['zlib'],
+        }}}
+        with override_settings(CACHES=caches):
+            clear_caches()
+            for _ in range(2):
+                local_cache.clear()
+                response = self.client.get(reverse('properties:property_list'))
+                self.assertEqual(json.loads(response.content)['count'], 1)
+                response = self.client.get(reverse('properties:property_search'), {'location': 'Downtown'})
+                self.assertEqual(json.loads(response.content)['count'], 1)
+            self.assertEqual(get_all_properties()[0]['title'], 'Counted Property')
+            clear_caches()
+
+
+class RequestMetricsMiddlewareTest(TestCase):
+    def setUp(self):
+        flush_metrics()
+        clear_caches()
+        self.client = Client()
+        with self.captureOnCommitCallbacks(execute=True):
+            Property.objects.create(
+                title='Timed Property',
+                description='Timed',
+                price=Decimal('250000.00'),
+                location='Downtown'
+            )
+
+    def server_timing(self, response):
+        return {
+            part.split(';', 1)[0]: part.split(';', 1)[1]
+            for part in response['Server-Timing'].split(', ')
+        }
+
+    def test_server_timing_reports_cache_and_db_work(self):
+        """Test that a cold request shows queries and a warm one only cache hits"""
+        url = reverse('properties:property_list')
+        cold = self.server_timing(self.client.get(url))
+        warm = self.server_timing(self.client.get(url))
+        
+        self.assertNotIn('"0 queries"', cold['db'])
+        self.assertIn('/ 0 misses"', warm['cache'])
+        self.assertIn('"0 queries"', warm['db'])
+        self.assertEqual(set(cold), {'cache', 'redis', 'db', 'serialize', 'total'})
+
+    def test_logs_structured_request_metrics(self):
+        """Test that each measured request is logged with its counters"""
+        with self.assertLogs('properties.middleware', 'INFO') as logs:
+            self.client.get(reverse('properties:property_list'))
+        
+        fields = logs.records[0].request_metrics
+        self.assertEqual(fields['view'], 'properties:property_list')
+        self.assertEqual(fields['status'], 200)
+        self.assertGreater(fields['db_queries'], 0)
+        self.assertGreater(fields['cache_misses'], 0)
+
+    def test_per_view_histograms(self):
+        """Test that requests roll up into per-view histograms shown by the metrics view"""
+        for _ in range(3):
+            self.client.get(reverse('properties:property_list'))
+        self.client.get(reverse('properties:property_search'), {'location': 'Downtown'})
+        
+        views = get_request_metrics()
+        self.assertEqual(views['properties:property_list']['requests'], 3)
+        self.assertEqual(sum(views['properties:property_list']['histogram_ms'].values()), 3)
+        self.assertEqual(views['properties:property_search']['requests'], 1)
+        self.assertIsNotNone(views['properties:property_list']['p99_ms'])
+        
+        metrics = json.loads(self.client.get(reverse('properties:cache_metrics')).content)
+        self.assertEqual(metrics['views']['properties:property_list']['requests'], 3)
+
+    def test_sampling_off_skips_measurement(self):
+        """Test that unsampled requests get no headers and no aggregates"""
+        with override_settings(PROPERTY_REQUEST_METRICS={'SAMPLE_RATE': 0}):
+            response = Client().get(reverse('properties:property_list'))
+        
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(get_request_metrics(), {})
+
+
+class PropertyDetailCacheTest(TestCase):
+    def setUp(self):
+        clear_caches()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property1 = Property.objects.create(
+                title='Detail Property 1',
+                description='Detail Description 1',
+                price=Decimal('300000.00'),
+                location='Test Location'
+            )
+            self.property2 = Property.objects.create(
+                title='Detail Property 2',
+                description='Detail Description 2',
+                price=Decimal('400000.00'),
+                location='Test Location'
+            )
+        self.missing_id = self.property2.id + 100
+
+    def detail(self, pk):
+        return self.client.get(reverse('properties:property_detail', args=[pk]))
+
+    def batch(self, ids):
+        return self.client.get(reverse('properties:property_batch'), {'ids': ids})
+
+    def test_detail_reads_through_entry(self):
+        """Test that the detail view only reads the database on a miss"""
+        cache.delete(property_cache_key(self.property1.id), version=PROPERTY_CACHE_VERSION)
+        
+        with self.assertNumQueries(1):
+            self.assertEqual(self.detail(self.property1.id).status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.detail(self.property1.id)
+        self.assertEqual(json.loads(response.content)['title'], 'Detail Property 1')
+
+    def test_not_found_is_cached(self):
+        """Test that a 404 is cached so repeated lookups skip the database"""
+        with self.assertNumQueries(1):
+            self.assertEqual(self.detail(self.missing_id).status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.detail(self.missing_id).status_code, 404)
+        self.assertEqual(
+            cache.get(property_cache_key(self.missing_id), version=PROPERTY_CACHE_VERSION),
+            PROPERTY_NOT_FOUND
+        )
+        self.assertLessEqual(
+            cache.ttl(property_cache_key(self.missing_id), version=PROPERTY_CACHE_VERSION), 60
+        )
+
+    def test_create_replaces_cached_not_found(self):
+        """Test that creating a property with a cached 404 id serves it at once"""
+        self.detail(self.missing_id)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Property.objects.create(
+                id=self.missing_id,
+                title='Late Property',
+                description='Created after a 404',
+                price=Decimal('1.00'),
+                location='Test Location'
+            )
+        
+        response = self.detail(self.missing_id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['title'], 'Late Property')
+
+    def test_delete_evicts_only_that_entry(self):
+        """Test that deleting a property 404s its detail and keeps others cached"""
+        deleted_id = self.property1.id
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property1.delete()
+        
+        self.assertEqual(self.detail(deleted_id).status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.detail(self.property2.id).status_code, 200)
+
+    def test_batch_uses_one_query_for_misses(self):
+        """Test that a batch is one MGET plus one id__in query for the misses"""
+        cache.delete(property_cache_key(self.property1.id), version=PROPERTY_CACHE_VERSION)
+        ids = f'{self.property2.id},{self.missing_id},{self.property1.id},{self.property2.id}'
+        
+        with self.assertNumQueries(1):
+            response = self.batch(ids)
+        
+        self.assertEqual(response.status_code, 200)
+        payload = json.loads(response.content)
+        self.assertEqual([p['id'] for p in payload['properties']], [self.property2.id, self.property1.id])
+        self.assertEqual(payload['count'], 2)
+        self.assertEqual(payload['missing'], [self.missing_id])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.batch(ids).content, response.content)
+
+    def test_batch_not_found_leaves_list_intact(self):
+        """Test that cached 404s from a batch never show up in the listing"""
+        self.batch(f'{self.missing_id},{self.property1.id}')
+        
+        self.assertEqual([p['id'] for p in get_all_properties()], [self.property1.id, self.property2.id])
+
+    def test_batch_rejects_invalid_ids(self):
+        """Test that malformed, empty and oversized id lists are rejected"""
+        for ids in ['', 'abc', '1,,2', '0', '-1', ','.join(str(i) for i in range(1, MAX_BATCH_IDS + 2))]:
+            with self.subTest(ids=ids):
+                self.assertEqual(self.batch(ids).status_code, 400)
+
+    async def test_async_batch(self):
+        """Test that the async batch view matches the sync one"""
+        ids = f'{self.property1.id},{self.missing_id}'
+        await sync_to_async(clear_caches)()
+        
+        response = await property_batch_async(AsyncRequestFactory().get('/properties/batch/', {'ids': ids}))
+        
+        self.assertEqual(response.content, (await sync_to_async(self.batch)(ids)).content)
+        self.assertEqual(json.loads(response.content)['missing'], [self.missing_id])
+        self.assertEqual(
+            await aget(property_cache_key(self.missing_id), version=PROPERTY_CACHE_VERSION),
+            PROPERTY_NOT_FOUND
+        )
+
+
+class PropertyPopularityTest(TestCase):
+    def setUp(self):
+        clear_caches()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.properties = [
+                Property.objects.create(
+                    title=f'Popular Property {i}',
+                    description='Viewed often',
+                    price=Decimal('250000.00'),
+                    location='Midtown'
+                )
+                for i in range(3)
+            ]
+
+    def view(self, property, times=1):
+        for _ in range(times):
+            self.client.get(reverse('properties:property_detail', args=[property.id]))
+
+    def popular(self, **params):
+        return self.client.get(reverse('properties:property_popular'), params)
+
+    def test_views_counted_without_database_writes(self):
+        """Test that detail views only increment Redis counters"""
+        self.view(self.properties[0])
+        
+        with self.assertNumQueries(0):
+            self.view(self.properties[0], times=2)
+        
+        self.assertEqual(get_popular_property_views(10), [(self.properties[0].id, 3)])
+        self.properties[0].refresh_from_db()
+        self.assertEqual(self.properties[0].view_count, 0)
+
+    def test_popular_ranked_from_sorted_set(self):
+        """Test that /properties/popular/ ranks by views and adds view_count"""
+        self.view(self.properties[1], times=3)
+        self.view(self.properties[2], times=1)
+        self.view(self.properties[0], times=2)
+        # The first read merges in stored view counts; later ones are Redis only
+        self.popular()
+        
+        with self.assertNumQueries(0):
+            response = self.popular(limit=2)
+        
+        payload = json.loads(response.content)
+        self.assertEqual(
+            [(p['id'], p['view_count']) for p in payload['properties']],
+            [(self.properties[1].id, 3), (self.properties[0].id, 2)]
+        )
+        self.assertEqual(payload['count'], 2)
+        self.assertEqual(payload['properties'][0]['title'], 'Popular Property 1')
+
+    def test_popular_rejects_invalid_limit(self):
+        """Test that limits outside 1..100 are rejected"""
+        for limit in ['0', '101', 'ten', '-1', '', '\u00b2']:
+            with self.subTest(limit=limit):
+                self.assertEqual(self.popular(limit=limit).status_code, 400)
+
+    def test_flush_writes_counts_without_signals(self):
+        """Test that a flush updates view_count in one batch and invalidates nothing"""
+        self.view(self.properties[0], times=2)
+        self.view(self.properties[2], times=5)
+        generation = get_property_list_generation()
+        
+        with self.captureOnCommitCallbacks() as callbacks, self.assertNumQueries(6):
+            # The flush id lookup, SAVEPOINT, one UPDATE for all properties,
+            # replacing the recorded flush id, RELEASE SAVEPOINT
+            self.assertEqual(flush_property_views(), 7)
+        
+        self.assertEqual(callbacks, [])
+        self.assertEqual(get_property_list_generation(), generation)
+        self.assertEqual(
+            list(Property.objects.order_by('id').values_list('view_count', flat=True)),
+            [2, 0, 5]
+        )
+        self.assertEqual(flush_property_views(), 0)
+        
+        # Later views add to the flushed counts
+        self.view(self.properties[0])
+        flush_property_views()
+        self.properties[0].refresh_from_db()
+        self.assertEqual(self.properties[0].view_count, 3)
+
+    def test_flush_retries_unfinished_snapshot(self):
+        """Test that views left by a flush that died are written by the next one"""
+        redis_conn = get_redis_connection("default")
+        redis_conn.hset(
+            cache.make_key(PROPERTY_VIEWS_FLUSHING_KEY, version=PROPERTY_CACHE_VERSION),
+            self.properties[1].id, 4
+        )
+        self.view(self.properties[1])
+        
+        self.assertEqual(flush_property_views(), 4)
+        self.assertEqual(flush_property_views(), 1)
+        self.properties[1].refresh_from_db()
+        self.assertEqual(self.properties[1].view_count, 5)
+
+    def test_flush_committed_before_dying_is_not_applied_twice(self):
+        """Test that a snapshot whose flush id was committed is deleted, not written again"""
+        redis_conn = get_redis_connection("default")
+        redis_conn.hset(
+            cache.make_key(PROPERTY_VIEWS_FLUSHING_KEY, version=PROPERTY_CACHE_VERSION),
+            self.properties[1].id, 4
+        )
+        redis_conn.set(cache.make_key(PROPERTY_VIEWS_FLUSH_ID_KEY, version=PROPERTY_CACHE_VERSION), 'applied')
+        PropertyViewFlush.objects.create(flush_id='applied')
+        self.view(self.properties[1])
+        
+        self.assertEqual(flush_property_views(), 0)
+        self.assertEqual(flush_property_views(), 1)
+        self.properties[1].refresh_from_db()
+        self.assertEqual(self.properties[1].view_count, 1)
+        self.assertEqual(PropertyViewFlush.objects.count(), 1)
+
+    def test_flush_skipped_while_locked(self):
+        """Test that only one flush runs at a time"""
+        self.view(self.properties[0])
+        cache.add(PROPERTY_VIEWS_FLUSH_LOCK_KEY, 'other', 60)
+        
+        self.assertIsNone(flush_property_views())
+        out = StringIO()
+        call_command('flush_property_views', stdout=out)
+        self.assertIn('skipped', out.getvalue())
+
+    def test_popularity_rebuilt_after_cache_loss(self):
+        """Test that a lost sorted set is rebuilt from view_count plus pending views"""
+        self.view(self.properties[0], times=2)
+        flush_property_views()
+        self.view(self.properties[2], times=3)
+        redis_conn = get_redis_connection("default")
+        redis_conn.delete(cache.make_key('property_popularity', version=PROPERTY_CACHE_VERSION))
+        
+        self.assertEqual(
+            get_popular_property_views(10),
+            [(self.properties[2].id, 3), (self.properties[0].id, 2)]
+        )
+        with self.assertNumQueries(0):
+            get_popular_property_views(10)
+
+    def test_delete_forgets_views(self):
+        """Test that a deleted property drops out of the ranking"""
+        self.view(self.properties[0], times=2)
+        self.view(self.properties[1])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.properties[0].delete()
+        
+        self.assertEqual(get_popular_property_views(10), [(self.properties[1].id, 1)])
+        self.assertEqual(flush_property_views(), 1)
+
+    def test_flush_command(self):
+        """Test the flush_property_views management command"""
+        self.view(self.properties[0], times=2)
+        out = StringIO()
+        
+        call_command('flush_property_views', stdout=out)
+        
+        self.assertIn('Flushed 2 property views', out.getvalue())
+
+
+class BenchmarkHarnessTest(TestCase):
+    def setUp(self):
+        clear_caches()
+
+    def test_generator_is_deterministic(self):
+        """Test that a seed always gives the same rows, and smaller datasets are prefixes"""
+        rows = list(generate_property_rows(50, seed=7))
+        
+        self.assertEqual(rows, list(generate_property_rows(50, seed=7)))
+        self.assertEqual(rows[:20], list(generate_property_rows(20, seed=7)))
+        self.assertEqual(rows[30:], list(generate_property_rows(20, seed=7, start=30)))
+        self.assertNotEqual(rows, list(generate_property_rows(50, seed=8)))
+        self.assertEqual(len({row['external_id'] for row in rows}), 50)
+
+    def test_generated_dataset_loads(self):
+        """Test that generate_properties output is accepted by populate_properties"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'dataset.csv')
+            call_command('generate_properties', rows=25, output=path, format='csv', stdout=StringIO())
+            call_command('populate_properties', file=path, stdout=StringIO())
+            call_command('populate_properties', file=path, stdout=StringIO())
+        
+        self.assertEqual(Property.objects.count(), 25)
+        first = next(generate_property_rows(1))
+        stored = Property.objects.get(external_id=first['external_id'])
+        self.assertEqual((stored.title, str(stored.price)), (first['title'], first['price']))
+
+    def test_benchmark_command_reports_scenarios(self):
+        """Test a small run against fakeredis, with writes rolled back"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.json')
+            call_command(
+                'benchmark_properties', redis='fake', rows=40, requests=30, warmup=5,
+                scenario=['read-mix', 'write-heavy', 'metrics'], output=path, stdout=StringIO(),
+            )
+            with open(path) as f:
+                results = json.load(f)
+        
+        self.assertEqual(results['meta']['properties'], 40)
+        self.assertEqual(list(results['scenarios']), ['read-mix', 'write-heavy', 'metrics'])
+        for result in results['scenarios'].values():
+            self.assertEqual(result['requests'], 30)
+            self.assertEqual(result['errors'], 0)
+            self.assertEqual(sum(result['operations'].values()), 30)
+            self.assertGreater(result['rps'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        self.assertGreater(results['scenarios']['write-heavy']['db_queries_per_request'], 0)
+        self.assertIsNotNone(results['scenarios']['read-mix']['cache_hit_ratio'])
+        self.assertEqual(Property.objects.count(), 40)
+
+    def test_benchmark_writes_invalidate_caches(self):
+        """Test that writes inside the benchmark's rolled-back transaction still invalidate"""
+        with self.captureOnCommitCallbacks(execute=True):
+            for row in generate_property_rows(20):
+                Property.objects.create(**row)
+        runner = ScenarioRunner('write-heavy')
+        
+        with patch('properties.invalidation.apply_property_changes', wraps=apply_property_changes) as apply:
+            with transaction.atomic():
+                result = runner.run(40)
+                listed = len(json.loads(get_property_list_payload())['properties'])
+                self.assertEqual(listed, Property.objects.count())
+                transaction.set_rollback(True)
+        
+        writes = result['operations']['update'] + result['operations']['create']
+        self.assertGreater(result['operations']['create'], 0)
+        self.assertEqual(apply.call_count, writes)
+        self.assertEqual(result['invalidations'], writes)
+        self.assertLessEqual(result['invalidation_p50_ms'], result['invalidation_max_ms'])
+
+    def test_compare_flags_regressions(self):
+        """Test that comparisons flag rps drops and p99 rises beyond the threshold"""
+        def results(**scenarios):
+            return {'scenarios': {
+                name: {'rps': rps, 'p99_ms': p99, 'db_queries_per_request': 0.5}
+                for name, (rps, p99) in scenarios.items()
+            }}
+        
+        rows = compare_results(
+            results(list=(1000, 10.0), detail=(2000, 5.0), search=(500, 20.0)),
+            results(list=(950, 10.5), detail=(1500, 5.0), search=(500, 30.0), metrics=(100, 1.0)),
+            threshold=10,
+        )
+        
+        self.assertEqual(
+            [(row['scenario'], row['regression']) for row in rows],
+            [('list', False), ('detail', True), ('search', True)]
+        )
+        self.assertEqual(rows[1]['rps_change'], -25.0)
+
+
+class AsyncPropertyViewsTest(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.factory = AsyncRequestFactory()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.properties = [
+                Property.objects.create(
+                    title=f'Async Property {i}',
+                    description='Served on the event loop',
+                    price=Decimal('300000.00'),
+                    location='Uptown'
+                )
+                for i in range(3)
+            ]
+
+    async def test_list_matches_sync_view(self):
+        """Test that the async list serves the sync body, validators and 304s"""
+        response = await property_list_async(self.factory.get('/properties/'))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, await sync_to_async(get_property_list_payload)())
+        self.assertEqual(response['ETag'], f'"{await sync_to_async(get_catalogue_etag)()}"')
+        self.assertIn('max-age=900', response['Cache-Control'])
+        
+        response = await property_list_async(
+            self.factory.get('/properties/', headers={'if-none-match': response['ETag']})
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_list_rebuild_uses_async_orm(self):
+        """Test that a cold async list rebuilds the index and per-property entries"""
+        await sync_to_async(clear_caches)()
+        
+        response = await property_list_async(self.factory.get('/properties/'))
+        
+        payload = json.loads(response.content)
+        self.assertEqual([item['id'] for item in payload['properties']], [p.id for p in self.properties])
+        for property in self.properties:
+            self.assertIsNotNone(await aget(property_cache_key(property.id), version=PROPERTY_CACHE_VERSION))
+        self.assertEqual(await sync_to_async(get_property_ids)(), [p.id for p in self.properties])
+
+    async def test_list_pagination(self):
+        """Test cursor pagination and cursor errors through the async list"""
+        response = await property_list_async(self.factory.get('/properties/', {'page_size': 2}))
+        self.assertEqual(json.loads(response.content)['count'], 2)
+        
+        response = await property_list_async(self.factory.get('/properties/', {'cursor': 'bogus'}))
+        self.assertEqual(response.status_code, 400)
+
+    async def test_detail(self):
+        """Test that the async detail reads through the property:<id> entry"""
+        property = self.properties[0]
+        await sync_to_async(clear_caches)()
+        
+        response = await property_detail_async(self.factory.get(f'/properties/{property.id}/'), property.id)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['title'], 'Async Property 0')
+        self.assertIsNotNone(await aget(property_cache_key(property.id), version=PROPERTY_CACHE_VERSION))
+        
+        response = await property_detail_async(self.factory.get('/properties/999999/'), 999999)
+        self.assertEqual(response.status_code, 404)
+
+    def test_sync_detail(self):
+        """Test the detail view served under WSGI"""
+        property = self.properties[1]
+        
+        response = self.client.get(reverse('properties:property_detail', args=[property.id]))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['id'], property.id)
+        self.assertEqual(self.client.get(reverse('properties:property_detail', args=[999999])).status_code, 404)
+
+    async def test_concurrent_misses_compute_once(self):
+        """Test that acache_aside shares one recompute, and envelopes with cache_aside"""
+        calls = []
+        
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return b'computed'
+        
+        results = await asyncio.gather(*(acache_aside('async_test_key', compute, 60) for _ in range(5)))
+        
+        self.assertEqual(results, [b'computed'] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(await sync_to_async(get_cache_aside_value)('async_test_key'), b'computed')
+
+    async def test_metrics(self):
+        """Test that the async metrics view reads INFO with the async client"""
+        info = AsyncMock(return_value={'keyspace_hits': 3, 'keyspace_misses': 1})
+        with patch.object(CountingAsyncRedis, 'info', info):
+            response = await cache_metrics_async(self.factory.get('/properties/metrics/'))
+        
+        data = json.loads(response.content)
+        self.assertEqual(data['cache_metrics']['hit_ratio'], 0.75)
+        self.assertIn('views', data)
+
+    async def test_middleware_measures_concurrent_async_requests(self):
+        """Test that concurrent requests on one event loop are measured separately"""
+        async def view(request):
+            for _ in range(int(request.GET['gets'])):
+                await aget('missing_key')
+            return HttpResponse()
+        
+        middleware = RequestMetricsMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        responses = await asyncio.gather(
+            middleware(self.factory.get('/', {'gets': 3})),
+            middleware(self.factory.get('/', {'gets': 1})),
+        )
+        
+        self.assertEqual([response['X-Redis-Round-Trips'] for response in responses], ['3', '1'])
+
+
+class PrometheusMetricsTest(TestCase):
+    def setUp(self):
+        flush_metrics()
+        clear_caches()
+        self.client = Client()
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(3):
+                Property.objects.create(
+                    title=f'Scraped Property {i}',
+                    description='Scraped',
+                    price=Decimal('250000.00'),
+                    location='Downtown'
+                )
+
+    def scrape(self):
+        response = self.client.get(reverse('prometheus_metrics'))
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        samples = {}
+        for line in response.content.decode('utf-8').splitlines():
+            if line and not line.startswith('#'):
+                series, value = line.rsplit(' ', 1)
+                samples[series] = float(value)
+        return samples
+
+    def test_cache_counters_and_latency_histograms(self):
+        """Test hit/miss counters per key family and cumulative latency histograms"""
+        url = reverse('properties:property_list')
+        self.client.get(url)
+        self.client.get(url)
+        
+        samples = self.scrape()
+        
+        self.assertGreaterEqual(samples['properties_cache_requests_total{family="all_properties",tier="redis",result="miss"}'], 1)
+        self.assertGreaterEqual(samples['properties_cache_requests_total{family="cache_page",tier="redis",result="hit"}'], 1)
+        self.assertEqual(samples['properties_request_duration_seconds_count{view="properties:property_list"}'], 2)
+        
+        buckets = [
+            value for series, value in samples.items()
+            if series.startswith('properties_redis_call_seconds_bucket{command="GET",')
+        ]
+        self.assertEqual(buckets, sorted(buckets))
+        self.assertEqual(buckets[-1], samples['properties_redis_call_seconds_count{command="GET"}'])
+        self.assertGreater(samples['properties_db_query_seconds_count{alias="default"}'], 0)
+
+    def test_counters_sum_across_workers(self):
+        """Test that counters flushed by other processes are added to this one's"""
+        field = 'properties_cache_requests_total{family="property",tier="redis",result="hit"}'
+        get_redis_connection("default").hincrby(cache.make_key(METRICS_COUNTERS_KEY), field, 40)
+        keys = [property_cache_key(pk) for pk in Property.objects.values_list('id', flat=True)]
+        cache.set_many({key: b'{}' for key in keys})
+        cache.get_many(keys)
+        
+        self.assertEqual(self.scrape()[field], 43)
+
+    def test_redis_info_and_sampled_key_memory(self):
+        """Test INFO memory/eviction metrics and sampled per-key memory usage"""
+        get_all_properties()
+        info = {'used_memory': 1048576, 'evicted_keys': 3, 'expired_keys': 7}
+        
+        def memory_usage(pipeline, key, samples=None):
+            # fakeredis has no MEMORY USAGE; approximate it by length
+            if key.endswith(PROPERTY_INDEX_CACHE_KEY):
+                return pipeline.zcard(key)
+            return pipeline.strlen(key)
+        
+        with patch.object(CountingRedis, 'info', return_value=info), \
+                patch('redis.client.Pipeline.memory_usage', memory_usage):
+            samples = self.scrape()
+        
+        self.assertEqual(samples['properties_redis_up'], 1)
+        self.assertEqual(samples['properties_redis_used_memory_bytes'], 1048576)
+        self.assertEqual(samples['properties_redis_evicted_keys_total'], 3)
+        self.assertEqual(samples['properties_redis_expired_keys_total'], 7)
+        self.assertGreater(samples['properties_cache_key_memory_bytes{key="all_properties"}'], 0)
+        average = samples['properties_cache_entry_memory_bytes{family="property"}']
+        self.assertGreater(average, 0)
+        self.assertEqual(samples['properties_cache_entries_estimated_memory_bytes{family="property"}'], round(average * 3))
+
+    def test_redis_info_failure_reports_down(self):
+        """Test that a failing INFO is reported instead of failing the scrape"""
+        with patch.object(CountingRedis, 'info', side_effect=ConnectionError('down')):
+            samples = self.scrape()
+        
+        self.assertEqual(samples['properties_redis_up'], 0)
+
+
+@override_settings(PROPERTY_CHANGES={'RETENTION_DAYS': 30, 'SETTLE_SECONDS': 0})
+class PropertyChangesFeedTest(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = Client()
+        self.url = reverse('properties:property_changes')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.properties = [
+                Property.objects.create(
+                    title=f'Synced Property {i}',
+                    description='Synced',
+                    price=Decimal('100000.00'),
+                    location='Downtown',
+                    external_id=f'sync-{i}'
+                )
+                for i in range(3)
+            ]
+
+    def get_changes(self, since=None, **params):
+        if since is not None:
+            params['since'] = since
+        return self.client.get(self.url, params)
+
+    def start_cursor(self):
+        return json.loads(self.get_changes().content)['next_cursor']
+
+    def test_returns_updates_and_tombstones_since_cursor(self):
+        """Test that only changes after the cursor are returned, deletes as tombstones"""
+        cursor = self.start_cursor()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.properties[0].title = 'Renamed'
+            self.properties[0].save()
+            deleted_id = self.properties[1].id
+            self.properties[1].delete()
+            created = Property.objects.create(
+                title='New', description='New', price=Decimal('1.00'), location='Uptown'
+            )
+        
+        data = json.loads(self.get_changes(cursor).content)
+        
+        self.assertEqual([p['id'] for p in data['changes']], [self.properties[0].id, created.id])
+        self.assertEqual(data['changes'][0]['title'], 'Renamed')
+        self.assertEqual([(d['id'], d['external_id']) for d in data['deleted']], [(deleted_id, 'sync-1')])
+        self.assertFalse(data['has_more'])
+        
+        caught_up = json.loads(self.get_changes(data['next_cursor']).content)
+        self.assertEqual((caught_up['changes'], caught_up['deleted']), ([], []))
+
+    def test_pages_through_changes_with_equal_timestamps(self):
+        """Test that limit pages never skip or repeat changes sharing a timestamp"""
+        cursor = self.start_cursor()
+        deleted_id = self.properties[2].id
+        with self.captureOnCommitCallbacks(execute=True):
+            Property.objects.update(updated_at=timezone.now())
+            self.properties[2].delete()
+        
+        seen, deleted = [], []
+        for _ in range(5):
+            data = json.loads(self.get_changes(cursor, limit='1').content)
+            seen += [p['id'] for p in data['changes']]
+            deleted += [d['id'] for d in data['deleted']]
+            cursor = data['next_cursor']
+            if not data['has_more']:
+                break
+        
+        self.assertEqual(seen, [p.id for p in self.properties[:2]])
+        self.assertEqual(deleted, [deleted_id])
+
+    def test_queries_do_not_depend_on_catalogue_size(self):
+        """Test that a sync costs one query for rows and one for tombstones"""
+        cursor = self.start_cursor()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.properties[0].save()
+        
+        with self.assertNumQueries(2):
+            data = json.loads(self.get_changes(cursor).content)
+        self.assertEqual(len(data['changes']), 1)
+
+    def test_queryset_update_bumps_updated_at(self):
+        """Test that update() shows up in the feed, but view_count updates do not"""
+        cursor = self.start_cursor()
+        Property.objects.filter(id=self.properties[0].id).update(view_count=5)
+        self.assertEqual(json.loads(self.get_changes(cursor).content)['changes'], [])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Property.objects.filter(id=self.properties[0].id).update(price=Decimal('5.00'))
+        
+        data = json.loads(self.get_changes(cursor).content)
+        self.assertEqual([(p['id'], p['price']) for p in data['changes']], [(self.properties[0].id, '5.00')])
+
+    def test_rolled_back_delete_leaves_no_tombstone(self):
+        """Test that tombstones are written in the deleting transaction"""
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.properties[0].delete()
+            raise RuntimeError('abort')
+        
+        self.assertFalse(PropertyTombstone.objects.exists())
+
+    @override_settings(PROPERTY_CHANGES={'RETENTION_DAYS': 30, 'SETTLE_SECONDS': 60})
+    def test_recent_changes_wait_to_settle(self):
+        """Test that changes younger than SETTLE_SECONDS are held back"""
+        cursor = encode_changes_cursor(timezone.now() - timedelta(minutes=5), CHANGES_END, 0)
+        
+        data = json.loads(self.get_changes(cursor).content)
+        
+        self.assertEqual(data['changes'], [])
+        self.assertEqual(self.get_changes(data['next_cursor']).status_code, 200)
+
+    def test_expired_and_invalid_cursors(self):
+        """Test 410 for cursors older than the retention and 400 for bad input"""
+        expired = encode_changes_cursor(timezone.now() - timedelta(days=31), CHANGES_END, 0)
+        
+        self.assertEqual(self.get_changes(expired).status_code, 410)
+        self.assertEqual(self.get_changes('not-a-cursor').status_code, 400)
+        for limit in ['0', '-1', 'ten', '\u00b2']:
+            with self.subTest(limit=limit):
+                self.assertEqual(self.get_changes(self.start_cursor(), limit=limit).status_code, 400)
+
+    def test_prune_command_keeps_recent_tombstones(self):
+        """Test that prune_property_tombstones deletes only expired tombstones"""
+        PropertyTombstone.objects.create(property_id=1000, deleted_at=timezone.now() - timedelta(days=40))
+        deleted_id = self.properties[0].id
+        self.properties[0].delete()
+        
+        out = StringIO()
+        call_command('prune_property_tombstones', stdout=out)
+        
+        self.assertEqual(list(PropertyTombstone.objects.values_list('property_id', flat=True)), [deleted_id])
+        self.assertIn('Pruned 1', out.getvalue())
+
+
+class PropertyFacetsTest(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = Client()
+        self.url = reverse('properties:property_facets')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.properties = [
+                Property.objects.create(
+                    title=f'Faceted Property {i}',
+                    description='Faceted',
+                    price=Decimal(price),
+                    location=location
+                )
+                for i, (location, price) in enumerate([
+                    ('Downtown', '100000.00'),
+                    ('Downtown', '300000.00'),
+                    ('Downtown', '350000.00'),
+                    ('Uptown', '50000.50'),
+                ])
+            ]
+        rebuild_property_facets()
+
+    def facets(self, **params):
+        return {facet['location']: facet for facet in json.loads(self.client.get(self.url, params).content)['locations']}
+
+    def test_counts_and_price_statistics(self):
+        """Test count, min, max, average, median and histogram per location"""
+        facets = self.facets()
+        
+        self.assertEqual(list(facets), ['Downtown', 'Uptown'])
+        downtown = facets['Downtown']
+        self.assertEqual(downtown['count'], 3)
+        self.assertEqual(
+            (downtown['min_price'], downtown['max_price'], downtown['avg_price'], downtown['median_price']),
+            ('100000.00', '350000.00', '250000.00', '300000.00')
+        )
+        self.assertEqual(downtown['histogram'], [
+            {'min_price': '100000.00', 'max_price': '200000.00', 'count': 1},
+            {'min_price': '300000.00', 'max_price': '400000.00', 'count': 2},
+        ])
+        self.assertEqual(facets['Uptown']['median_price'], '50000.50')
+
+    def test_reads_never_query_the_database(self):
+        """Test that reads are served from Redis alone"""
+        with self.assertNumQueries(0):
+            self.facets()
+            self.facets(location='Uptown')
+
+    def test_signals_update_facets_incrementally(self):
+        """Test that saves, location moves, creates and deletes keep the facets exact"""
+        self.facets()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.properties[0].location = 'Uptown'
+            self.properties[0].save()
+            self.properties[1].price = Decimal('120000.00')
+            self.properties[1].save()
+            self.properties[3].delete()
+            Property.objects.create(title='New', description='New', price=Decimal('10.00'), location='Harbor')
+        
+        with self.assertNumQueries(0):
+            facets = self.facets()
+        self.assertEqual({location: facet['count'] for location, facet in facets.items()},
+                         {'Downtown': 2, 'Uptown': 1, 'Harbor': 1})
+        self.assertEqual(facets['Downtown']['min_price'], '120000.00')
+        self.assertEqual(facets['Uptown']['max_price'], '100000.00')
+        self.assertEqual(check_property_facets(), [])
+
+    def test_queryset_update_and_emptied_location(self):
+        """Test that update() moves properties and empty locations disappear"""
+        self.facets()
+        with self.captureOnCommitCallbacks(execute=True):
+            Property.objects.filter(location='Uptown').update(location='Downtown')
+        
+        facets = self.facets()
+        self.assertEqual(list(facets), ['Downtown'])
+        self.assertEqual(facets['Downtown']['min_price'], '50000.50')
+        self.assertEqual(check_property_facets(), [])
+
+    def test_rollback_and_replayed_changes_leave_facets_exact(self):
+        """Test that rolled-back writes are ignored and replays are idempotent"""
+        self.facets()
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.properties[2].delete()
+                raise RuntimeError('abort')
+        property_ids = list(Property.objects.values_list('id', flat=True))
+        apply_property_changes(property_ids)
+        apply_property_changes(property_ids)
+        
+        self.assertEqual(self.facets()['Downtown']['count'], 3)
+        self.assertEqual(check_property_facets(), [])
+
+    def test_bulk_invalidation_rebuilds_facets_out_of_band(self):
+        """Test that writes bypassing the signals schedule a rebuild while reads keep the snapshot"""
+        Property.objects.bulk_create([
+            Property(title='Bulk', description='Bulk', price=Decimal('1.00'), location='Harbor')
+        ])
+        with patch('properties.facets.rebuild_facets_in_background') as rebuild:
+            with self.captureOnCommitCallbacks(execute=True):
+                invalidate_property_caches()
+        
+        rebuild.assert_called_once_with()
+        with self.assertNumQueries(0):
+            self.assertEqual(list(self.facets()), ['Downtown', 'Uptown'])
+        
+        rebuild_property_facets()
+        self.assertEqual(self.facets()['Harbor']['count'], 1)
+
+    def test_missing_snapshot_returns_503_and_rebuilds_in_background(self):
+        """Test that no request aggregates the table when the facets were never built"""
+        clear_caches()
+        
+        with patch('properties.facets.rebuild_facets_in_background') as rebuild, self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+        rebuild.assert_called_once_with()
+
+    def test_changes_during_rebuild_reach_both_snapshots(self):
+        """Test that a change committed mid-rebuild updates the current and the building snapshot"""
+        redis_conn = get_redis_connection("default")
+        current = redis_conn.get(cache.make_key(FACETS_CURRENT_KEY)).decode()
+        redis_conn.set(cache.make_key('property_facets:building'), 'next')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.properties[3].delete()
+        
+        for generation in (current, 'next'):
+            with self.subTest(generation=generation):
+                key = cache.make_key(f'property_facets:{generation}:locations')
+                self.assertIsNone(redis_conn.zscore(key, 'Uptown'))
+        self.assertEqual(list(self.facets()), ['Downtown'])
+
+    def test_rebuild_rows_never_overwrite_changes_made_during_it(self):
+        """Test that stale rows streamed by a rebuild skip properties changed since it began"""
+        redis_conn = get_redis_connection("default")
+        redis_conn.set(cache.make_key('property_facets:building'), 'next')
+        moved, unchanged, deleted = (self.properties[i].pk for i in (0, 1, 3))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.properties[0].location = 'Harbor'
+            self.properties[0].save()
+            self.properties[3].delete()
+        
+        # Rows the rebuild read before those changes committed
+        pipeline = redis_conn.pipeline(transaction=False)
+        _queue_upsert(pipeline, [
+            moved, 'Downtown', 10000000,
+            unchanged, 'Downtown', 30000000,
+            deleted, 'Uptown', 5000050,
+        ], 'next')
+        pipeline.execute()
+        
+        key = cache.make_key('property_facets:next:locations')
+        self.assertEqual(
+            {location.decode(): int(count) for location, count in redis_conn.zrange(key, 0, -1, withscores=True)},
+            {'Downtown': 1, 'Harbor': 1}
+        )
+
+    def test_rebuild_swaps_snapshots(self):
+        """Test that a rebuild serves the old snapshot until it swaps in the new one"""
+        redis_conn = get_redis_connection("default")
+        old = redis_conn.get(cache.make_key(FACETS_CURRENT_KEY)).decode()
+        
+        rebuild_property_facets()
+        
+        new = redis_conn.get(cache.make_key(FACETS_CURRENT_KEY)).decode()
+        self.assertNotEqual(new, old)
+        self.assertGreater(redis_conn.ttl(cache.make_key(f'property_facets:{old}:locations')), 0)
+        self.assertEqual(redis_conn.ttl(cache.make_key(f'property_facets:{new}:locations')), -1)
+        self.assertEqual(check_property_facets(), [])
+
+    def test_check_command_reports_and_rebuild_repairs_drift(self):
+        """Test that --check fails on drift and a rebuild repairs it"""
+        redis_conn = get_redis_connection("default")
+        generation = redis_conn.get(cache.make_key(FACETS_CURRENT_KEY)).decode()
+        redis_conn.hincrby(cache.make_key(f'property_facets:{generation}:{FACETS_STATS_KEY_PREFIX}Downtown'), 'count', 5)
+        
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('rebuild_property_facets', check=True, stdout=out)
+        self.assertIn('Downtown: count', out.getvalue())
+        
+        out = StringIO()
+        call_command('rebuild_property_facets', stdout=out)
+        self.assertIn('4 properties in 2 locations', out.getvalue())
+        call_command('rebuild_property_facets', check=True, stdout=StringIO())
+
+    def test_location_filter_and_limit(self):
+        """Test ?location=, ?limit= and their validation"""
+        self.assertEqual(list(self.facets(location=['Uptown', 'Nowhere'])), ['Uptown'])
+        self.assertEqual(list(self.facets(limit='1')), ['Downtown'])
+        for limit in ['0', '1001', 'ten', '\u00b2']:
+            with self.subTest(limit=limit):
+                self.assertEqual(self.client.get(self.url, {'limit': limit}).status_code, 400)
+        self.assertEqual(get_property_facets(['Nowhere']), [])
+
+
+class CacheAliasTest(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = Client()
+        with self.captureOnCommitCallbacks(execute=True):
+            Property.objects.create(
+                title='Aliased Property',
+                description='Aliased',
+                price=Decimal('100000.00'),
+                location='Downtown'
+            )
+        self.session = SessionStore()
+        self.session['user'] = 'still-logged-in'
+        self.session.save()
+
+    def test_listing_aliases_exclude_sessions(self):
+        """Test that the sessions alias is never counted as listing data"""
+        self.assertEqual(listing_cache_aliases(), ['default', 'pages'])
+
+    def test_pages_stored_apart_from_property_data(self):
+        """Test that cache_page responses go to the pages alias"""
+        self.client.get(reverse('properties:property_list'))
+        self.assertTrue(caches['pages'].keys('views.decorators.cache.cache_page.*'))
+        self.assertFalse(cache.keys('views.decorators.cache.cache_page.*'))
+        self.assertIsNotNone(get_cache_aside_value(ALL_PROPERTIES_CACHE_KEY, version=PROPERTY_CACHE_VERSION))
+
+    def test_page_cache_built_once_per_generation(self):
+        """Test that the cache_page view is reused until the generation changes"""
+        url = reverse('properties:property_list')
+        with patch('properties.decorators.cache_page', wraps=cache_page) as build:
+            with self.captureOnCommitCallbacks(execute=True):
+                Property.objects.update(title='Regenerated')
+            for _ in range(3):
+                self.client.get(url)
+        
+        build.assert_called_once()
+        self.assertEqual(json.loads(self.client.get(url).content)['properties'][0]['title'], 'Regenerated')
+
+    def test_clear_all_keeps_sessions(self):
+        """Test that clear_property_cache --all empties listing aliases but not sessions"""
+        self.client.get(reverse('properties:property_list'))
+        
+        out = StringIO()
+        call_command('clear_property_cache', all=True, stdout=out)
+        
+        self.assertEqual(caches['pages'].keys('*'), [])
+        self.assertIsNone(get_cache_aside_value(ALL_PROPERTIES_CACHE_KEY, version=PROPERTY_CACHE_VERSION))
+        self.assertTrue(SessionStore().exists(self.session.session_key))
+        self.assertIn('default, pages', out.getvalue())
+
+    def test_clear_single_alias(self):
+        """Test that --alias clears only that alias"""
+        self.client.get(reverse('properties:property_list'))
+        
+        call_command('clear_property_cache', alias=['pages'], stdout=StringIO())
+        
+        self.assertEqual(caches['pages'].keys('*'), [])
+        self.assertIsNotNone(get_cache_aside_value(ALL_PROPERTIES_CACHE_KEY, version=PROPERTY_CACHE_VERSION))
+        self.assertTrue(SessionStore().exists(self.session.session_key))
+
+    def test_refuses_to_clear_alias_sharing_sessions_database(self):
+        """Test that an alias in the sessions' Redis database is never flushed"""
+        shared = {**settings.CACHES, 'pages': {
+            **settings.CACHES['pages'],
+            'LOCATION': settings.CACHES['sessions']['LOCATION'],
+        }}
+        with override_settings(CACHES=shared):
+            with self.assertRaises(CommandError):
+                call_command('clear_property_cache', alias=['pages'], stdout=StringIO())
+            self.assertTrue(SessionStore().exists(self.session.session_key))
+
+    @patch('properties.utils.get_redis_connection')
+    def test_metrics_per_alias(self, mock_get_redis_connection):
+        """Test that get_redis_cache_metrics measures the given alias"""
+        mock_redis_conn = MagicMock()
+        mock_redis_conn.info.return_value = {'keyspace_hits': 3, 'keyspace_misses': 1}
+        mock_redis_conn.dbsize.return_value = 7
+        mock_get_redis_connection.return_value = mock_redis_conn
+        
+        metrics = get_redis_cache_metrics('pages')
+        
+        mock_get_redis_connection.assert_called_once_with('pages')
+        self.assertEqual(metrics['alias'], 'pages')
+        self.assertEqual(metrics['keys'], 7)
+        self.assertEqual(metrics['hit_ratio'], 0.75)
+
+    def test_prometheus_counts_keys_per_alias(self):
+        """Test that /metrics reports the keys of every alias"""
+        self.client.get(reverse('properties:property_list'))
+        
+        body = self.client.get(reverse('prometheus_metrics')).content.decode()
+        
+        for alias in settings.CACHES:
+            self.assertIn(f'properties_cache_keys{{alias="{alias}"}}', body)
+
+
+class RedisCircuitBreakerTest(TestCase):
+    """Fault injection below the counting clients, so it works on fakeredis and a real Redis alike."""
+
+    def setUp(self):
+        clear_caches()
+        self.client = Client()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property = Property.objects.create(
+                title='Resilient Property',
+                description='Served while Redis is down',
+                price=Decimal('250000.00'),
+                location='Harbour',
+            )
+        invalidation._missed.clear()
+        self.addCleanup(invalidation._missed.clear)
+        # Leave no open breaker behind for the next test
+        self.addCleanup(reset_circuit_breakers)
+
+    def redis_down(self):
+        """Make every sync and async Redis call fail as if the server were unreachable."""
+        error = RedisConnectionError('Injected: Redis unreachable')
+        patches = [
+            patch('redis.client.Redis.execute_command', side_effect=error),
+            patch('redis.client.Pipeline.execute', side_effect=error),
+            patch('redis.asyncio.client.Redis.execute_command', side_effect=error),
+            patch('redis.asyncio.client.Pipeline.execute', side_effect=error),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        return patches
+
+    def redis_up(self, patches):
+        for p in patches:
+            p.stop()
+
+    def breaker(self):
+        return circuit_breaker_for(get_redis_connection('default'))
+
+    def open_breaker(self):
+        breaker = self.breaker()
+        for _ in range(breaker.failure_threshold):
+            self.client.get(reverse('properties:property_detail', args=[self.property.id]))
+        self.assertEqual(breaker.state, 'open')
+        return breaker
+
+    def test_breaker_opens_probes_and_closes(self):
+        """Test the closed, open and half-open transitions with a fake clock"""
+        now = [0.0]
+        breaker = CircuitBreaker('test:6379', failure_threshold=3, reset_timeout=10, clock=lambda: now[0])
+        for _ in range(2):
+            breaker.before_call()
+            breaker.record(0.001, failed=True)
+        breaker.before_call()
+        breaker.record(0.001, failed=False)
+        self.assertEqual((breaker.state, breaker.consecutive_failures), ('closed', 0))
+        
+        for _ in range(3):
+            breaker.before_call()
+            breaker.record(0.001, failed=True)
+        self.assertEqual(breaker.state, 'open')
+        with self.assertRaises(CircuitOpen):
+            breaker.before_call()
+        
+        # One probe after the reset timeout; everyone else is still short-circuited
+        now[0] = 10
+        self.assertTrue(breaker.before_call())
+        with self.assertRaises(CircuitOpen):
+            breaker.before_call()
+        breaker.record(0.001, failed=True, probe=True)
+        self.assertEqual(breaker.state, 'open')
+        
+        now[0] = 20
+        probe = breaker.before_call()
+        breaker.record(0.001, failed=False, probe=probe)
+        self.assertEqual(breaker.state, 'closed')
+        self.assertEqual(breaker.stats()['trips'], 2)
+        self.assertEqual(breaker.stats()['short_circuited'], 2)
+
+    def test_slow_calls_open_the_breaker(self):
+        """Test that calls over the latency budget count as failures, pipelines excepted"""
+        breaker = CircuitBreaker('test:6379', failure_threshold=2, slow_call_seconds=0.1)
+        for _ in range(2):
+            breaker.record(5.0, failed=False, bulk=True)
+        self.assertEqual(breaker.state, 'closed')
+        for _ in range(2):
+            breaker.record(0.2, failed=False)
+        self.assertEqual(breaker.state, 'open')
+
+    def test_slow_redis_is_skipped(self):
+        """Test that a Redis answering too slowly trips the breaker and is then not called"""
+        breaker = self.breaker()
+        breaker.slow_call_seconds = 0.01
+        original = redis.client.Redis.execute_command
+        calls = []
+        
+        def slow_execute_command(client, *args, **options):
+            calls.append(args[0])
+            time.sleep(0.02)
+            return original(client, *args, **options)
+        
+        original_execute = redis.client.Pipeline.execute
+        
+        def slow_execute(pipeline, *args, **options):
+            time.sleep(0.02)
+            return original_execute(pipeline, *args, **options)
+        
+        with patch('redis.client.Redis.execute_command', slow_execute_command), \
+                patch('redis.client.Pipeline.execute', slow_execute):
+            for _ in range(breaker.failure_threshold):
+                self.client.get(reverse('properties:property_detail', args=[self.property.id]))
+            self.assertEqual(breaker.state, 'open')
+            calls.clear()
+            response = self.client.get(reverse('properties:property_detail', args=[self.property.id]))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(calls, [])
+
+    def test_reads_fall_back_to_the_database(self):
+        """Test that list, page, detail, batch and search are served from the database"""
+        self.redis_down()
+        pk = self.property.id
+        
+        response = self.client.get(reverse('properties:property_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p['id'] for p in json.loads(response.content)['properties']], [pk])
+        self.assertNotIn('ETag', response)
+        
+        response = self.client.get(reverse('properties:property_list'), {'page_size': 10})
+        self.assertEqual(json.loads(response.content)['total'], 1)
+        response = self.client.get(reverse('properties:property_detail', args=[pk]))
+        self.assertEqual(json.loads(response.content)['title'], 'Resilient Property')
+        self.assertEqual(self.client.get(reverse('properties:property_detail', args=[pk + 1000])).status_code, 404)
+        response = self.client.get(reverse('properties:property_batch'), {'ids': f'{pk},{pk + 1000}'})
+        self.assertEqual(json.loads(response.content)['missing'], [pk + 1000])
+        response = self.client.get(reverse('properties:property_search'), {'location': 'Harbour'})
+        self.assertEqual(json.loads(response.content)['count'], 1)
+        
+        fallbacks = get_fallback_counts()
+        for operation in ('property_list', 'property_page', 'property_detail', 'property_batch', 'property_search'):
+            self.assertGreater(fallbacks.get(operation, 0), 0, operation)
+
+    def test_open_breaker_skips_redis(self):
+        """Test that an open breaker fails calls without a round trip and serves the in-process copy"""
+        self.redis_down()
+        breaker = self.open_breaker()
+        
+        round_trips = get_round_trip_total()
+        first = self.client.get(reverse('properties:property_list'))
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse('properties:property_list'))
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(get_round_trip_total(), round_trips)
+        self.assertGreater(breaker.stats()['short_circuited'], 0)
+
+    def test_redis_only_views_return_503(self):
+        """Test that popular and facets, which have no database fallback, answer 503"""
+        self.redis_down()
+        for name in ('properties:property_popular', 'properties:property_facets'):
+            response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 503)
+            self.assertIn('Retry-After', response)
+
+    def test_metrics_report_breaker_and_fallbacks(self):
+        """Test that breaker state and fallback counts show up in the cache metrics"""
+        patches = self.redis_down()
+        self.open_breaker()
+        
+        metrics = get_redis_cache_metrics()
+        self.assertIsNotNone(metrics['error'])
+        self.assertEqual(metrics['circuit_breaker']['state'], 'open')
+        self.assertEqual(metrics['fallbacks']['property_detail'], self.breaker().failure_threshold)
+        response = self.client.get(reverse('properties:cache_metrics'))
+        self.assertEqual(json.loads(response.content)['cache_metrics']['circuit_breaker']['state'], 'open')
+        body = self.client.get(reverse('prometheus_metrics')).content.decode()
+        self.assertIn('properties_redis_circuit_state{server="redis:6379",state="open"} 1', body)
+        
+        self.redis_up(patches)
+        self.breaker().opened_at -= self.breaker().reset_timeout
+        self.client.get(reverse('properties:property_detail', args=[self.property.id]))
+        self.assertEqual(get_redis_cache_metrics()['circuit_breaker']['state'], 'closed')
+        body = self.client.get(reverse('prometheus_metrics')).content.decode()
+        self.assertIn('properties_cache_fallbacks_total{operation="property_detail"}', body)
+
+    def test_recovery_invalidates_changes_missed_while_down(self):
+        """Test that a write committed while Redis was down is not served stale after recovery"""
+        pk = self.property.id
+        self.client.get(reverse('properties:property_detail', args=[pk]))
+        patches = self.redis_down()
+        breaker = self.open_breaker()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Property.objects.filter(pk=pk).update(price=Decimal('199000.00'))
+        self.assertTrue(invalidation._missed.is_set())
+        
+        self.redis_up(patches)
+        breaker.opened_at -= breaker.reset_timeout
+        response = self.client.get(reverse('properties:property_detail', args=[pk]))
+        
+        self.assertEqual(breaker.state, 'closed')
+        self.assertFalse(invalidation._missed.is_set())
+        self.assertEqual(json.loads(response.content)['price'], '199000.00')
+
+    async def test_async_views_fall_back(self):
+        """Test that the async list and detail views are served from the database"""
+        self.redis_down()
+        factory = AsyncRequestFactory()
+        
+        response = await property_list_async(factory.get('/properties/'))
+        self.assertEqual(json.loads(response.content)['count'], 1)
+        response = await property_detail_async(factory.get('/'), self.property.id)
+        self.assertEqual(json.loads(response.content)['title'], 'Resilient Property')
+
+
+class PropertyAdminTest(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = Client()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        self.url = reverse('admin:properties_property_changelist')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.properties = [
+                Property.objects.create(
+                    title=f'Admin Property {i}',
+                    description='Listed in the admin',
+                    price=Decimal('100000.00') + i,
+                    location=location
+                )
+                for i, location in enumerate(['Downtown', 'Downtown', 'Uptown'])
+            ]
+        rebuild_property_facets()
+
+    def test_changelist_uses_estimated_count(self):
+        """Test that the unfiltered changelist is counted from the table statistics"""
+        with patch('properties.pagination.estimate_property_count', return_value=(2_000_000, True)):
+            response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, 2_000_000)
+        self.assertIsNone(response.context['cl'].full_result_count)
+
+    def test_filtered_count_is_exact_below_threshold(self):
+        """Test that small or non-PostgreSQL result sets are counted exactly"""
+        self.assertEqual(estimate_queryset_count(Property.objects.filter(location='Downtown')), (2, False))
+        self.assertEqual(estimate_queryset_count(Property.objects.all()), (3, False))
+
+    def test_location_choices_come_from_facets(self):
+        """Test that location choices and counts are read from Redis, not SELECT DISTINCT"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        
+        self.assertContains(response, 'Downtown (2)')
+        self.assertContains(response, 'Uptown (1)')
+        self.assertFalse(any('DISTINCT' in query['sql'] for query in queries.captured_queries))
+        
+        response = self.client.get(self.url, {'location': 'Uptown'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+    def test_location_filter_applies_while_redis_is_down(self):
+        """Test that a selected location still filters when the facets cannot be read"""
+        with patch('properties.admin.get_location_counts', side_effect=RedisConnectionError('down')):
+            response = self.client.get(self.url, {'location': 'Downtown'})
+        
+        self.assertEqual(response.context['cl'].result_count, 2)
+        self.assertEqual(get_fallback_counts(), {'admin_locations': 1})
+
+    def test_search(self):
+        """Test that the changelist search matches titles and locations"""
+        response = self.client.get(self.url, {'q': 'Uptown'})
+        
+        self.assertEqual(list(response.context['cl'].result_list), [self.properties[2]])
+
+    def test_bulk_delete_invalidates_once(self):
+        """Test that deleting selected properties in batches writes tombstones and applies one invalidation batch"""
+        get_property_list_payload()
+        deleted = self.properties[:2]
+        
+        with patch('properties.invalidation.apply_property_changes', wraps=apply_property_changes) as apply, \
+                patch('properties.admin.ADMIN_DELETE_BATCH_SIZE', 1):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(self.url, {
+                    'action': 'delete_selected',
+                    '_selected_action': [p.id for p in deleted],
+                    'post': 'yes',
+                })
+        
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(apply.call_count, 1)
+        self.assertEqual(sorted(apply.call_args.args[0]), sorted(p.id for p in deleted))
+        self.assertEqual(
+            set(PropertyTombstone.objects.values_list('property_id', flat=True)),
+            {p.id for p in deleted}
+        )
+        self.assertEqual(list(Property.objects.all()), [self.properties[2]])
+        self.assertEqual(
+            [p['id'] for p in json.loads(get_property_list_payload())['properties']],
+            [self.properties[2].id]
+        )
+        self.assertEqual(get_property_ids(), [self.properties[2].id])
+
+    def test_refresh_action_invalidates_once(self):
+        """Test that refreshing selected properties rewrites their entries in one batch"""
+        cache.delete(property_cache_key(self.properties[0].id), version=PROPERTY_CACHE_VERSION)
+        
+        with patch('properties.invalidation.apply_property_changes', wraps=apply_property_changes) as apply:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(self.url, {
+                    'action': 'refresh_property_caches',
+                    '_selected_action': [p.id for p in self.properties],
+                })
         
-        # Check that print statement was called
-        mock_print.assert_called_with("Cache cleared: Property 'Test Property' was deleted")
+        self.assertEqual(apply.call_count, 1)
+        self.assertIsNotNone(cache.get(property_cache_key(self.properties[0].id), version=PROPERTY_CACHE_VERSION))
 
 
 class RedisCacheMetricsTest(TestCase):
     def setUp(self):
         # Clear cache before each test
-        cache.clear()
+        clear_caches()
 
     @patch('properties.utils.get_redis_connection')
     def test_get_redis_cache_metrics_success(self, mock_get_redis_connection):
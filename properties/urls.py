@@ -1,9 +1,25 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'properties'
 
+# ASGI deployments serve the async versions (see PROPERTY_ASYNC_VIEWS)
+if settings.PROPERTY_ASYNC_VIEWS:
+    list_view, detail_view, metrics_view = views.property_list_async, views.property_detail_async, views.cache_metrics_async
+    batch_view = views.property_batch_async
+else:
+    list_view, detail_view, metrics_view = views.property_list, views.property_detail, views.cache_metrics
+    batch_view = views.property_batch
+
 urlpatterns = [
-    path('', views.property_list, name='property_list'),
-    path('metrics/', views.cache_metrics, name='cache_metrics'),
+    path('', list_view, name='property_list'),
+    path('<int:pk>/', detail_view, name='property_detail'),
+    path('batch/', batch_view, name='property_batch'),
+    path('popular/', views.property_popular, name='property_popular'),
+    path('changes/', views.property_changes, name='property_changes'),
+    path('facets/', views.property_facets, name='property_facets'),
+    path('search/', views.property_search, name='property_search'),
+    path('export/', views.property_export, name='property_export'),
+    path('metrics/', metrics_view, name='cache_metrics'),
 ]
@@ -1,98 +1,1273 @@
+from asgiref.sync import sync_to_async
 from django.core.cache import cache
 from django_redis import get_redis_connection
-from .models import Property
+from .cache_backends import circuit_breaker_for, get_async_redis_connection
+from .caching import (
+    aadd,
+    aadd_many,
+    acache_aside,
+    acache_or_fallback,
+    aget,
+    aget_many,
+    add_many,
+    aset_many,
+    atiered_get,
+    broadcast_invalidation,
+    bump_tags,
+    cache_aside,
+    cache_or_fallback,
+    queue_tag_bumps,
+    tagged_cache_key,
+    tiered_get,
+)
+from .facets import mark_facets_stale, queue_facet_changes
+from .instrumentation import serialization_timer
+from .resilience import get_fallback_counts
+from django.db import transaction
+from django.db.models import Case, F, Max, Value, When
+from django.utils import timezone
+from .models import Property, PropertyViewFlush
+from .pagination import DEFAULT_PAGE_SIZE, estimate_property_count, fetch_property_page
+from .search import (
+    CATALOGUE_EPOCH_TAG,
+    CATALOGUE_TAG,
+    property_tags,
+    search_cache_key_suffix,
+    search_properties,
+    search_tags,
+)
+from .serializers import (
+    PROPERTY_ROW_FIELDS,
+    encode_property_batch,
+    encode_property_page,
+    encode_property_rows,
+    encode_popular_properties,
+    encode_search_results,
+    join_property_list,
+    property_row,
+)
+from contextlib import contextmanager
+import json
 import logging
+import time
+import uuid
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
+ALL_PROPERTIES_CACHE_KEY = 'all_properties'
+
+# Version 1 stored pickled QuerySets and version 2 bare payloads without
+# cache_aside() envelopes. Bump this whenever the cached payload format
+# changes so that old entries are never read back.
+PROPERTY_CACHE_VERSION = 3
+
+PROPERTY_CACHE_TIMEOUT = 3600
+
+# Every cached listing page embeds this counter in its key, so bumping it
+# retires all pages at once without scanning for them.
+PROPERTY_LIST_GENERATION_KEY = 'property_list_generation'
+PROPERTY_PAGE_CACHE_TIMEOUT = 60 * 15
+PROPERTY_SEARCH_CACHE_TIMEOUT = 60 * 15
+
+PROPERTY_COUNT_CACHE_KEY = 'property_count'
+PROPERTY_COUNT_CACHE_TIMEOUT = 60 * 5
+
+# When any property last changed; kept current by the signals and used for
+# Last-Modified headers
+PROPERTY_LAST_MODIFIED_KEY = 'property_last_modified'
+
+# Per-property entries are kept up to date by the signals, so they can live
+# much longer than the assembled list.
+PROPERTY_ENTRY_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Cached under 'property:<id>' for ids that do not exist, so scans of unknown
+# ids are answered by Redis. Short-lived in case the id is created later;
+# written with SET NX so it never replaces a real entry.
+PROPERTY_NOT_FOUND = b''
+PROPERTY_NOT_FOUND_CACHE_TIMEOUT = 60
+
+# Redis sorted set of property ids (scored by id) that defines list membership
+PROPERTY_INDEX_CACHE_KEY = 'property_ids'
+
+# Sorted sets counting requests per listing page and per search, from which
+# warm_property_cache learns what to prewarm. Trimmed to the most popular
+# PROPERTY_ACCESS_MAX_TRACKED members whenever they are read.
+PROPERTY_PAGE_ACCESS_KEY = 'property_access:pages'
+PROPERTY_SEARCH_ACCESS_KEY = 'property_access:searches'
+PROPERTY_ACCESS_MAX_TRACKED = 1000
+
+# Detail views are counted in Redis rather than written to Property on every
+# request: a hash of views not yet in the database, which flush_property_views
+# renames to the flushing key and adds to Property.view_count, and a sorted set
+# of total views (database plus pending) that ranks /properties/popular/.
+PROPERTY_VIEWS_PENDING_KEY = 'property_views:pending'
+PROPERTY_VIEWS_FLUSHING_KEY = 'property_views:flushing'
+# Id of the snapshot in PROPERTY_VIEWS_FLUSHING_KEY, recorded in PropertyViewFlush
+PROPERTY_VIEWS_FLUSH_ID_KEY = 'property_views:flush_id'
+PROPERTY_VIEWS_FLUSH_LOCK_KEY = 'property_views:flush_lock'
+PROPERTY_VIEWS_FLUSH_LOCK_TIMEOUT = 60 * 5
+PROPERTY_POPULARITY_KEY = 'property_popularity'
+
+# Member that marks the index as complete. Ids are positive, so scoring the
+# sentinel -1 keeps it first. An index without it is rebuilt from the database.
+PROPERTY_INDEX_SENTINEL = b'*'
+
+
+def get_property_list_payload():
+    """
+    Get the encoded property list response body with Redis caching.
+    
+    Returns:
+        bytes: JSON body of the form {"properties": [...], "count": N}
+        
+    Cache Strategy:
+        - Check Redis for the versioned 'all_properties' key via cache_aside(),
+          so only one worker rebuilds it while others wait or serve stale
+        - If not found, read list membership from the property index and
+          fetch every 'property:<id>' entry with a single MGET
+        - Only entries missing from Redis are loaded from the database
+        - Store the assembled bytes in Redis for 1 hour (3600 seconds)
+        - Return the bytes so cache hits skip ORM and JSON work entirely
+        - If Redis is unavailable, build the bytes from the database and
+          keep them in-process for a few seconds (see cache_or_fallback)
+    """
+    def build_payload():
+        # Rebuild from the per-property entries
+        property_ids = get_property_ids()
+        entries = get_property_entries(property_ids)
+        with serialization_timer():
+            return join_property_list([entries[pk] for pk in property_ids if pk in entries])
+    
+    # Concurrent misses share a single rebuild (see cache_aside)
+    return cache_or_fallback(
+        'property_list',
+        lambda: cache_aside(
+            ALL_PROPERTIES_CACHE_KEY,
+            build_payload,
+            PROPERTY_CACHE_TIMEOUT,
+            version=PROPERTY_CACHE_VERSION,
+            local=True,
+        ),
+        build_property_list_payload,
+        local_key=ALL_PROPERTIES_CACHE_KEY,
+    )
+
+
+async def aget_property_list_payload():
+    """
+    Async counterpart of get_property_list_payload().
+    
+    Returns:
+        bytes: JSON body of the form {"properties": [...], "count": N}
+        
+    Cache Strategy:
+        - Same 'all_properties' entry and recompute lock, read with the
+          redis.asyncio client (see acache_aside)
+        - A rebuild reads the index and entries with the async client and
+          loads missing entries with the async ORM
+    """
+    async def build_payload():
+        property_ids = await aget_property_ids()
+        entries = await aget_property_entries(property_ids)
+        with serialization_timer():
+            return join_property_list([entries[pk] for pk in property_ids if pk in entries])
+    
+    return await acache_or_fallback(
+        'property_list',
+        lambda: acache_aside(
+            ALL_PROPERTIES_CACHE_KEY,
+            build_payload,
+            PROPERTY_CACHE_TIMEOUT,
+            version=PROPERTY_CACHE_VERSION,
+            local=True,
+        ),
+        sync_to_async(build_property_list_payload),
+        local_key=ALL_PROPERTIES_CACHE_KEY,
+    )
+
+
+def build_property_list_payload():
+    """
+    Build the property list response body from the database alone.
+    
+    Returns:
+        bytes: JSON body of the form {"properties": [...], "count": N}
+    """
+    rows = list(Property.objects.order_by('id').values_list(*PROPERTY_ROW_FIELDS))
+    with serialization_timer():
+        return join_property_list(encode_property_rows(rows))
+
+
+def property_cache_key(pk):
+    """
+    Get the cache key for a single property entry.
+    
+    Args:
+        pk: The property id
+        
+    Returns:
+        str: The 'property:<id>' cache key
+    """
+    return f'property:{pk}'
+
+
+def cache_property(property):
+    """
+    Store the encoded entry for a single property.
+    
+    Args:
+        property: The Property instance to cache
+    """
+    with serialization_timer():
+        entry = encode_property_rows([property_row(property)])[0]
+    cache.set(
+        property_cache_key(property.id),
+        entry,
+        PROPERTY_ENTRY_CACHE_TIMEOUT,
+        version=PROPERTY_CACHE_VERSION,
+    )
+
+
+def get_property_entries(property_ids):
+    """
+    Get encoded entries for the given properties with a single MGET.
+    
+    Args:
+        property_ids: Iterable of property ids
+        
+    Returns:
+        dict: Mapping of property id to encoded JSON bytes. Ids that do
+        not exist in the database are left out.
+        
+    Cache Strategy:
+        - Fetch all 'property:<id>' keys at once
+        - Load only the missing ids from the database with one id__in query
+        - Write the loaded entries back in one pipelined call
+        - Cache PROPERTY_NOT_FOUND for ids the database does not have, so
+          they are not looked up again for a minute
+    """
+    keys = {property_cache_key(pk): pk for pk in property_ids}
+    cached = cache.get_many(keys, version=PROPERTY_CACHE_VERSION)
+    entries = {keys[key]: value for key, value in cached.items()}
+    
+    missing_ids = [pk for pk in keys.values() if pk not in entries]
+    if missing_ids:
+        loaded = load_property_entries(missing_ids)
+        if loaded:
+            cache.set_many(
+                {property_cache_key(pk): value for pk, value in loaded.items()},
+                PROPERTY_ENTRY_CACHE_TIMEOUT,
+                version=PROPERTY_CACHE_VERSION,
+            )
+        entries.update(loaded)
+        
+        # Drop ids that were deleted behind the index's back
+        deleted_ids = set(missing_ids) - set(loaded)
+        if deleted_ids:
+            remove_from_property_index(*deleted_ids)
+            add_many(
+                {property_cache_key(pk): PROPERTY_NOT_FOUND for pk in deleted_ids},
+                PROPERTY_NOT_FOUND_CACHE_TIMEOUT,
+                version=PROPERTY_CACHE_VERSION,
+            )
+    
+    return {pk: entry for pk, entry in entries.items() if entry != PROPERTY_NOT_FOUND}
+
+
+def load_property_entries(property_ids):
+    """
+    Encode entries for the given properties from the database, bypassing Redis.
+    
+    Args:
+        property_ids: Iterable of property ids
+        
+    Returns:
+        dict: Mapping of property id to encoded JSON bytes, for the ids
+        that exist
+    """
+    rows = list(Property.objects.filter(id__in=list(property_ids)).values_list(*PROPERTY_ROW_FIELDS))
+    with serialization_timer():
+        return dict(zip((row[0] for row in rows), encode_property_rows(rows)))
+
+
+async def aget_property_entries(property_ids):
+    """
+    Async counterpart of get_property_entries().
+    
+    Args:
+        property_ids: Iterable of property ids
+        
+    Returns:
+        dict: Mapping of property id to encoded JSON bytes
+    """
+    keys = {property_cache_key(pk): pk for pk in property_ids}
+    cached = await aget_many(keys, version=PROPERTY_CACHE_VERSION)
+    entries = {keys[key]: value for key, value in cached.items()}
+    
+    missing_ids = [pk for pk in keys.values() if pk not in entries]
+    if missing_ids:
+        # Not aiterator(): for values_list() rows it runs the query on the event loop
+        rows = [row async for row in Property.objects.filter(id__in=missing_ids).values_list(*PROPERTY_ROW_FIELDS)]
+        with serialization_timer():
+            loaded = dict(zip((row[0] for row in rows), encode_property_rows(rows)))
+        if loaded:
+            await aset_many(
+                {property_cache_key(pk): value for pk, value in loaded.items()},
+                PROPERTY_ENTRY_CACHE_TIMEOUT,
+                version=PROPERTY_CACHE_VERSION,
+            )
+        entries.update(loaded)
+        
+        deleted_ids = set(missing_ids) - set(loaded)
+        if deleted_ids:
+            await get_async_redis_connection().zrem(_property_index_key(), *deleted_ids)
+            await aadd_many(
+                {property_cache_key(pk): PROPERTY_NOT_FOUND for pk in deleted_ids},
+                PROPERTY_NOT_FOUND_CACHE_TIMEOUT,
+                version=PROPERTY_CACHE_VERSION,
+            )
+    
+    return {pk: entry for pk, entry in entries.items() if entry != PROPERTY_NOT_FOUND}
+
+
+def get_property_batch_payload(property_ids):
+    """
+    Get the JSON body for a batch lookup of properties by id.
+    
+    Args:
+        property_ids: Ids to look up, in the order they should be returned
+        
+    Returns:
+        bytes: Encoded properties in request order, their count and the
+        ids that do not exist
+        
+    Cache Strategy:
+        - One MGET for all 'property:<id>' entries
+        - One id__in query for the misses (see get_property_entries)
+        - If Redis is unavailable, one id__in query for every id
+    """
+    entries = cache_or_fallback(
+        'property_batch',
+        lambda: get_property_entries(property_ids),
+        lambda: load_property_entries(property_ids),
+    )
+    with serialization_timer():
+        return encode_property_batch(
+            [entries[pk] for pk in property_ids if pk in entries],
+            [pk for pk in property_ids if pk not in entries],
+        )
+
+
+async def aget_property_batch_payload(property_ids):
+    """
+    Async counterpart of get_property_batch_payload().
+    """
+    entries = await acache_or_fallback(
+        'property_batch',
+        lambda: aget_property_entries(property_ids),
+        sync_to_async(lambda: load_property_entries(property_ids)),
+    )
+    with serialization_timer():
+        return encode_property_batch(
+            [entries[pk] for pk in property_ids if pk in entries],
+            [pk for pk in property_ids if pk not in entries],
+        )
+
+
+def get_property_entry(pk):
+    """
+    Get the encoded entry for a single property.
+    
+    Args:
+        pk: The property id
+        
+    Returns:
+        bytes: Encoded JSON, or None if the property does not exist
+        
+    Cache Strategy:
+        - Read 'property:<id>'; only a miss queries the database
+        - A missing property is cached as PROPERTY_NOT_FOUND for a minute
+        - If Redis is unavailable, read the database
+    """
+    return cache_or_fallback(
+        'property_detail',
+        lambda: _get_property_entry(pk),
+        lambda: load_property_entries([pk]).get(pk),
+    )
+
+
+def _get_property_entry(pk):
+    entry = cache.get(property_cache_key(pk), version=PROPERTY_CACHE_VERSION)
+    if entry is not None:
+        return None if entry == PROPERTY_NOT_FOUND else entry
+    
+    row = Property.objects.filter(pk=pk).values_list(*PROPERTY_ROW_FIELDS).first()
+    if row is None:
+        cache.add(
+            property_cache_key(pk),
+            PROPERTY_NOT_FOUND,
+            PROPERTY_NOT_FOUND_CACHE_TIMEOUT,
+            version=PROPERTY_CACHE_VERSION,
+        )
+        return None
+    with serialization_timer():
+        entry = encode_property_rows([row])[0]
+    cache.set(property_cache_key(pk), entry, PROPERTY_ENTRY_CACHE_TIMEOUT, version=PROPERTY_CACHE_VERSION)
+    return entry
+
+
+async def aget_property_entry(pk):
+    """
+    Async counterpart of get_property_entry().
+    
+    Args:
+        pk: The property id
+        
+    Returns:
+        bytes: Encoded JSON, or None if the property does not exist
+    """
+    return await acache_or_fallback(
+        'property_detail',
+        lambda: _aget_property_entry(pk),
+        sync_to_async(lambda: load_property_entries([pk]).get(pk)),
+    )
+
+
+async def _aget_property_entry(pk):
+    entry = await aget(property_cache_key(pk), version=PROPERTY_CACHE_VERSION)
+    if entry is not None:
+        return None if entry == PROPERTY_NOT_FOUND else entry
+    
+    try:
+        row = await Property.objects.values_list(*PROPERTY_ROW_FIELDS).aget(pk=pk)
+    except Property.DoesNotExist:
+        await aadd(
+            property_cache_key(pk),
+            PROPERTY_NOT_FOUND,
+            PROPERTY_NOT_FOUND_CACHE_TIMEOUT,
+            version=PROPERTY_CACHE_VERSION,
+        )
+        return None
+    with serialization_timer():
+        entry = encode_property_rows([row])[0]
+    await aset_many({property_cache_key(pk): entry}, PROPERTY_ENTRY_CACHE_TIMEOUT, version=PROPERTY_CACHE_VERSION)
+    return entry
+
+
+def _property_index_key():
+    return cache.make_key(PROPERTY_INDEX_CACHE_KEY, version=PROPERTY_CACHE_VERSION)
+
+
+def get_property_ids():
+    """
+    Get the ids of all properties, in id order, from the Redis index.
+    
+    Returns:
+        list: Property ids
+        
+    Cache Strategy:
+        - Read the sorted set with ZRANGE
+        - If it is missing or incomplete, load the ids from the database and
+          merge them into the set together with the completeness sentinel
+    """
+    redis_conn = get_redis_connection("default")
+    index_key = _property_index_key()
+    
+    members = redis_conn.zrange(index_key, 0, -1)
+    if members and members[0] == PROPERTY_INDEX_SENTINEL:
+        return [int(member) for member in members[1:]]
+    
+    property_ids = list(Property.objects.order_by('id').values_list('id', flat=True))
+    
+    # Merge rather than replace, so a concurrent signal update is never lost.
+    # Members that were deleted meanwhile are pruned by get_property_entries().
+    pipeline = redis_conn.pipeline()
+    pipeline.zadd(index_key, {PROPERTY_INDEX_SENTINEL: -1})
+    for start in range(0, len(property_ids), 10_000):
+        pipeline.zadd(index_key, {pk: pk for pk in property_ids[start:start + 10_000]})
+    pipeline.execute()
+    
+    return property_ids
+
+
+async def aget_property_ids():
+    """
+    Async counterpart of get_property_ids().
+    
+    Returns:
+        list: Property ids
+    """
+    redis_conn = get_async_redis_connection()
+    index_key = _property_index_key()
+    
+    members = await redis_conn.zrange(index_key, 0, -1)
+    if members and members[0] == PROPERTY_INDEX_SENTINEL:
+        return [int(member) for member in members[1:]]
+    
+    property_ids = [pk async for pk in Property.objects.order_by('id').values_list('id', flat=True).aiterator()]
+    
+    pipeline = redis_conn.pipeline()
+    pipeline.zadd(index_key, {PROPERTY_INDEX_SENTINEL: -1})
+    for start in range(0, len(property_ids), 10_000):
+        pipeline.zadd(index_key, {pk: pk for pk in property_ids[start:start + 10_000]})
+    await pipeline.execute()
+    
+    return property_ids
+
+
+def remove_from_property_index(*property_ids):
+    """
+    Remove properties from the list index.
+    
+    Args:
+        *property_ids: Ids of the properties to remove
+    """
+    get_redis_connection("default").zrem(_property_index_key(), *property_ids)
+
 
 def get_all_properties():
     """
     Get all properties with Redis caching.
     
     Returns:
-        QuerySet: All Property objects
+        list: Serialized property dictionaries
+        
+    Cache Strategy:
+        - Reads the cached payload from get_property_list_payload()
+        - Decodes it; no Property instances are built on a cache hit
+    """
+    payload = get_property_list_payload()
+    with serialization_timer():
+        return json.loads(payload)['properties']
+
+
+def get_property_list_generation():
+    """
+    Get the current listing generation, initialising it if missing.
+    
+    Returns:
+        int: The generation number embedded in listing page cache keys
+    """
+    generation = tiered_get(PROPERTY_LIST_GENERATION_KEY)
+    if generation is None:
+        generation = _init_property_list_generation()
+    return generation
+
+
+def _init_property_list_generation():
+    # Start from the clock rather than 1 so that an evicted counter can never
+    # resurrect pages cached under an earlier generation. add() keeps
+    # concurrent initialisers from resetting each other.
+    initial = int(time.time() * 1000)
+    cache.add(PROPERTY_LIST_GENERATION_KEY, initial, None)
+    return cache.get(PROPERTY_LIST_GENERATION_KEY, initial)
+
+
+def bump_property_list_generation():
+    """
+    Invalidate every cached listing page by moving to a new generation.
+    
+    Returns:
+        int: The new generation number
+    """
+    try:
+        generation = cache.incr(PROPERTY_LIST_GENERATION_KEY)
+    except ValueError:
+        # Key is missing; start a fresh generation
+        generation = _init_property_list_generation()
+    broadcast_invalidation([PROPERTY_LIST_GENERATION_KEY])
+    return generation
+
+
+def get_catalogue_etag():
+    """
+    Get an ETag for the property catalogue without touching the database.
+    
+    Combines the cache version (payload format) with the listing generation,
+    which the save/delete signals bump on every change.
+    
+    Returns:
+        str: Unquoted ETag value, or None while Redis is unavailable
+    """
+    generation = cache_or_fallback('catalogue_etag', get_property_list_generation, lambda: None)
+    return None if generation is None else f'{PROPERTY_CACHE_VERSION}-{generation}'
+
+
+async def aget_catalogue_etag():
+    """
+    Async counterpart of get_catalogue_etag().
+    
+    Returns:
+        str: Unquoted ETag value, or None while Redis is unavailable
+    """
+    async def get_generation():
+        generation = await atiered_get(PROPERTY_LIST_GENERATION_KEY)
+        if generation is None:
+            generation = await sync_to_async(_init_property_list_generation)()
+        return generation
+    
+    async def no_generation():
+        return None
+    
+    generation = await acache_or_fallback('catalogue_etag', get_generation, no_generation)
+    return None if generation is None else f'{PROPERTY_CACHE_VERSION}-{generation}'
+
+
+def get_catalogue_last_modified():
+    """
+    Get when any property was last created, updated or deleted.
+    
+    Returns:
+        datetime: The last modification time, or None for an empty catalogue
+        
+    Cache Strategy:
+        - Read from the local tier or Redis; the signals keep it current
+        - On a miss, fall back to MAX(updated_at) once and cache the result
+        - If Redis is unavailable, read MAX(updated_at) and keep it in-process
+          for a few seconds
+    """
+    def get_cached():
+        last_modified = tiered_get(PROPERTY_LAST_MODIFIED_KEY)
+        if last_modified is None:
+            last_modified = _query_last_modified()
+            if last_modified is not None:
+                cache.add(PROPERTY_LAST_MODIFIED_KEY, last_modified, None)
+        return last_modified
+    
+    return cache_or_fallback(
+        'catalogue_last_modified',
+        get_cached,
+        _query_last_modified,
+        local_key=PROPERTY_LAST_MODIFIED_KEY,
+    )
+
+
+def _query_last_modified():
+    return Property.objects.aggregate(last_modified=Max('updated_at'))['last_modified']
+
+
+async def aget_catalogue_last_modified():
+    """
+    Async counterpart of get_catalogue_last_modified().
+    
+    Returns:
+        datetime: The last modification time, or None for an empty catalogue
+    """
+    async def get_cached():
+        last_modified = await atiered_get(PROPERTY_LAST_MODIFIED_KEY)
+        if last_modified is None:
+            last_modified = await _aquery_last_modified()
+            if last_modified is not None:
+                await aadd(PROPERTY_LAST_MODIFIED_KEY, last_modified)
+        return last_modified
+    
+    return await acache_or_fallback(
+        'catalogue_last_modified',
+        get_cached,
+        _aquery_last_modified,
+        local_key=PROPERTY_LAST_MODIFIED_KEY,
+    )
+
+
+async def _aquery_last_modified():
+    aggregate = await Property.objects.aaggregate(last_modified=Max('updated_at'))
+    return aggregate['last_modified']
+
+
+def set_catalogue_last_modified(last_modified):
+    """
+    Record a catalogue change for Last-Modified headers.
+    
+    Args:
+        last_modified: When the change happened
+    """
+    cache.set(PROPERTY_LAST_MODIFIED_KEY, last_modified, None)
+    broadcast_invalidation([PROPERTY_LAST_MODIFIED_KEY])
+
+
+def get_property_count():
+    """
+    Get the total number of properties from cache, counting or estimating on a miss.
+    
+    Returns:
+        tuple: (total, is_estimate)
+    """
+    return tuple(cache_aside(
+        PROPERTY_COUNT_CACHE_KEY,
+        estimate_property_count,
+        PROPERTY_COUNT_CACHE_TIMEOUT,
+        version=PROPERTY_CACHE_VERSION,
+        local=True,
+    ))
+
+
+def property_page_cache_key(cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Get the cache key of one listing page under the current generation.
+    
+    Args:
+        cursor: Cursor of the page, or None for the first page
+        page_size: Number of properties per page
+        
+    Returns:
+        str: e.g. 'property_page:<generation>:50:first'
+    """
+    return f'property_page:{get_property_list_generation()}:{page_size}:{cursor or "first"}'
+
+
+def get_property_page_payload(cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Get one encoded page of the cursor-paginated property list.
+    
+    Args:
+        cursor: Cursor returned with the previous page, or None for the first page
+        page_size: Number of properties per page
+        
+    Returns:
+        bytes: JSON body with properties, next_cursor and total
+        
+    Raises:
+        InvalidCursor: If the cursor cannot be decoded
+        
+    Cache Strategy:
+        - Each page is cached on its own under the current listing generation
+        - Property changes bump the generation, retiring every cached page
+        - If Redis is unavailable, build the page and count from the
+          database and keep it in-process for a few seconds
+    """
+    def build_page(count=get_property_count):
+        rows, next_cursor = fetch_property_page(cursor, page_size)
+        total, total_is_estimate = count()
+        with serialization_timer():
+            return encode_property_page(
+                encode_property_rows(rows),
+                next_cursor,
+                total,
+                total_is_estimate,
+            )
+    
+    return cache_or_fallback(
+        'property_page',
+        lambda: cache_aside(
+            property_page_cache_key(cursor, page_size),
+            build_page,
+            PROPERTY_PAGE_CACHE_TIMEOUT,
+            version=PROPERTY_CACHE_VERSION,
+            local=True,
+        ),
+        lambda: build_page(estimate_property_count),
+        local_key=f'property_page:{page_size}:{cursor or "first"}',
+    )
+
+
+def search_cache_key(normalized):
+    """
+    Get the cache key of a search under the current versions of its tags.
+    
+    Args:
+        normalized: Dictionary returned by normalize_search_params()
+        
+    Returns:
+        str: e.g. 'property_search:<query hash>:<tag versions hash>'
+    """
+    return tagged_cache_key(
+        f'property_search:{search_cache_key_suffix(normalized)}',
+        search_tags(normalized),
+    )
+
+
+def get_search_payload(normalized):
+    """
+    Get encoded search results for normalized search parameters.
+    
+    Args:
+        normalized: Dictionary returned by normalize_search_params()
+        
+    Returns:
+        bytes: JSON body with properties, count and the normalized query
+        
+    Cache Strategy:
+        - Results are cached under a hash of the normalized query, so
+          equivalent requests share one entry
+        - The key also embeds the versions of the query's tags (see
+          search_tags), so only changes that can affect the result retire it
+        - If Redis is unavailable, run the search and keep the results
+          in-process for a few seconds
+    """
+    def build_results():
+        rows = list(search_properties(normalized).values_list(*PROPERTY_ROW_FIELDS))
+        with serialization_timer():
+            return encode_search_results(
+                encode_property_rows(rows),
+                normalized,
+            )
+    
+    return cache_or_fallback(
+        'property_search',
+        lambda: cache_aside(
+            search_cache_key(normalized),
+            build_results,
+            PROPERTY_SEARCH_CACHE_TIMEOUT,
+            version=PROPERTY_CACHE_VERSION,
+            local=True,
+        ),
+        build_results,
+        local_key=f'property_search:{search_cache_key_suffix(normalized)}',
+    )
+
+
+def _access_key(key):
+    return cache.make_key(key, version=PROPERTY_CACHE_VERSION)
+
+
+def record_page_access(cursor, page_size):
+    """
+    Count a request for one listing page.
+    
+    Args:
+        cursor: Cursor of the page, or None for the first page
+        page_size: Number of properties per page
+    """
+    member = json.dumps([cursor, page_size], separators=(',', ':'))
+    get_redis_connection("default").zincrby(_access_key(PROPERTY_PAGE_ACCESS_KEY), 1, member)
+
+
+def record_search_access(normalized):
+    """
+    Count a request for one search.
+    
+    Args:
+        normalized: Dictionary returned by normalize_search_params()
+    """
+    member = json.dumps(normalized, sort_keys=True, separators=(',', ':'))
+    get_redis_connection("default").zincrby(_access_key(PROPERTY_SEARCH_ACCESS_KEY), 1, member)
+
+
+def _get_popular(key, limit):
+    # ZREVRANGE 0 -1 would return the whole set
+    if limit <= 0:
+        return []
+    redis_conn = get_redis_connection("default")
+    access_key = _access_key(key)
+    pipeline = redis_conn.pipeline()
+    # Forget the long tail so the sets stay bounded
+    pipeline.zremrangebyrank(access_key, 0, -PROPERTY_ACCESS_MAX_TRACKED - 1)
+    pipeline.zrevrange(access_key, 0, limit - 1)
+    return [json.loads(member) for member in pipeline.execute()[1]]
+
+
+def get_popular_pages(limit):
+    """
+    Get the most requested listing pages, most popular first.
+    
+    Args:
+        limit: Maximum number of pages to return
+        
+    Returns:
+        list: (cursor, page_size) tuples
+    """
+    return [tuple(page) for page in _get_popular(PROPERTY_PAGE_ACCESS_KEY, limit)]
+
+
+def get_popular_searches(limit):
+    """
+    Get the most requested searches, most popular first.
+    
+    Args:
+        limit: Maximum number of searches to return
+        
+    Returns:
+        list: Normalized search parameter dictionaries
+    """
+    return _get_popular(PROPERTY_SEARCH_ACCESS_KEY, limit)
+
+
+def _record_property_view(pipeline, pk):
+    pipeline.hincrby(_access_key(PROPERTY_VIEWS_PENDING_KEY), pk, 1)
+    pipeline.zincrby(_access_key(PROPERTY_POPULARITY_KEY), 1, pk)
+
+
+def record_property_view(pk):
+    """
+    Count one view of a property, in Redis only.
+    
+    Args:
+        pk: Id of the viewed property
+        
+    Both counters are incremented in one pipelined round trip; the
+    database catches up when flush_property_views runs. Views are not
+    counted while Redis is unavailable.
+    """
+    def record():
+        pipeline = get_redis_connection("default").pipeline(transaction=False)
+        _record_property_view(pipeline, pk)
+        pipeline.execute()
+    
+    cache_or_fallback('property_view', record, lambda: None)
+
+
+async def arecord_property_view(pk):
+    """
+    Async counterpart of record_property_view().
+    """
+    async def record():
+        pipeline = get_async_redis_connection().pipeline(transaction=False)
+        _record_property_view(pipeline, pk)
+        await pipeline.execute()
+    
+    async def skip():
+        return None
+    
+    await acache_or_fallback('property_view', record, skip)
+
+
+def get_popular_property_views(limit):
+    """
+    Get the most viewed properties and their total view counts.
+    
+    Args:
+        limit: Maximum number of properties to return
+        
+    Returns:
+        list: (property id, views) tuples, most viewed first
         
     Cache Strategy:
-        - Check Redis for 'all_properties' key
-        - If not found, fetch from database
-        - Store in Redis for 1 hour (3600 seconds)
-        - Return the queryset
+        - Read the popularity sorted set with ZREVRANGE
+        - If it is missing or incomplete, merge in Property.view_count plus
+          the unflushed views, together with the completeness sentinel
     """
-    # Try to get from cache first
-    cached_properties = cache.get('all_properties')
+    redis_conn = get_redis_connection("default")
+    popularity_key = _access_key(PROPERTY_POPULARITY_KEY)
+    pipeline = redis_conn.pipeline(transaction=False)
+    pipeline.zscore(popularity_key, PROPERTY_INDEX_SENTINEL)
+    pipeline.zrevrange(popularity_key, 0, limit, withscores=True)
+    complete, ranked = pipeline.execute()
+    
+    if complete is None:
+        views = dict(Property.objects.filter(view_count__gt=0).values_list('id', 'view_count'))
+        for key in (PROPERTY_VIEWS_FLUSHING_KEY, PROPERTY_VIEWS_PENDING_KEY):
+            for pk, count in redis_conn.hgetall(_access_key(key)).items():
+                views[int(pk)] = views.get(int(pk), 0) + int(count)
+        
+        # GT, so views counted since the set was lost are never taken back
+        pipeline = redis_conn.pipeline()
+        pipeline.zadd(popularity_key, {PROPERTY_INDEX_SENTINEL: -1})
+        items = list(views.items())
+        for start in range(0, len(items), 10_000):
+            pipeline.zadd(popularity_key, dict(items[start:start + 10_000]), gt=True)
+        pipeline.zrevrange(popularity_key, 0, limit, withscores=True)
+        ranked = pipeline.execute()[-1]
     
-    if cached_properties is not None:
-        # Return cached queryset
-        return cached_properties
+    return [(int(member), int(score)) for member, score in ranked if member != PROPERTY_INDEX_SENTINEL][:limit]
+
+
+def get_popular_properties_payload(limit):
+    """
+    Get the JSON body of /properties/popular/.
     
-    # If not in cache, fetch from database
-    properties = Property.objects.all()
+    Args:
+        limit: Maximum number of properties to return
+        
+    Returns:
+        bytes: The most viewed properties, each with its view_count
+        
+    Cache Strategy:
+        - Rank from the popularity sorted set (see get_popular_property_views)
+        - Bodies from the 'property:<id>' entries (see get_property_entries)
+    """
+    ranked = get_popular_property_views(limit)
+    entries = get_property_entries([pk for pk, _ in ranked])
+    with serialization_timer():
+        return encode_popular_properties([(entries[pk], views) for pk, views in ranked if pk in entries])
+
+
+def flush_property_views():
+    """
+    Add the views counted in Redis to Property.view_count.
     
-    # Store in cache for 1 hour (3600 seconds)
-    cache.set('all_properties', properties, 3600)
+    Returns:
+        int: Number of views written, or None if another flush is running
+        
+    The pending hash is renamed first, so views counted during the flush
+    go to a fresh hash, and given an id. The snapshot is written with one
+    UPDATE per 1000 properties in a single transaction, which also records
+    its id in PropertyViewFlush, and deleted afterwards. If a flush dies
+    before the commit, the next one writes the same snapshot; if it dies
+    after, the next one finds the id recorded and only deletes the
+    snapshot, so no view is counted twice. update() sends no post_save, so
+    no cache is invalidated.
+    """
+    redis_conn = get_redis_connection("default")
+    lock_key = PROPERTY_VIEWS_FLUSH_LOCK_KEY
+    token = uuid.uuid4().hex
+    if not cache.add(lock_key, token, PROPERTY_VIEWS_FLUSH_LOCK_TIMEOUT):
+        return None
     
-    return properties
+    try:
+        pending_key = _access_key(PROPERTY_VIEWS_PENDING_KEY)
+        flushing_key = _access_key(PROPERTY_VIEWS_FLUSHING_KEY)
+        flush_id_key = _access_key(PROPERTY_VIEWS_FLUSH_ID_KEY)
+        if not redis_conn.exists(flushing_key):
+            # RENAMENX fails without a pending hash, i.e. no views since the last flush
+            if not redis_conn.exists(pending_key) or not redis_conn.renamenx(pending_key, flushing_key):
+                return 0
+            redis_conn.set(flush_id_key, uuid.uuid4().hex)
+        # A flush that died right after the rename left the snapshot without an id
+        redis_conn.set(flush_id_key, uuid.uuid4().hex, nx=True)
+        flush_id = redis_conn.get(flush_id_key).decode('utf-8')
+        
+        views = {int(pk): int(count) for pk, count in redis_conn.hgetall(flushing_key).items()}
+        if PropertyViewFlush.objects.filter(flush_id=flush_id).exists():
+            logger.warning(f"Views of flush {flush_id} were already written; deleting the snapshot")
+            redis_conn.delete(flushing_key, flush_id_key)
+            return 0
+        
+        items = list(views.items())
+        with transaction.atomic():
+            for start in range(0, len(items), 1000):
+                batch = items[start:start + 1000]
+                Property.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+                    view_count=F('view_count') + Case(
+                        *(When(pk=pk, then=Value(count)) for pk, count in batch),
+                        default=Value(0),
+                    )
+                )
+            PropertyViewFlush.objects.all().delete()
+            PropertyViewFlush.objects.create(flush_id=flush_id)
+        # One DEL, so the id is never left behind for the next snapshot
+        redis_conn.delete(flushing_key, flush_id_key)
+        logger.info(f"Flushed {sum(views.values())} views of {len(views)} properties")
+        return sum(views.values())
+    finally:
+        # Never release a lock that expired and was taken over by another flush
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
 
 
-def get_redis_cache_metrics():
+@contextmanager
+def preserve_access_counts():
+    """
+    Keep the recorded access and view counts across a full cache flush.
+    
+    Without them warm_property_cache would not know what to prewarm after
+    clear_property_cache --all, and unflushed views would be lost. They
+    are restored even if the flush fails partway.
+    """
+    redis_conn = get_redis_connection("default")
+    keys = [
+        _access_key(key)
+        for key in (
+            PROPERTY_PAGE_ACCESS_KEY,
+            PROPERTY_SEARCH_ACCESS_KEY,
+            PROPERTY_VIEWS_PENDING_KEY,
+            PROPERTY_VIEWS_FLUSHING_KEY,
+            PROPERTY_VIEWS_FLUSH_ID_KEY,
+            PROPERTY_POPULARITY_KEY,
+        )
+    ]
+    dumps = {key: redis_conn.dump(key) for key in keys}
+    try:
+        yield
+    finally:
+        for key, dump in dumps.items():
+            if dump is not None:
+                # REPLACE: the keys are still there if the flush failed
+                redis_conn.restore(key, 0, dump, replace=True)
+
+
+def invalidate_property_caches():
+    """
+    Invalidate every cached property list, entry, page and search result.
+    
+    For bulk changes that bypass the per-row signals; one call replaces the
+    per-row invalidations those changes would otherwise have triggered.
+    """
+    cache.delete_many(
+        [ALL_PROPERTIES_CACHE_KEY, PROPERTY_COUNT_CACHE_KEY, PROPERTY_INDEX_CACHE_KEY],
+        version=PROPERTY_CACHE_VERSION,
+    )
+    cache.delete_pattern(property_cache_key('*'), version=PROPERTY_CACHE_VERSION)
+    bump_property_list_generation()
+    bump_tags([CATALOGUE_EPOCH_TAG])
+    mark_facets_stale()
+    set_catalogue_last_modified(timezone.now())
+    broadcast_invalidation(None)
+
+
+def get_redis_cache_metrics(alias='default'):
     """
     Get Redis cache performance metrics.
     
     Connects to Redis via django_redis, retrieves keyspace_hits and keyspace_misses
     from INFO command, calculates hit ratio, and logs the metrics.
     
+    Args:
+        alias: Cache alias whose Redis server and database are measured
+    
     Returns:
         dict: Dictionary containing cache metrics including:
+            - alias: The measured cache alias
             - keyspace_hits: Number of successful cache hits
             - keyspace_misses: Number of cache misses
             - hit_ratio: Calculated hit ratio (hits / (hits + misses))
             - total_requests: Total number of cache requests
+            - keys: Number of keys in the alias' Redis database
+            - circuit_breaker: State and counters of the alias' Redis
+              server circuit breaker in this process (None without a client)
+            - fallbacks: Reads this process served without Redis, per operation
             - error: Error message if connection fails (None if successful)
+    
+    Hits and misses are counted by the Redis server, across all of its
+    databases; keys counts the alias' own database only.
     """
+    redis_conn = None
     try:
         # Get Redis connection
-        redis_conn = get_redis_connection("default")
+        redis_conn = get_redis_connection(alias)
         
         # Get Redis INFO command output
         info = redis_conn.info()
         
-        # Extract keyspace statistics
-        keyspace_hits = info.get('keyspace_hits', 0)
-        keyspace_misses = info.get('keyspace_misses', 0)
-        
-        # Calculate total requests and hit ratio
-        total_requests = keyspace_hits + keyspace_misses
-        hit_ratio = keyspace_hits / total_requests if total_requests > 0 else 0.0
-        
-        # Prepare metrics dictionary
-        metrics = {
-            'keyspace_hits': keyspace_hits,
-            'keyspace_misses': keyspace_misses,
-            'hit_ratio': round(hit_ratio, 4),  # Round to 4 decimal places
-            'total_requests': total_requests,
-            'error': None
-        }
-        
-        # Log the metrics
-        logger.info(
-            f"Redis Cache Metrics - Hits: {keyspace_hits}, "
-            f"Misses: {keyspace_misses}, Hit Ratio: {hit_ratio:.4f}, "
-            f"Total Requests: {total_requests}"
-        )
-        
-        return metrics
+        metrics = _cache_metrics_from_info(info, alias, redis_conn.dbsize())
         
     except Exception as e:
-        error_msg = f"Failed to get Redis cache metrics: {str(e)}"
-        logger.error(error_msg)
-        
-        # Return error metrics
-        return {
-            'keyspace_hits': 0,
-            'keyspace_misses': 0,
-            'hit_ratio': 0.0,
-            'total_requests': 0,
-            'error': error_msg
-        }
+        metrics = _cache_metrics_error(e, alias)
+    return _with_resilience_stats(metrics, redis_conn)
+
+
+async def aget_redis_cache_metrics():
+    """
+    Async counterpart of get_redis_cache_metrics(), reading INFO with redis.asyncio.
+    
+    Returns:
+        dict: Same fields as get_redis_cache_metrics(), for the default alias
+    """
+    redis_conn = None
+    try:
+        redis_conn = get_async_redis_connection()
+        info = await redis_conn.info()
+        metrics = _cache_metrics_from_info(info, 'default', await redis_conn.dbsize())
+    except Exception as e:
+        metrics = _cache_metrics_error(e, 'default')
+    return _with_resilience_stats(metrics, redis_conn)
+
+
+def _with_resilience_stats(metrics, redis_conn):
+    metrics['circuit_breaker'] = None if redis_conn is None else circuit_breaker_for(redis_conn).stats()
+    metrics['fallbacks'] = get_fallback_counts()
+    return metrics
+
+
+def _cache_metrics_from_info(info, alias, keys):
+    # Extract keyspace statistics
+    keyspace_hits = info.get('keyspace_hits', 0)
+    keyspace_misses = info.get('keyspace_misses', 0)
+    
+    # Calculate total requests and hit ratio
+    total_requests = keyspace_hits + keyspace_misses
+    hit_ratio = keyspace_hits / total_requests if total_requests > 0 else 0.0
+    
+    # Prepare metrics dictionary
+    metrics = {
+        'alias': alias,
+        'keyspace_hits': keyspace_hits,
+        'keyspace_misses': keyspace_misses,
+        'hit_ratio': round(hit_ratio, 4),  # Round to 4 decimal places
+        'total_requests': total_requests,
+        'keys': keys,
+        'error': None
+    }
+    
+    # Log the metrics
+    logger.info(
+        f"Redis Cache Metrics ({alias}) - Hits: {keyspace_hits}, "
+        f"Misses: {keyspace_misses}, Hit Ratio: {hit_ratio:.4f}, "
+        f"Total Requests: {total_requests}, Keys: {keys}"
+    )
+    
+    return metrics
+
+
+def _cache_metrics_error(e, alias):
+    error_msg = f"Failed to get Redis cache metrics for '{alias}': {str(e)}"
+    logger.error(error_msg)
+    
+    # Return error metrics
+    return {
+        'alias': alias,
+        'keyspace_hits': 0,
+        'keyspace_misses': 0,
+        'hit_ratio': 0.0,
+        'total_requests': 0,
+        'keys': 0,
+        'error': error_msg
+    }
+
+
+def apply_property_changes(property_ids, tags=(), last_modified=None, count_changed=False):
+    """
+    Bring the caches in line with the committed state of some properties.
+    
+    Used by properties.invalidation once a transaction commits, so it reads
+    the rows rather than trusting what the transaction saw: an id that was
+    deleted, or whose create was rolled back, is evicted; every other id
+    has its entry rewritten.
+    
+    Args:
+        property_ids: Ids of the created, updated or deleted properties
+        tags: Extra tags to bump, e.g. for the values properties had before
+        last_modified: When the change happened, for Last-Modified headers
+        count_changed: Whether properties were created or deleted
+        
+    Returns:
+        tuple: (ids refreshed, ids evicted)
+        
+    Cache Strategy:
+        - One id__in query for the rows
+        - One pipeline for the entries, index membership, view counters,
+          location facets, assembled list, listing generation,
+          Last-Modified, tags and the broadcast to every worker's
+          in-process tier
+    """
+    property_ids = sorted(set(property_ids))
+    rows = list(Property.objects.filter(id__in=property_ids).values_list(*PROPERTY_ROW_FIELDS))
+    with serialization_timer():
+        entries = dict(zip((row[0] for row in rows), encode_property_rows(rows)))
+    evicted = [pk for pk in property_ids if pk not in entries]
+    
+    tags = {CATALOGUE_TAG, *tags}
+    for _, _, _, price, location, *_ in rows:
+        tags.update(property_tags(location, price))
+    stale_keys = [ALL_PROPERTIES_CACHE_KEY]
+    if count_changed:
+        stale_keys.append(PROPERTY_COUNT_CACHE_KEY)
+    
+    pipeline = get_redis_connection("default").pipeline(transaction=False)
+    for pk, entry in entries.items():
+        pipeline.set(
+            cache.make_key(property_cache_key(pk), version=PROPERTY_CACHE_VERSION),
+            cache.client.encode(entry),
+            ex=PROPERTY_ENTRY_CACHE_TIMEOUT,
+        )
+    if entries:
+        pipeline.zadd(_property_index_key(), {pk: pk for pk in entries})
+    if evicted:
+        pipeline.delete(*(cache.make_key(property_cache_key(pk), version=PROPERTY_CACHE_VERSION) for pk in evicted))
+        pipeline.zrem(_property_index_key(), *evicted)
+        pipeline.hdel(_access_key(PROPERTY_VIEWS_PENDING_KEY), *evicted)
+        pipeline.zrem(_access_key(PROPERTY_POPULARITY_KEY), *evicted)
+    queue_facet_changes(pipeline, [(pk, location, price) for pk, _, _, price, location, *_ in rows], evicted)
+    pipeline.delete(*(cache.make_key(key, version=PROPERTY_CACHE_VERSION) for key in stale_keys))
+    
+    generation_key = cache.make_key(PROPERTY_LIST_GENERATION_KEY)
+    pipeline.set(generation_key, int(time.time() * 1000), nx=True)
+    pipeline.incr(generation_key)
+    pipeline.set(cache.make_key(PROPERTY_LAST_MODIFIED_KEY), cache.client.encode(last_modified or timezone.now()))
+    tag_keys = queue_tag_bumps(pipeline, tags)
+    
+    broadcast_invalidation(stale_keys, version=PROPERTY_CACHE_VERSION, pipeline=pipeline)
+    broadcast_invalidation([PROPERTY_LIST_GENERATION_KEY, PROPERTY_LAST_MODIFIED_KEY, *tag_keys], pipeline=pipeline)
+    pipeline.execute()
+    
+    return list(entries), evicted
@@ -1,47 +1,433 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
-from django.views.decorators.cache import cache_page
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_response_headers
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition
+from .cache_backends import get_round_trip_total
+from .caching import cache_or_fallback, get_tier_stats
+from .changes import CursorExpired, get_property_changes_payload, parse_changes_limit
+from .decorators import cache_page_per_generation, record_access
+from .facets import DEFAULT_FACETS_LIMIT, MAX_FACETS_LIMIT, FacetsUnavailable, get_property_facets
+from .instrumentation import get_request_metrics
 from .models import Property
-from .utils import get_all_properties, get_redis_cache_metrics
+from .pagination import InvalidCursor, decode_cursor, parse_page_size
+from .prometheus import CONTENT_TYPE as PROMETHEUS_CONTENT_TYPE, render_metrics
+from .resilience import REDIS_ERRORS, record_fallback
+from .search import InvalidSearch, normalize_search_params
+from .serializers import PROPERTY_ROW_FIELDS, iter_property_export
+from .utils import (
+    aget_catalogue_etag,
+    aget_catalogue_last_modified,
+    aget_property_batch_payload,
+    aget_property_entry,
+    aget_property_list_payload,
+    aget_redis_cache_metrics,
+    arecord_property_view,
+    get_catalogue_etag,
+    get_catalogue_last_modified,
+    get_popular_properties_payload,
+    get_property_batch_payload,
+    get_property_entry,
+    get_property_list_payload,
+    get_property_page_payload,
+    get_redis_cache_metrics,
+    get_search_payload,
+    record_page_access,
+    record_property_view,
+    record_search_access,
+)
+from calendar import timegm
+import asyncio
 
 # Create your views here.
 
-@cache_page(60 * 15)  # Cache for 15 minutes
+# Browser caching of the listing, as set by cache_page on property_list
+PROPERTY_LIST_MAX_AGE = 60 * 15
+
+# Rows fetched per round trip by the export's server-side cursor
+EXPORT_CHUNK_SIZE = 2000
+
+# Most ids accepted by one /properties/batch/ request
+MAX_BATCH_IDS = 100
+
+# Default and largest ?limit= of /properties/popular/
+DEFAULT_POPULAR_LIMIT = 10
+MAX_POPULAR_LIMIT = 100
+
+# Retry-After of the 503 sent for data kept only in Redis while it is unavailable
+REDIS_UNAVAILABLE_RETRY_AFTER = 10
+
+EXPORT_CONTENT_TYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def service_unavailable(message):
+    """503 with Retry-After, for data that cannot be served right now."""
+    response = JsonResponse({'error': message}, status=503)
+    response['Retry-After'] = str(REDIS_UNAVAILABLE_RETRY_AFTER)
+    return response
+
+
+def redis_unavailable(operation, error):
+    """503 for views whose data has no database fallback, while Redis is unavailable."""
+    record_fallback(operation, error)
+    return service_unavailable('Temporarily unavailable, try again later')
+
+
+def record_list_access(request):
+    """Count requests for paginated listing pages (see warm_property_cache)."""
+    if 'cursor' in request.GET or 'page_size' in request.GET:
+        cursor = request.GET.get('cursor') or None
+        try:
+            page_size = parse_page_size(request.GET.get('page_size'))
+            if cursor is not None:
+                decode_cursor(cursor)
+        except InvalidCursor:
+            # A 304 is sent before the parameters are validated
+            return
+        record_page_access(cursor, page_size)
+
+
+def record_query_access(request):
+    """Count requests per normalized search (see warm_property_cache)."""
+    try:
+        normalized = normalize_search_params(request.GET)
+    except InvalidSearch:
+        return
+    record_search_access(normalized)
+
+
+def catalogue_etag(request, *args, **kwargs):
+    """ETag for views that render the whole catalogue (see get_catalogue_etag)."""
+    return get_catalogue_etag()
+
+
+def catalogue_last_modified(request, *args, **kwargs):
+    """Last-Modified for views that render the whole catalogue."""
+    return get_catalogue_last_modified()
+
+
+# condition() answers If-None-Match / If-Modified-Since with a 304 before the
+# cache or the ORM is touched
+@record_access(record_list_access)
+@condition(etag_func=catalogue_etag, last_modified_func=catalogue_last_modified)
+@cache_page_per_generation(PROPERTY_LIST_MAX_AGE)  # Cache for 15 minutes or until a property changes
 def property_list(request):
     """
     View to return all properties with Redis caching.
-    Cache duration: 15 minutes (60 * 15 seconds)
-    Uses get_all_properties() utility function for additional Redis caching
-    """
-    properties = get_all_properties()
-    
-    # Convert to JSON-serializable format
-    property_data = []
-    for property in properties:
-        property_data.append({
-            'id': property.id,
-            'title': property.title,
-            'description': property.description,
-            'price': str(property.price),  # Convert Decimal to string for JSON
-            'location': property.location,
-            'created_at': property.created_at.isoformat(),
-            'updated_at': property.updated_at.isoformat(),
-        })
+    Cache duration: 15 minutes (60 * 15 seconds), retired early by property changes
+    Uses get_property_list_payload() for additional Redis caching of the encoded body
     
-    return JsonResponse({
-        'properties': property_data,
-        'count': len(property_data)
-    })
+    Passing ?cursor= or ?page_size= switches to cursor pagination, where each
+    page is fetched by seeking on (created_at, id) and cached on its own.
+    
+    Responses carry a strong ETag and Last-Modified; matching conditional
+    requests get a 304 without any serialization.
+    """
+    if 'cursor' in request.GET or 'page_size' in request.GET:
+        try:
+            page_size = parse_page_size(request.GET.get('page_size'))
+            payload = get_property_page_payload(request.GET.get('cursor') or None, page_size)
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        return HttpResponse(payload, content_type='application/json')
+    
+    payload = get_property_list_payload()
+    
+    # The cached payload is already encoded JSON, so send it as-is
+    return HttpResponse(payload, content_type='application/json')
+
+
+async def property_list_async(request):
+    """
+    Async version of property_list, routed under ASGI (see PROPERTY_ASYNC_VIEWS).
+    
+    The ETag and Last-Modified lookups run concurrently and the payload is
+    read with the redis.asyncio client, so a cached request never leaves the
+    event loop. Paginated requests run the sync page code in a thread.
+    """
+    etag, last_modified = await asyncio.gather(aget_catalogue_etag(), aget_catalogue_last_modified())
+    paginated = 'cursor' in request.GET or 'page_size' in request.GET
+    
+    response = _conditional_response(request, etag, last_modified)
+    if response is None:
+        if paginated:
+            try:
+                page_size = parse_page_size(request.GET.get('page_size'))
+                payload = await sync_to_async(get_property_page_payload)(request.GET.get('cursor') or None, page_size)
+            except InvalidCursor as e:
+                return _with_validators(request, JsonResponse({'error': str(e)}, status=400), etag, last_modified)
+        else:
+            payload = await aget_property_list_payload()
+        response = HttpResponse(payload, content_type='application/json')
+        patch_response_headers(response, PROPERTY_LIST_MAX_AGE)
+    
+    if paginated:
+        await sync_to_async(record_list_access)(request)
+    return _with_validators(request, response, etag, last_modified)
+
+
+def _conditional_response(request, etag, last_modified):
+    # What condition() does for the sync views, with validators looked up asynchronously
+    return get_conditional_response(
+        request,
+        etag=etag and quote_etag(etag),
+        last_modified=last_modified and timegm(last_modified.utctimetuple()),
+    )
+
+
+def _with_validators(request, response, etag, last_modified):
+    if request.method in ('GET', 'HEAD'):
+        if last_modified and not response.has_header('Last-Modified'):
+            response.headers['Last-Modified'] = http_date(timegm(last_modified.utctimetuple()))
+        if etag:
+            response.headers.setdefault('ETag', quote_etag(etag))
+    return response
+
+
+def property_detail(request, pk):
+    """
+    View to return one property from its 'property:<id>' cache entry.
+    Only a miss reads the database; the signals keep entries current.
+    Unknown ids are cached too, for a minute, so repeated 404s skip the database.
+    Each view is counted in Redis for /properties/popular/.
+    """
+    entry = get_property_entry(pk)
+    if entry is None:
+        return JsonResponse({'error': f'Property {pk} not found'}, status=404)
+    record_property_view(pk)
+    return HttpResponse(entry, content_type='application/json')
+
+
+async def property_detail_async(request, pk):
+    """
+    Async version of property_detail: redis.asyncio for the entry, the async
+    ORM (aget) on a miss.
+    """
+    entry = await aget_property_entry(pk)
+    if entry is None:
+        return JsonResponse({'error': f'Property {pk} not found'}, status=404)
+    await arecord_property_view(pk)
+    return HttpResponse(entry, content_type='application/json')
+
+
+def parse_batch_ids(value):
+    """
+    Validate a ?ids= value such as '3,1,2'.
+    
+    Returns:
+        list: Distinct ids in request order
+        
+    Raises:
+        ValueError: If an id is not a positive integer, or there are none
+        or more than MAX_BATCH_IDS
+    """
+    property_ids = []
+    for part in (value or '').split(','):
+        if not part.strip().isdigit() or int(part) < 1:
+            raise ValueError(f'Invalid id: {part!r}')
+        if int(part) not in property_ids:
+            property_ids.append(int(part))
+    if len(property_ids) > MAX_BATCH_IDS:
+        raise ValueError(f'At most {MAX_BATCH_IDS} ids per request')
+    return property_ids
+
+
+def property_batch(request):
+    """
+    View to return several properties by id: /properties/batch/?ids=3,1,2
+    Served by one MGET of the 'property:<id>' entries plus one id__in query
+    for the misses. Ids that do not exist are listed under "missing".
+    """
+    try:
+        property_ids = parse_batch_ids(request.GET.get('ids'))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return HttpResponse(get_property_batch_payload(property_ids), content_type='application/json')
+
+
+async def property_batch_async(request):
+    """
+    Async version of property_batch.
+    """
+    try:
+        property_ids = parse_batch_ids(request.GET.get('ids'))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return HttpResponse(await aget_property_batch_payload(property_ids), content_type='application/json')
+
+
+def parse_limit(value, default, maximum):
+    """
+    Validate a ?limit= value.
+    
+    Returns:
+        int: The default for None, otherwise a limit between 1 and maximum
+        
+    Raises:
+        ValueError: If the value is not an integer in that range
+    """
+    if value is None:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= maximum:
+        raise ValueError(f'limit must be between 1 and {maximum}')
+    return limit
+
+
+def property_popular(request):
+    """
+    View to return the most viewed properties: /properties/popular/?limit=10
+    Ranked straight from the Redis sorted set of view counts, which includes
+    views not yet flushed to the database; bodies come from the entry cache.
+    503 while Redis is unavailable.
+    """
+    try:
+        limit = parse_limit(request.GET.get('limit'), DEFAULT_POPULAR_LIMIT, MAX_POPULAR_LIMIT)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    try:
+        payload = get_popular_properties_payload(limit)
+    except REDIS_ERRORS as e:
+        return redis_unavailable('property_popular', e)
+    return HttpResponse(payload, content_type='application/json')
+
+
+def property_facets(request):
+    """
+    View to return listing counts and price statistics per location:
+    /properties/facets/?location=Downtown&limit=100
+    Read from Redis, where the save and delete signals keep them up to date,
+    so no request aggregates the Property table; 503 while Redis is
+    unavailable, or before the first snapshot has been built in the background.
+    """
+    try:
+        limit = parse_limit(request.GET.get('limit'), DEFAULT_FACETS_LIMIT, MAX_FACETS_LIMIT)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    try:
+        facets = get_property_facets(request.GET.getlist('location') or None, limit)
+    except FacetsUnavailable as e:
+        return service_unavailable(str(e))
+    except REDIS_ERRORS as e:
+        return redis_unavailable('property_facets', e)
+    return JsonResponse({'locations': facets, 'count': len(facets)})
+
+
+def property_changes(request):
+    """
+    View to return what changed since a cursor: /properties/changes/?since=<cursor>
+    Created and updated properties come from the updated_at index, deleted
+    ones from their tombstones; follow next_cursor while has_more is true.
+    Without ?since= only a cursor to start from is returned. Cursors older
+    than the tombstone retention get 410 Gone: resync from /properties/.
+    """
+    try:
+        limit = parse_changes_limit(request.GET.get('limit'))
+        payload = get_property_changes_payload(request.GET.get('since') or None, limit)
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except CursorExpired as e:
+        return JsonResponse({'error': str(e)}, status=410)
+    return HttpResponse(payload, content_type='application/json')
+
+
+@record_access(record_query_access)
+@condition(etag_func=catalogue_etag, last_modified_func=catalogue_last_modified)
+def property_search(request):
+    """
+    View to search properties by location, price range, creation window and text.
+    
+    Query parameters: location, min_price, max_price, created_after,
+    created_before, q (full-text over title and description),
+    sort (recent, price or -price) and limit (max 200).
+    Results are cached per normalized query.
+    """
+    try:
+        normalized = normalize_search_params(request.GET)
+    except InvalidSearch as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    return HttpResponse(get_search_payload(normalized), content_type='application/json')
+
+
+@condition(etag_func=catalogue_etag, last_modified_func=catalogue_last_modified)
+def property_export(request):
+    """
+    View to stream the full property catalogue as JSON or NDJSON.
+    Rows are read through a server-side cursor and encoded chunk by chunk,
+    so memory use stays bounded regardless of catalogue size.
+    Use ?format=ndjson for one JSON object per line (default: json).
+    """
+    export_format = request.GET.get('format', 'json')
+    if export_format not in EXPORT_CONTENT_TYPES:
+        return JsonResponse(
+            {'error': f"Unsupported format: {export_format!r}. Use 'json' or 'ndjson'."},
+            status=400
+        )
+    
+    rows = (
+        Property.objects.order_by('id')
+        .values_list(*PROPERTY_ROW_FIELDS)
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    response = StreamingHttpResponse(
+        iter_property_export(rows, export_format),
+        content_type=EXPORT_CONTENT_TYPES[export_format]
+    )
+    response['Content-Disposition'] = f'attachment; filename="properties.{export_format}"'
+    return response
 
 
 def cache_metrics(request):
     """
     View to return Redis cache performance metrics.
-    Returns cache hit/miss statistics and hit ratio.
+    Returns cache hit/miss statistics and hit ratio, plus this worker's
+    in-process (l1) and Redis (l2) tier counters and Redis round trips, and
+    per-view request latency histograms with cache/DB averages. The
+    histograms are empty while Redis is unavailable.
     """
     metrics = get_redis_cache_metrics()
     
     return JsonResponse({
         'cache_metrics': metrics,
-        'timestamp': '2024-01-01T12:00:00Z'  # You could use timezone.now().isoformat()
+        'tiers': get_tier_stats(),
+        'redis_round_trips': get_round_trip_total(),
+        'views': cache_or_fallback('request_metrics', get_request_metrics, dict),
+        'timestamp': timezone.now().isoformat()
     })
+
+
+async def cache_metrics_async(request):
+    """
+    Async version of cache_metrics. Redis INFO is read with redis.asyncio
+    while the per-view aggregates are read in a thread, concurrently.
+    """
+    metrics, views = await asyncio.gather(
+        aget_redis_cache_metrics(),
+        sync_to_async(cache_or_fallback)('request_metrics', get_request_metrics, dict),
+    )
+    
+    return JsonResponse({
+        'cache_metrics': metrics,
+        'tiers': get_tier_stats(),
+        'redis_round_trips': get_round_trip_total(),
+        'views': views,
+        'timestamp': timezone.now().isoformat()
+    })
+
+
+def prometheus_metrics(request):
+    """
+    View to expose cache, Redis and database metrics for Prometheus.
+    Served at /metrics in the text exposition format; counters and
+    histograms are aggregated across all worker processes.
+    """
+    return HttpResponse(render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
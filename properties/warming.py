@@ -0,0 +1,160 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.core.cache import cache
+from django.db import connections
+from .caching import get_cache_aside_value
+from .models import Property
+from .pagination import InvalidCursor
+from .search import InvalidSearch
+from .serializers import PROPERTY_ROW_FIELDS, encode_property_rows
+from .utils import (
+    ALL_PROPERTIES_CACHE_KEY,
+    PROPERTY_CACHE_VERSION,
+    PROPERTY_ENTRY_CACHE_TIMEOUT,
+    get_catalogue_last_modified,
+    get_popular_pages,
+    get_popular_searches,
+    get_property_count,
+    get_property_ids,
+    get_property_list_payload,
+    get_property_page_payload,
+    get_search_payload,
+    property_cache_key,
+    property_page_cache_key,
+    search_cache_key,
+)
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WARM_WORKERS = 4
+DEFAULT_WARM_PAGES = 20
+DEFAULT_WARM_SEARCHES = 50
+
+# Property entries loaded per query and written per pipelined SET batch
+WARM_ENTRY_BATCH_SIZE = 1000
+
+# Held by the process running the post-deploy prewarm, so that only one of
+# several workers starting at once does the work
+PREWARM_LOCK_KEY = 'property_prewarm_lock'
+PREWARM_LOCK_TIMEOUT = 60 * 5
+
+
+def warm_property_caches(workers=DEFAULT_WARM_WORKERS, pages=DEFAULT_WARM_PAGES,
+                         searches=DEFAULT_WARM_SEARCHES):
+    """
+    Fill the property caches before traffic arrives.
+    
+    Args:
+        workers: Size of the thread pool running the warm-up tasks
+        pages: Number of most requested listing pages to warm
+        searches: Number of most requested searches to warm
+        
+    Returns:
+        dict: Counts of warmed 'entries', 'lists', 'pages' and 'searches', the
+        'bytes' of payloads written to Redis and the elapsed 'seconds'
+        
+    Cache Strategy:
+        - Write every 'property:<id>' entry, one id__in query and one
+          pipelined set_many per batch, batches spread over the pool
+        - Then build 'all_properties' from those entries, plus the count,
+          Last-Modified and the popular pages and searches, concurrently
+        - Popularity comes from the access counts the views record; pages
+          and searches that are already cached are left alone
+    """
+    start = time.perf_counter()
+    stats = {'entries': 0, 'lists': 0, 'pages': 0, 'searches': 0, 'bytes': 0}
+    stats_lock = threading.Lock()
+
+    def add(kind, count, size):
+        with stats_lock:
+            stats[kind] += count
+            stats['bytes'] += size
+
+    def warm_entries(property_ids):
+        rows = list(Property.objects.filter(id__in=property_ids).values_list(*PROPERTY_ROW_FIELDS))
+        entries = dict(zip((property_cache_key(row[0]) for row in rows), encode_property_rows(rows)))
+        cache.set_many(entries, PROPERTY_ENTRY_CACHE_TIMEOUT, version=PROPERTY_CACHE_VERSION)
+        add('entries', len(entries), sum(len(entry) for entry in entries.values()))
+
+    def warm_payload(kind, key, build):
+        cold = get_cache_aside_value(key, version=PROPERTY_CACHE_VERSION) is None
+        try:
+            payload = build()
+        except (InvalidCursor, InvalidSearch) as e:
+            # Access counts recorded before they were validated
+            logger.warning(f"Skipped warming an invalid {kind} entry: {e}")
+            return
+        if cold:
+            add(kind, 1, len(payload))
+
+    def warm_catalogue():
+        get_property_count()
+        get_catalogue_last_modified()
+        warm_payload('lists', ALL_PROPERTIES_CACHE_KEY, get_property_list_payload)
+
+    property_ids = get_property_ids()
+    tasks = [
+        (warm_entries, property_ids[i:i + WARM_ENTRY_BATCH_SIZE])
+        for i in range(0, len(property_ids), WARM_ENTRY_BATCH_SIZE)
+    ]
+    _run_concurrently(tasks, workers)
+
+    tasks = [(warm_catalogue,)]
+    tasks += [
+        (warm_payload, 'pages', property_page_cache_key(cursor, page_size),
+         lambda cursor=cursor, page_size=page_size: get_property_page_payload(cursor, page_size))
+        for cursor, page_size in get_popular_pages(pages)
+    ]
+    tasks += [
+        (warm_payload, 'searches', search_cache_key(normalized),
+         lambda normalized=normalized: get_search_payload(normalized))
+        for normalized in get_popular_searches(searches)
+    ]
+    _run_concurrently(tasks, workers)
+
+    stats['seconds'] = time.perf_counter() - start
+    return stats
+
+
+def _run_concurrently(tasks, workers):
+    def run(task):
+        func, *args = task
+        try:
+            func(*args)
+        finally:
+            # Pool threads each open their own database connection
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # list() re-raises the first exception from any task
+        list(executor.map(run, tasks))
+
+
+def prewarm_in_background(options):
+    """
+    Warm the property caches from a daemon thread, once per deploy.
+    
+    Called from PropertiesConfig.ready() when PROPERTY_CACHE_PREWARM is
+    enabled. Failures are logged and never affect startup.
+    
+    Args:
+        options: The PROPERTY_CACHE_PREWARM setting
+    """
+    def prewarm():
+        try:
+            if not cache.add(PREWARM_LOCK_KEY, 1, PREWARM_LOCK_TIMEOUT):
+                return
+            stats = warm_property_caches(
+                workers=options.get('WORKERS', DEFAULT_WARM_WORKERS),
+                pages=options.get('PAGES', DEFAULT_WARM_PAGES),
+                searches=options.get('SEARCHES', DEFAULT_WARM_SEARCHES),
+            )
+            logger.info(f"Prewarmed property caches: {stats}")
+        except Exception as e:
+            logger.error(f"Property cache prewarm failed: {e}")
+        finally:
+            connections.close_all()
+
+    threading.Thread(target=prewarm, name='property-cache-prewarm', daemon=True).start()